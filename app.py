@@ -5,9 +5,30 @@ This module provides the application factory pattern for creating Flask app inst
 Routes are organized in separate blueprint modules in the routes package.
 """
 
+import os
+
 from flask import Flask
-from database import init_database, add_sample_data
+from flask.json.provider import DefaultJSONProvider
+from database import add_sample_data, ensure_database_ready, release_db_connection
+from records import Record
 from routes import register_blueprints
+from services.memory_catalog import replay_pending_writes
+from services.overdue_scheduler import start_overdue_scheduler
+
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """
+    jsonify() that encodes Book/Loan records as objects.
+
+    The json module only encodes real dicts, so each record is copied into
+    one as it is encoded; nothing is converted before jsonify() runs.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o.as_dict()
+        return DefaultJSONProvider.default(o)
 
 
 def create_app():
@@ -19,16 +40,27 @@ def create_app():
     """
     app = Flask(__name__)
     app.secret_key = "super secret key"
+    app.json = RecordJSONProvider(app)
     
-    # Initialize the database
-    init_database()
+    # Initialize the database once for the whole process; request handlers
+    # only check the readiness flag (reported by /health/ready)
+    if ensure_database_ready():
+        # Add sample data for testing and demonstration
+        add_sample_data()
+        
+        # Move books accepted while the database was unreachable into it
+        replay_pending_writes()
     
-    # Add sample data for testing and demonstration
-    add_sample_data()
+    # Keep the overdue loan ledger priced as of today (LIBRARY_OVERDUE_SCHEDULER=0 disables)
+    if os.environ.get('LIBRARY_OVERDUE_SCHEDULER', '1') != '0':
+        start_overdue_scheduler()
     
     # Register all route blueprints
     register_blueprints(app)
     
+    # Hand the request's pooled connection back once the app context ends
+    app.teardown_appcontext(release_db_connection)
+    
     return app
 
 
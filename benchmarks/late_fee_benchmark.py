@@ -0,0 +1,90 @@
+"""
+Time batch late-fee pricing over a large number of open loans.
+
+    python benchmarks/late_fee_benchmark.py [--loans 1000000]
+
+Fills a throwaway database with open loans (roughly a third overdue), then
+compares database.get_late_fee_totals against fetching every open loan and
+pricing it in Python with the per-book schedule. Also times a full build of
+the overdue ledger and the incremental refresh to the next day.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from services.library_service import _calc_fee  # noqa: E402
+
+
+BOOKS = 5000
+
+
+def populate(loans: int, today: date) -> None:
+    database.insert_books_batch([(f"Book {n}", "Author", f"978{n:010d}", 10) for n in range(1, BOOKS + 1)])
+    conn = database.get_db_connection()
+    rng = random.Random(1207)
+    base = datetime.combine(today, datetime.min.time())
+    rows = []
+    for n in range(loans):
+        due = base + timedelta(days=rng.randint(-30, 60), hours=rng.randint(0, 23))
+        rows.append((f"{rng.randint(100000, 199999)}", rng.randint(1, BOOKS),
+                     (due - timedelta(days=14)).isoformat(), due.isoformat()))
+    conn.executemany('''
+        INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES (?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+def python_totals(today: date):
+    conn = database.get_db_connection()
+    totals = {}
+    for patron_id, due_date in conn.execute(
+            'SELECT patron_id, due_date FROM borrow_records WHERE return_date IS NULL'):
+        days = (today - datetime.fromisoformat(due_date).date()).days
+        if days > 0:
+            totals[patron_id] = totals.get(patron_id, 0.0) + _calc_fee(days)
+    return totals
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--loans", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    today = date.today()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, "library.db")
+        database.init_database()
+        started = time.perf_counter()
+        populate(args.loans, today)
+        print(f"{args.loans:,} open loans written in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        sql = database.get_late_fee_totals(today)
+        sql_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        python = python_totals(today)
+        python_seconds = time.perf_counter() - started
+
+        overdue = sum(t["overdue_loans"] for t in sql.values())
+        assert all(abs(sql[p]["fee_cents"] / 100 - python[p]) < 0.005 for p in python)
+        print(f"  {overdue:,} overdue loans across {len(sql):,} patrons")
+        print(f"  SQL aggregate   {sql_seconds * 1000:8.1f} ms")
+        print(f"  Python per-loan {python_seconds * 1000:8.1f} ms")
+
+        for day in (today, today + timedelta(days=1)):
+            started = time.perf_counter()
+            result = database.refresh_overdue_ledger(day)
+            print(f"  {'ledger ' + result['mode']:<15} {(time.perf_counter() - started) * 1000:8.1f} ms"
+                  f"  (added {result['added']:,}, promoted {result['promoted']:,})")
+        database._pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare Book/Loan records against dict-per-row materialization.
+
+    python benchmarks/records_benchmark.py [--books 500000] [--loans 100000]
+
+Fills a throwaway database, then loads the whole catalog and one patron's
+open loans both ways, reporting the best wall time and the memory the
+loaded rows keep alive (tracemalloc). The dict path is the pre-record
+behaviour: dict(row) per row, copied once more by the caller, and every
+loan date parsed up front.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+PATRON = "123456"
+
+
+def populate(books: int, loans: int) -> None:
+    database.insert_books_batch([(f"Title {n:07d}", f"Author {n % 997}", f"978{n:010d}", 3)
+                                 for n in range(1, books + 1)])
+    base = datetime(2024, 1, 1)
+    conn = database.get_db_connection()
+    conn.executemany('''
+        INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES (?, ?, ?, ?)
+    ''', ((PATRON, n % books + 1, (base + timedelta(minutes=n)).isoformat(),
+           (base + timedelta(days=14, minutes=n)).isoformat()) for n in range(loans)))
+    conn.commit()
+
+def dict_books():
+    conn = database.get_db_connection()
+    rows = [dict(book) for book in conn.execute('SELECT * FROM books ORDER BY title').fetchall()]
+    return [dict(book) for book in rows]
+
+def dict_loans():
+    conn = database.get_db_connection()
+    records = conn.execute('''
+        SELECT br.*, b.title, b.author FROM borrow_records br JOIN books b ON br.book_id = b.id
+        WHERE br.patron_id = ? AND br.return_date IS NULL ORDER BY br.borrow_date
+    ''', (PATRON,)).fetchall()
+    return [{
+        'book_id': record['book_id'],
+        'title': record['title'],
+        'author': record['author'],
+        'borrow_date': datetime.fromisoformat(record['borrow_date']),
+        'due_date': datetime.fromisoformat(record['due_date']),
+        'is_overdue': datetime.now() > datetime.fromisoformat(record['due_date']),
+    } for record in records]
+
+def record_loans_with_due_dates():
+    loans = database.get_patron_borrowed_books(PATRON)
+    for loan in loans:
+        loan.due_date
+    return loans
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def retained(fn) -> int:
+    """Bytes still allocated while fn's result is alive."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()  # noqa: F841 - kept alive for the measurement
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+def report(label: str, rows: int, legacy, records, repeat: int) -> None:
+    legacy_s, records_s = best_of(legacy, repeat), best_of(records, repeat)
+    legacy_b, records_b = retained(legacy), retained(records)
+    print(f"  {label:<26} {rows:>9,} {legacy_s * 1000:>10.1f} {records_s * 1000:>10.1f} "
+          f"{legacy_b / 2**20:>9.1f} {records_b / 2**20:>9.1f} {legacy_b / records_b:>7.1f}x")
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=500_000)
+    parser.add_argument("--loans", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, "library.db")
+        database.init_database()
+        started = time.perf_counter()
+        populate(args.books, args.loans)
+        print(f"{args.books:,} books and {args.loans:,} loans written in {time.perf_counter() - started:.1f}s")
+
+        assert database.get_all_books() == dict_books()
+        print(f"  {'':<26} {'rows':>9} {'dict ms':>10} {'record ms':>10} "
+              f"{'dict MiB':>9} {'rec MiB':>9} {'memory':>8}")
+        report("all books", args.books, dict_books, database.get_all_books, args.repeat)
+        report("open loans", args.loans, dict_loans,
+               lambda: database.get_patron_borrowed_books(PATRON), args.repeat)
+        report("open loans, due dates read", args.loans, dict_loans,
+               record_loans_with_due_dates, args.repeat)
+        database._pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compare trigram-indexed substring search against a linear scan, and time
+typo-tolerant (fuzzy) search.
+
+    python benchmarks/search_benchmark.py [--sizes 10000 100000 1000000] [--vocabulary 50000]
+
+Builds synthetic catalogs in memory (no database involved), then times the
+same title/author queries both ways and checks they return the same books.
+Titles draw on a vocabulary of made-up words with a Zipf-like frequency
+(`--vocabulary` distinct words at most, half the catalog size for small
+catalogs), so the fuzzy index sees a realistic number of distinct words
+rather than a handful. The fuzzy index build is timed separately: it runs
+in the background and never delays the snapshot build.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzy import edit_distance, max_distance_for  # noqa: E402
+from services.catalog_snapshot import CatalogSnapshot  # noqa: E402
+
+# common words; the rest of the vocabulary is generated from SYLLABLES
+WORDS = ("river", "shadow", "garden", "winter", "empire", "silent", "glass", "orchard",
+         "harbor", "lantern", "crown", "ember", "meadow", "atlas", "cipher", "hollow",
+         "summit", "velvet", "thunder", "quiet", "amber", "falcon", "island", "mirror")
+SYLLABLES = ("ka", "lo", "mer", "an", "tis", "vel", "or", "dra", "shi", "quen", "bar", "ul",
+             "rho", "ne", "sta", "gri", "fon", "el", "mi", "tor", "zu", "pha", "ion", "ced")
+SURNAMES = ("Okafor", "Lindqvist", "Moreau", "Tanaka", "Alvarez", "Novak", "Haddad",
+            "Fitzgerald", "Kowalski", "Nguyen", "Brennan", "Rossi", "Sato", "Mbeki")
+
+# (field, term): rare, common and short terms
+QUERIES = (("title", "lantern crown"), ("title", "garden"), ("title", "er"),
+           ("author", "lindq"), ("author", "novak 1"), ("title", "no such phrase"))
+# misspelled words for fuzzy search
+FUZZY_QUERIES = ("lanturn", "fitzgerld", "okafr meadw", "qwertyuiop")
+
+
+def make_vocabulary(size: int, rng: random.Random):
+    words = list(WORDS)
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+def make_books(n: int, vocabulary: int = 50_000, seed: int = 1207):
+    rng = random.Random(seed)
+    words = make_vocabulary(max(len(WORDS), min(vocabulary, n // 2)), rng)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return [{
+        "id": i,
+        "title": " ".join(rng.choices(words, weights, k=rng.randint(2, 5))).title(),
+        "author": f"{rng.choice(SURNAMES)} {rng.randint(1, 500)}",
+        "isbn": f"978{i:010d}",
+        "total_copies": 3,
+        "available_copies": 3,
+    } for i in range(1, n + 1)]
+
+def linear_search(books, term: str, field: str):
+    """The pre-index behaviour: lowercase every row and test containment."""
+    key = term.lower()
+    return [dict(b) for b in books if key in str(b.get(field) or "").strip().lower()]
+
+def misspell(word: str) -> str:
+    """`word` with one letter dropped from the middle."""
+    return word[:len(word) // 2] + word[len(word) // 2 + 1:]
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run(size: int, vocabulary: int, repeat: int) -> None:
+    books = make_books(size, vocabulary)
+    started = time.perf_counter()
+    snapshot = CatalogSnapshot(1, books)
+    build = time.perf_counter() - started
+    started = time.perf_counter()
+    tokens = snapshot._tokens.get(snapshot._documents)
+    fuzzy_build = time.perf_counter() - started
+    ordered = snapshot.books
+    print(f"\n{size:,} books  (snapshot + trigram build {build:.2f}s, "
+          f"fuzzy index {fuzzy_build:.2f}s over {len(tokens):,} distinct words)")
+    print(f"  {'query':<24} {'hits':>8} {'linear ms':>11} {'indexed ms':>11} {'speedup':>8}")
+    for field, term in QUERIES:
+        expected = linear_search(ordered, term, field)
+        assert snapshot.search(term, field) == expected, (field, term)
+        linear = best_of(lambda: linear_search(ordered, term, field), repeat)
+        indexed = best_of(lambda: snapshot.search(term, field), repeat)
+        print(f"  {field + ':' + term:<24} {len(expected):>8} {linear * 1000:>11.2f} "
+              f"{indexed * 1000:>11.3f} {linear / indexed:>7.0f}x")
+    vocabulary_words = list(tokens._ids)
+    print(f"  {'fuzzy query':<24} {'hits':>8} {'scan ms':>11} {'indexed ms':>11} {'speedup':>8}")
+    for term in FUZZY_QUERIES + tuple(misspell(w) for w in vocabulary_words[-3:]):
+        hits = len(snapshot.fuzzy_search(term))
+        elapsed = best_of(lambda: snapshot.fuzzy_search(term), repeat)
+        # what a lookup would cost comparing every vocabulary word
+        scan = best_of(lambda: [w for w in vocabulary_words for t in term.split()
+                                if edit_distance(t, w, max_distance_for(t)) <= max_distance_for(t)], 1)
+        print(f"  {'fuzzy:' + term:<24} {hits:>8} {scan * 1000:>11.1f} {elapsed * 1000:>11.3f} "
+              f"{scan / elapsed:>7.0f}x")
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    for size in args.sizes:
+        run(size, args.vocabulary, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
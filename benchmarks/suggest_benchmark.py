@@ -0,0 +1,55 @@
+"""
+Measure autocomplete latency of the prefix index.
+
+    python benchmarks/suggest_benchmark.py [--sizes 10000 100000 1000000]
+
+Builds the same synthetic catalogs as search_benchmark.py with random
+borrow counts, then reports p50/p99 latency over random 1-6 character
+prefixes of real titles and authors.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from search_benchmark import make_books  # noqa: E402
+from prefix import PrefixIndex  # noqa: E402
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run(size: int, queries: int) -> None:
+    rng = random.Random(size)
+    books = make_books(size)
+    print(f"\n{size:,} books")
+    for field in ("title", "author"):
+        started = time.perf_counter()
+        index = PrefixIndex((b[field], rng.randint(0, 50)) for b in books)
+        build = time.perf_counter() - started
+        prefixes = [b[field][:rng.randint(1, 6)] for b in rng.sample(books, min(queries, size))]
+        samples = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.complete(prefix, 10)
+            samples.append(time.perf_counter() - started)
+        print(f"  {field:<7} {len(index):>9,} values  build {build:6.2f}s  "
+              f"p50 {percentile(samples, 0.5) * 1e6:7.1f}us  p99 {percentile(samples, 0.99) * 1e6:7.1f}us")
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args(argv)
+    for size in args.sizes:
+        run(size, args.queries)
+
+
+if __name__ == "__main__":
+    main()
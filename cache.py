@@ -0,0 +1,129 @@
+"""
+In-process caching primitives shared by the database and service layers.
+"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded least-recently-used mapping.
+
+    Keeps hit/miss/eviction counters so callers can size it. `on_evict`, if
+    given, is called with (key, value) whenever an entry is pushed out by the
+    size bound (not on explicit pop/clear).
+
+    Optionally, entries expire `ttl` seconds after they were stored, and
+    `max_bytes` bounds the total of `sizeof(value)` over all entries; the
+    least recently used entries are evicted until both limits hold.
+    """
+
+    def __init__(self, maxsize: int, on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+                 ttl: Optional[float] = None, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes needs a sizeof function")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._on_evict = on_evict
+        self._sizeof = sizeof
+        # key -> (value, size in bytes, expiry time or None)
+        self._data: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value, size, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                self.bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) if self._sizeof is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # would evict everything else and still not fit
+            self.pop(key)
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            old = self._data.get(key)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (value, size, expires)
+            self._data.move_to_end(key)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                old_key, (old_value, old_size, _expires) = self._data.popitem(last=False)
+                self.bytes -= old_size
+                self.evictions += 1
+                if self._on_evict is not None:
+                    self._on_evict(old_key, old_value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Invalidate one entry, returning its value if it was cached."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self.invalidations += 1
+            value, size, _expires = self._data.pop(key)
+            self.bytes -= size
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+            self.bytes = 0
+
+    def largest(self, n: int = 10) -> List[Tuple[Hashable, int]]:
+        """The `n` biggest entries as (key, bytes), biggest first."""
+        with self._lock:
+            return heapq.nlargest(n, ((key, entry[1]) for key, entry in self._data.items()),
+                                  key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
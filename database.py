@@ -3,51 +3,408 @@ Database module for Library Management System
 Handles all database operations and connections
 """
 
+import atexit
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache import LRUCache
+from isbn import normalize_isbn
+from migrations import migrate
+from records import Book, Loan, PricedLoan
 
 
 # Database configuration
 DATABASE = 'library.db'
 
+# Maximum number of idle connections kept per database file
+POOL_SIZE = 8
+
+# Applied once when a connection is opened, never again while it is pooled
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA busy_timeout = 5000',
+)
+
+# Books kept by the read-through lookup cache (per database file)
+BOOK_CACHE_SIZE = 1024
+
+# Rows pulled per fetchmany() round trip when streaming exports
+EXPORT_FETCH_SIZE = 500
+
+# Shortest term the trigram full-text index can match
+FULLTEXT_MIN_TERM_LENGTH = 3
+
+# Retry policy for write transactions that hit SQLITE_BUSY
+BUSY_RETRIES = 5
+BUSY_BACKOFF_SECONDS = 0.05
+
+# Seconds a failed database initialization is remembered before retrying
+READINESS_RETRY_SECONDS = 5.0
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that can carry per-connection bookkeeping attributes."""
+
+    # last PRAGMA data_version the book cache saw on this connection
+    data_version_seen = None
+
+
+class ConnectionPool:
+    """
+    Hands out one SQLite connection per thread and keeps released
+    connections around for the next thread instead of closing them.
+    """
+
+    def __init__(self, max_idle: int = POOL_SIZE):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._idle: Dict[str, List[sqlite3.Connection]] = {}
+        self._open: List[sqlite3.Connection] = []
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def _held(self) -> Dict[str, sqlite3.Connection]:
+        held = getattr(self._local, 'conns', None)
+        if held is None:
+            held = self._local.conns = {}
+        return held
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        for pragma in CONNECTION_PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.OperationalError:
+                # e.g. WAL cannot be enabled while another process holds a lock
+                pass
+        return conn
+
+    def acquire(self, path: str) -> sqlite3.Connection:
+        """Return the calling thread's connection to `path`, opening one if needed."""
+        held = self._held()
+        conn = held.get(path)
+        if conn is not None:
+            with self._lock:
+                self.hits += 1
+            return conn
+
+        with self._lock:
+            idle = self._idle.get(path)
+            if idle:
+                conn = idle.pop()
+                self.hits += 1
+            else:
+                self.misses += 1
+        if conn is None:
+            conn = self._connect(path)
+            with self._lock:
+                self._open.append(conn)
+        held[path] = conn
+        return conn
+
+    def release(self) -> None:
+        """Give the calling thread's connections back to the idle pool."""
+        held = self._held()
+        while held:
+            path, conn = held.popitem()
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                idle = self._idle.setdefault(path, [])
+                if len(idle) < self.max_idle:
+                    idle.append(conn)
+                    continue
+                self.discarded += 1
+                self._open.remove(conn)
+            conn.close()
+
+    def close_all(self) -> None:
+        """Close every connection the pool has opened (used at interpreter exit)."""
+        with self._lock:
+            conns, self._open = self._open, []
+            self._idle.clear()
+        self._local = threading.local()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'discarded': self.discarded,
+                'open': len(self._open),
+                'idle': sum(len(idle) for idle in self._idle.values()),
+            }
+
+
+_pool = ConnectionPool()
+atexit.register(_pool.close_all)
+
+
 def get_db_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row  # This enables column access by name
-    return conn
+    """Get the pooled database connection for the current thread."""
+    return _pool.acquire(DATABASE)
+
+def release_db_connection(exception=None):
+    """Return the current thread's connection to the pool (Flask teardown hook)."""
+    _pool.release()
+
+def get_pool_stats() -> Dict:
+    """Connection pool hit/miss counters."""
+    return _pool.stats()
+
+class BookCache:
+    """
+    Read-through LRU cache of book rows, looked up by id or normalized ISBN.
+    Rows are read-only Book records, so hits are returned without copying.
+
+    Writes made through this module drop their entries as soon as they commit.
+    Writes from anywhere else (other workers, raw connections, sqlite3 shell)
+    are picked up lazily: PRAGMA data_version tells a connection that someone
+    else committed, and the catalog_changes log says which books to forget.
+
+    Every put carries the catalog version its row was read at, and puts
+    older than the last invalidation are dropped, so a lookup that read a
+    row just before a write cannot put it back after the write forgot it.
+    """
+
+    def __init__(self, maxsize: int = BOOK_CACHE_SIZE):
+        self._books = LRUCache(maxsize, on_evict=self._evicted)
+        self._isbn_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_seq: Optional[int] = None
+        # catalog version as of the latest forget or clear
+        self._invalidated_seq = 0
+        self.syncs = 0
+        self.stale_puts = 0
+
+    def _evicted(self, book_id: int, book: Book) -> None:
+        self._isbn_ids.pop(book.get('isbn_norm'), None)
+
+    def sync(self, conn: sqlite3.Connection) -> bool:
+        """
+        Forget books that other connections changed since this one last looked.
+
+        Returns False when the database has no change log yet (not migrated),
+        in which case the cache must be bypassed.
+        """
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if self._last_seq is not None and getattr(conn, 'data_version_seen', None) == data_version:
+            return True
+        try:
+            self._replay_changes(conn)
+        except sqlite3.OperationalError:
+            return False
+        if isinstance(conn, PooledConnection):
+            conn.data_version_seen = data_version
+        return True
+
+    def _replay_changes(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self.syncs += 1
+            if self._last_seq is None:
+                self._last_seq = get_catalog_version(conn)
+                self._clear()
+            else:
+                changes = conn.execute('''
+                    SELECT seq, book_id FROM catalog_changes WHERE seq > ? ORDER BY seq
+                ''', (self._last_seq,)).fetchall()
+                if changes and changes[0]['seq'] != self._last_seq + 1:
+                    # the log was trimmed past our position; start over
+                    self._clear()
+                else:
+                    for change in changes:
+                        self._drop(change['book_id'])
+                if changes:
+                    self._last_seq = changes[-1]['seq']
+            self._invalidated_seq = max(self._invalidated_seq, self._last_seq)
+
+    def get(self, book_id: int) -> Optional[Book]:
+        return self._books.get(book_id)
+
+    def get_by_isbn(self, isbn_norm: str) -> Optional[Book]:
+        book_id = self._isbn_ids.get(isbn_norm)
+        if book_id is None:
+            self._books.misses += 1
+            return None
+        return self._books.get(book_id)
+
+    def put(self, book: Book, seq: int) -> None:
+        """Cache `book`, read at catalog version `seq`, unless it may be stale."""
+        with self._lock:
+            if seq < self._invalidated_seq:
+                self.stale_puts += 1
+                return
+            self._books.put(book['id'], book)
+            if book.get('isbn_norm'):
+                self._isbn_ids[book['isbn_norm']] = book['id']
+
+    def forget(self, book_id: int, seq: int) -> None:
+        """Drop a book changed as of catalog version `seq`."""
+        with self._lock:
+            self._invalidated_seq = max(self._invalidated_seq, seq)
+            self._drop(book_id)
+
+    def forget_isbn(self, isbn_norm: str) -> None:
+        # only used for new books: no row read earlier can hold a new ISBN
+        with self._lock:
+            book_id = self._isbn_ids.pop(isbn_norm, None)
+            if book_id is not None:
+                self._books.pop(book_id)
+
+    def _drop(self, book_id: int) -> None:
+        book = self._books.pop(book_id)
+        if book is not None:
+            self._isbn_ids.pop(book.get('isbn_norm'), None)
+
+    def _clear(self) -> None:
+        self._books.clear()
+        self._isbn_ids.clear()
+
+    def stats(self) -> Dict:
+        stats = self._books.stats()
+        stats['syncs'] = self.syncs
+        stats['stale_puts'] = self.stale_puts
+        stats['catalog_version'] = self._last_seq
+        return stats
+
+
+_book_caches: Dict[str, BookCache] = {}
+
+def _book_cache() -> BookCache:
+    cache = _book_caches.get(DATABASE)
+    if cache is None:
+        cache = _book_caches.setdefault(DATABASE, BookCache())
+    return cache
+
+def _forget_books(book_ids: Iterable[int]) -> None:
+    """Drop books whose changes this thread has just committed from the book cache."""
+    cache = _book_cache()
+    seq = get_catalog_version()
+    for book_id in book_ids:
+        cache.forget(book_id, seq)
+
+def get_book_cache_stats() -> Dict:
+    """Hit/miss/eviction counters of the book lookup cache."""
+    return _book_cache().stats()
+
+def get_catalog_version(conn: Optional[sqlite3.Connection] = None) -> int:
+    """Monotonic counter that moves whenever any book row is inserted, updated or deleted."""
+    conn = conn or get_db_connection()
+    return conn.execute('SELECT COALESCE(MAX(seq), 0) FROM catalog_changes').fetchone()[0]
+
+class Readiness:
+    """
+    Whether one database file has been initialized by this process.
+
+    Initialization (opening the file and applying pending migrations) runs
+    once; afterwards is_ready() is a plain attribute read. A failed attempt
+    is remembered and not repeated until `retry_after` seconds have passed,
+    so a database that is down does not get re-migrated on every request.
+    """
+
+    def __init__(self, path: str, retry_after: float):
+        self.path = path
+        self.retry_after = retry_after
+        self.ready = False
+        self.schema_version: Optional[int] = None
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.last_attempt: Optional[float] = None
+        self.ready_since: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _initialize(self) -> None:
+        self.attempts += 1
+        self.last_attempt = time.monotonic()
+        try:
+            version = migrate(_pool.acquire(self.path))
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+            raise
+        self.mark_ready(version)
+
+    def mark_ready(self, version: int) -> None:
+        self.schema_version = version
+        self.error = None
+        self.ready_since = self.ready_since or time.time()
+        self.ready = True
+
+    def initialize(self) -> int:
+        """Run the migrations now, whatever the state; raises on failure."""
+        with self._lock:
+            self._initialize()
+            return self.schema_version
+
+    def ensure(self) -> bool:
+        if self.ready:
+            return True
+        with self._lock:
+            if self.ready:
+                return True
+            if self.last_attempt is not None and time.monotonic() - self.last_attempt < self.retry_after:
+                return False
+            try:
+                self._initialize()
+            except Exception:
+                return False
+            return True
+
+    def status(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'database': self.path,
+            'schema_version': self.schema_version,
+            'error': self.error,
+            'attempts': self.attempts,
+            'ready_since': datetime.fromtimestamp(self.ready_since).isoformat() if self.ready_since else None,
+        }
+
+
+_readiness: Dict[str, Readiness] = {}
+_readiness_lock = threading.Lock()
+
+def _database_readiness() -> Readiness:
+    state = _readiness.get(DATABASE)
+    if state is None:
+        with _readiness_lock:
+            state = _readiness.setdefault(DATABASE, Readiness(DATABASE, READINESS_RETRY_SECONDS))
+    return state
 
 def init_database():
-    """Initialize the database with required tables."""
-    conn = get_db_connection()
-    
-    # Create books table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            author TEXT NOT NULL,
-            isbn TEXT UNIQUE NOT NULL,
-            total_copies INTEGER NOT NULL,
-            available_copies INTEGER NOT NULL
-        )
-    ''')
-    
-    # Create borrow_records table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS borrow_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            patron_id TEXT NOT NULL,
-            book_id INTEGER NOT NULL,
-            borrow_date TEXT NOT NULL,
-            due_date TEXT NOT NULL,
-            return_date TEXT,
-            FOREIGN KEY (book_id) REFERENCES books (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    """Initialize the database, applying any pending schema migrations."""
+    return _database_readiness().initialize()
+
+def ensure_database_ready() -> bool:
+    """
+    Initialize the database once per process; afterwards just a flag check.
+
+    Returns False (without raising) if initialization failed, in which case
+    it is retried at most every READINESS_RETRY_SECONDS.
+    """
+    return _database_readiness().ensure()
+
+def is_database_ready() -> bool:
+    """Whether the database has been initialized, without touching it."""
+    state = _readiness.get(DATABASE)
+    return state is not None and state.ready
+
+def get_readiness() -> Dict:
+    """Readiness of the current database file, for health checks."""
+    return _database_readiness().status()
 
 def add_sample_data():
     """Add sample data to the database if it's empty."""
@@ -64,9 +421,9 @@ def add_sample_data():
         
         for title, author, isbn, copies in sample_books:
             conn.execute('''
-                INSERT INTO books (title, author, isbn, total_copies, available_copies)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (title, author, isbn, copies, copies))
+                INSERT INTO books (title, author, isbn, isbn_norm, total_copies, available_copies)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (title, author, isbn, normalize_isbn(isbn), copies, copies))
         
         # Make 1984 unavailable by adding a borrow record
         conn.execute('''
@@ -78,84 +435,611 @@ def add_sample_data():
         
         # Update available copies for 1984
         conn.execute('UPDATE books SET available_copies = 0 WHERE id = 3')
+        _count_loan(conn, '123456')
         
         conn.commit()
     
-    conn.close()
 
 # Helper Functions for Database Operations
 
-def get_all_books() -> List[Dict]:
+# Selected in Book field order so each row can be handed straight to Book()
+BOOK_COLUMNS = ', '.join(Book._fields)
+
+def _book_row(cursor: sqlite3.Cursor, row: tuple) -> Book:
+    return Book(*row)
+
+def _query_books(conn: sqlite3.Connection, sql: str, params=()) -> sqlite3.Cursor:
+    """Run a query selecting BOOK_COLUMNS; its rows come back as Book records."""
+    cursor = conn.cursor()
+    cursor.row_factory = _book_row
+    return cursor.execute(sql, params)
+
+def get_all_books() -> List[Book]:
     """Get all books from the database."""
     conn = get_db_connection()
-    books = conn.execute('SELECT * FROM books ORDER BY title').fetchall()
-    conn.close()
-    return [dict(book) for book in books]
+    return _query_books(conn, f'SELECT {BOOK_COLUMNS} FROM books ORDER BY title').fetchall()
 
-def get_book_by_id(book_id: int) -> Optional[Dict]:
-    """Get a specific book by ID."""
+def _read_consistently(read):
+    """
+    Run `read(conn)` inside one read transaction and return its result.
+
+    The thread's pooled connection is used when it is idle. If it is in the
+    middle of a write, a dedicated connection does the reading instead, so
+    that write is neither committed nor rolled back from here.
+    """
     conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
-    conn.close()
-    return dict(book) if book else None
+    dedicated = conn.in_transaction
+    if dedicated:
+        conn = _pool._connect(DATABASE)
+    try:
+        conn.execute('BEGIN')
+        try:
+            return read(conn)
+        finally:
+            conn.rollback()
+    finally:
+        if dedicated:
+            conn.close()
+
+def load_catalog() -> Tuple[int, List[Book]]:
+    """
+    Read every book together with the catalog version they correspond to.
+    Both reads share one read transaction, so the pair is consistent.
+    """
+    def read(conn):
+        version = get_catalog_version(conn)
+        return version, _query_books(conn, f'SELECT {BOOK_COLUMNS} FROM books ORDER BY title, id').fetchall()
+
+    return _read_consistently(read)
+
+def load_catalog_changes(since: int) -> Optional[Tuple[int, List[Book], List[int]]]:
+    """
+    Read what changed in the catalog after version `since`.
+
+    Returns (version, changed rows, deleted ids) from one read transaction,
+    or None when the change log no longer reaches back to `since`.
+    """
+    def read(conn):
+        changes = conn.execute('''
+            SELECT seq, book_id FROM catalog_changes WHERE seq > ? ORDER BY seq
+        ''', (since,)).fetchall()
+        if changes and changes[0]['seq'] != since + 1:
+            return None
+        ids = sorted({change['book_id'] for change in changes})
+        books = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            books += _query_books(
+                conn, f'SELECT {BOOK_COLUMNS} FROM books WHERE id IN ({",".join("?" * len(chunk))})', chunk
+            ).fetchall()
+        version = changes[-1]['seq'] if changes else since
+        present = {book['id'] for book in books}
+        return version, books, [book_id for book_id in ids if book_id not in present]
+
+    return _read_consistently(read)
 
-def get_book_by_isbn(isbn: str) -> Optional[Dict]:
-    """Get a specific book by ISBN."""
+def get_books_page(limit: int, after: Optional[Tuple[str, int]] = None,
+                   before: Optional[Tuple[str, int]] = None) -> Tuple[List[Book], bool]:
+    """
+    One page of the catalog in (title, id) order using keyset pagination.
+
+    Pass `after` (the last row's (title, id)) to page forward or `before`
+    (the first row's) to page backward. The cost is one index seek plus
+    `limit` rows, independent of how deep into the catalog the page is.
+
+    Returns:
+        tuple: (books in title order, whether more rows exist in the paging direction)
+    """
+    conn = get_db_connection()
+    if before is not None:
+        rows = _query_books(conn, f'''
+            SELECT {BOOK_COLUMNS} FROM books WHERE (title, id) < (?, ?)
+            ORDER BY title DESC, id DESC LIMIT ?
+        ''', (before[0], before[1], limit + 1)).fetchall()
+        has_more = len(rows) > limit
+        return rows[:limit][::-1], has_more
+
+    if after is not None:
+        rows = _query_books(conn, f'''
+            SELECT {BOOK_COLUMNS} FROM books WHERE (title, id) > (?, ?)
+            ORDER BY title, id LIMIT ?
+        ''', (after[0], after[1], limit + 1)).fetchall()
+    else:
+        rows = _query_books(conn, f'''
+            SELECT {BOOK_COLUMNS} FROM books ORDER BY title, id LIMIT ?
+        ''', (limit + 1,)).fetchall()
+    has_more = len(rows) > limit
+    del rows[limit:]
+    return rows, has_more
+
+def _read_book(conn: sqlite3.Connection, where: str, params,
+               order: str = 'id') -> Tuple[Optional[Book], int]:
+    """
+    The first book matching `where` in `order` and the catalog version it was read
+    at, in one statement and so one read snapshot: the version a
+    BookCache.put of the row is tagged with.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    seq, *row = cursor.execute(f'''
+        SELECT (SELECT COALESCE(MAX(seq), 0) FROM catalog_changes), b.*
+        FROM (SELECT 1) LEFT JOIN (SELECT {BOOK_COLUMNS} FROM books WHERE {where} ORDER BY {order} LIMIT 1) AS b
+    ''', params).fetchone()
+    return (Book(*row) if row[0] is not None else None), seq
+
+def get_book_by_id(book_id: int) -> Optional[Book]:
+    """Get a specific book by ID (served from the book cache when possible)."""
+    conn = get_db_connection()
+    cache = _book_cache()
+    if not cache.sync(conn):
+        return _query_books(conn, f'SELECT {BOOK_COLUMNS} FROM books WHERE id = ?', (book_id,)).fetchone()
+    cached = cache.get(book_id)
+    if cached is not None:
+        return cached
+    book, seq = _read_book(conn, 'id = ?', (book_id,))
+    if book is not None:
+        cache.put(book, seq)
+    return book
+
+def get_book_by_isbn(isbn: str) -> Optional[Book]:
+    """Get a specific book by ISBN (any spelling: hyphens, ISBN-10 or ISBN-13)."""
     conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE isbn = ?', (isbn,)).fetchone()
-    conn.close()
-    return dict(book) if book else None
+    cache = _book_cache()
+    isbn_norm = normalize_isbn(isbn)
+    # isbn_norm is the unique key; the raw column also covers rows written
+    # by tools that bypass insert_book and leave isbn_norm empty. A row
+    # holding the key wins over one that only matches by spelling (such as
+    # a legacy duplicate set aside by migration 4).
+    if not cache.sync(conn):
+        return _query_books(conn, f'''
+            SELECT {BOOK_COLUMNS} FROM books WHERE isbn_norm = ? OR isbn = ?
+            ORDER BY isbn_norm IS NULL, id LIMIT 1
+        ''', (isbn_norm, isbn)).fetchone()
+    cached = cache.get_by_isbn(isbn_norm)
+    if cached is not None:
+        return cached
+    book, seq = _read_book(conn, 'isbn_norm = ? OR isbn = ?', (isbn_norm, isbn),
+                           'isbn_norm IS NULL, id')
+    if book is not None:
+        cache.put(book, seq)
+    return book
+
+def _like_pattern(term: str) -> str:
+    """A LIKE pattern matching `term` anywhere, with wildcards in it escaped by '\\'."""
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def search_books(term: str, search_type: str, limit: Optional[int] = None,
+                 offset: int = 0) -> Tuple[List[Book], int]:
+    """
+    R6 search done entirely in SQLite, in title order.
+
+    title/author match case-insensitive substrings with LIKE; isbn is an
+    exact probe of the normalized ISBN. Only the requested slice of rows is
+    read, so memory follows the page size, not the catalog size.
+
+    Returns:
+        tuple: (matching rows from offset, up to limit; total number of matches)
+    """
+    if search_type == 'isbn':
+        where, params = 'isbn_norm = ? OR isbn = ?', (normalize_isbn(term), term)
+    elif search_type in ('title', 'author'):
+        where, params = f"{search_type} COLLATE NOCASE LIKE ? ESCAPE '\\'", (_like_pattern(term),)
+    else:
+        raise ValueError(f'Unsupported search type: {search_type}')
+    conn = get_db_connection()
+    total = conn.execute(f'SELECT COUNT(*) FROM books WHERE {where}', params).fetchone()[0]
+    rows = _query_books(conn, f'''
+        SELECT {BOOK_COLUMNS} FROM books WHERE {where} ORDER BY title, id LIMIT ? OFFSET ?
+    ''', params + (-1 if limit is None else limit, offset)).fetchall()
+    return rows, total
+
+def search_books_fulltext(term: str, field: str) -> List[Book]:
+    """
+    Case-insensitive substring search on title or author, best matches first.
 
-def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
+    Uses the books_fts trigram index; raises sqlite3.OperationalError when the
+    index does not exist (SQLite built without FTS5), so callers can fall back.
+    """
+    if field not in ('title', 'author'):
+        raise ValueError(f'Unsupported full-text field: {field}')
+    conn = get_db_connection()
+    if len(term) < FULLTEXT_MIN_TERM_LENGTH:
+        # Trigrams cannot answer 1-2 character terms
+        return search_books(term, field)[0]
+
+    phrase = '"' + term.replace('"', '""') + '"'
+    columns = ', '.join('b.' + column for column in Book._fields)
+    return _query_books(conn, f'''
+        SELECT {columns} FROM books_fts
+        JOIN books b ON b.id = books_fts.rowid
+        WHERE books_fts MATCH ?
+        ORDER BY bm25(books_fts), b.title
+    ''', (f'{field} : {phrase}',)).fetchall()
+
+def get_patron_borrowed_books(patron_id: str) -> List[Loan]:
     """Get currently borrowed books for a patron."""
     conn = get_db_connection()
-    records = conn.execute('''
-        SELECT br.*, b.title, b.author 
+    cursor = conn.cursor()
+    cursor.row_factory = lambda _cursor, row: Loan(*row)
+    return cursor.execute('''
+        SELECT br.book_id, b.title, b.author, br.borrow_date, br.due_date
         FROM borrow_records br 
         JOIN books b ON br.book_id = b.id 
         WHERE br.patron_id = ? AND br.return_date IS NULL
         ORDER BY br.borrow_date
     ''', (patron_id,)).fetchall()
-    conn.close()
-    
-    borrowed_books = []
-    for record in records:
-        borrowed_books.append({
-            'book_id': record['book_id'],
-            'title': record['title'],
-            'author': record['author'],
-            'borrow_date': datetime.fromisoformat(record['borrow_date']),
-            'due_date': datetime.fromisoformat(record['due_date']),
-            'is_overdue': datetime.now() > datetime.fromisoformat(record['due_date'])
-        })
-    
-    return borrowed_books
 
-def get_patron_borrow_count(patron_id: str) -> int:
-    """Get the number of books currently borrowed by a patron."""
+def get_patron_active_loans(patron_id: str) -> int:
+    """The patron's open loan count as kept in patrons.active_loans."""
+    conn = get_db_connection()
+    row = conn.execute('SELECT active_loans FROM patrons WHERE patron_id = ?', (patron_id,)).fetchone()
+    return row['active_loans'] if row else 0
+
+def reconcile_patron_loan_counts(fix: bool = True, sample: int = 20) -> Dict:
+    """
+    Recompute every patron's active_loans from borrow_records in bulk and
+    report the patrons whose counter had drifted (loans written by something
+    other than this module, or by hand). With fix, the counters are
+    corrected in the same transaction.
+
+    Returns:
+        dict: patrons (counters checked), drifted, fixed, and up to `sample`
+              {'patron_id', 'recorded', 'actual'} examples
+    """
+    result = {'patrons': 0, 'drifted': 0, 'fixed': 0, 'drift': []}
+
+    def work(conn):
+        result['patrons'] = conn.execute('SELECT COUNT(*) FROM patrons').fetchone()[0]
+        drifted = conn.execute('''
+            WITH actual AS (
+                SELECT patron_id, COUNT(*) AS loans FROM borrow_records
+                WHERE return_date IS NULL GROUP BY patron_id
+            )
+            SELECT p.patron_id, p.active_loans AS recorded, COALESCE(a.loans, 0) AS actual
+            FROM patrons p LEFT JOIN actual a ON a.patron_id = p.patron_id
+            WHERE p.active_loans != COALESCE(a.loans, 0)
+            UNION ALL
+            SELECT a.patron_id, 0, a.loans FROM actual a
+            WHERE NOT EXISTS (SELECT 1 FROM patrons p WHERE p.patron_id = a.patron_id)
+            ORDER BY 1
+        ''').fetchall()
+        result['drifted'] = len(drifted)
+        result['drift'] = [dict(row) for row in drifted[:sample]]
+        if not fix or not drifted:
+            return 'unchanged'
+        conn.executemany('''
+            INSERT INTO patrons (patron_id, active_loans) VALUES (?, ?)
+            ON CONFLICT (patron_id) DO UPDATE SET active_loans = excluded.active_loans
+        ''', [(row['patron_id'], row['actual']) for row in drifted])
+        result['fixed'] = len(drifted)
+        return 'ok'
+
+    run_in_transaction(work)
+    return result
+
+def get_borrow_counts() -> Dict[int, int]:
+    """Total number of times each book has been borrowed, by book id."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT book_id, COUNT(*) AS count FROM borrow_records GROUP BY book_id
+        ''').fetchall()
+    except sqlite3.OperationalError:
+        # no borrow_records table yet
+        return {}
+    return {row['book_id']: row['count'] for row in rows}
+
+# R4 late-fee schedule in integer cents, as SQL over a `days` column:
+# $0.50/day for the first 7 days overdue, $1.00/day after that, capped at $15.00
+LATE_FEE_CENTS_SQL = 'MIN(1500, 50 * MIN(days, 7) + 100 * MAX(days - 7, 0))'
+
+# Days overdue from which the R4 fee is capped and stops changing
+LATE_FEE_CAP_DAYS = 19
+
+# R4 fee tier of a `days` column: 0 for the first week at $0.50/day,
+# 1 at $1.00/day, 2 once the fee is capped (migrations._LEDGER_TIER_SQL)
+LATE_FEE_TIER_SQL = f'CASE WHEN days >= {LATE_FEE_CAP_DAYS} THEN 2 WHEN days > 7 THEN 1 ELSE 0 END'
+
+# LATE_FEE_CENTS_SQL for overdue `days` already placed in their `tier`
+_TIER_FEE_CENTS_SQL = 'CASE tier WHEN 0 THEN 50 * days WHEN 1 THEN 100 * days - 350 ELSE 1500 END'
+
+# Days a ledger row `o` is overdue as of :as_of
+_LEDGER_DAYS_SQL = 'CAST(julianday(:as_of) - julianday(o.due_day) AS INTEGER)'
+
+def _days_overdue_sql() -> str:
+    # whole days from the due date to the as-of date (both ISO strings)
+    return 'CAST(julianday(:as_of) - julianday(substr(due_date, 1, 10)) AS INTEGER)'
+
+def get_open_loan_fees(as_of: date, patron_id: Optional[str] = None,
+                       book_id: Optional[int] = None) -> List[Dict]:
+    """
+    Every open loan (optionally one patron's, or one patron's copy of one
+    book) with its days overdue and late fee in cents as of `as_of`,
+    oldest borrow first. Loans that are not overdue have 0 for both.
+    """
+    where = ['return_date IS NULL']
+    params = {'as_of': as_of.isoformat()}
+    if patron_id is not None:
+        where.append('patron_id = :patron_id')
+        params['patron_id'] = patron_id
+    if book_id is not None:
+        where.append('book_id = :book_id')
+        params['book_id'] = book_id
+    conn = get_db_connection()
+    rows = conn.execute(f'''
+        SELECT patron_id, book_id, borrow_date, due_date, days AS days_overdue,
+               {LATE_FEE_CENTS_SQL} AS fee_cents
+        FROM (SELECT patron_id, book_id, borrow_date, due_date,
+                     MAX({_days_overdue_sql()}, 0) AS days
+              FROM borrow_records WHERE {' AND '.join(where)})
+        ORDER BY borrow_date
+    ''', params).fetchall()
+    return [dict(row) for row in rows]
+
+def get_late_fee_totals(as_of: date) -> Dict[str, Dict]:
+    """
+    Late fees owed by every patron with an overdue loan as of `as_of`.
+
+    Pricing happens in one aggregate query over the open-loan due-date
+    index, so only overdue loans are read and no loan row reaches Python.
+    Days overdue depend only on the due day, so they are worked out once
+    per distinct due day and joined back rather than once per loan.
+
+    Returns:
+        dict: patron_id -> {'overdue_loans', 'fee_cents', 'max_days_overdue'}
+    """
+    conn = get_db_connection()
+    rows = conn.execute(f'''
+        WITH due_days AS MATERIALIZED (
+            SELECT substr(due_date, 1, 10) AS due_day,
+                   CAST(julianday(:as_of) - julianday(substr(due_date, 1, 10)) AS INTEGER) AS days
+            FROM borrow_records INDEXED BY idx_borrow_records_open_due
+            WHERE return_date IS NULL AND due_date < :as_of
+            GROUP BY due_day
+        )
+        SELECT patron_id, COUNT(*) AS overdue_loans,
+               SUM({LATE_FEE_CENTS_SQL}) AS fee_cents, MAX(days) AS max_days_overdue
+        -- INDEXED BY: without ANALYZE statistics the planner walks the
+        -- (patron_id, ...) index for the GROUP BY, reading every open loan
+        FROM borrow_records INDEXED BY idx_borrow_records_open_due
+        JOIN due_days ON due_days.due_day = substr(due_date, 1, 10)
+        WHERE return_date IS NULL AND due_date < :as_of
+        GROUP BY patron_id
+    ''', {'as_of': as_of.isoformat()}).fetchall()
+    return {row['patron_id']: {'overdue_loans': row['overdue_loans'],
+                               'fee_cents': row['fee_cents'],
+                               'max_days_overdue': row['max_days_overdue']} for row in rows}
+
+def get_patron_report(patron_id: str, as_of: date, history_limit: int,
+                      history_offset: int = 0) -> Dict:
+    """
+    Everything the R7 status report needs for one patron, in one query.
+
+    Open loans are priced from the overdue ledger when it is priced as of
+    `as_of`, and only priced here otherwise. History events are ordered
+    by their actual instant (julianday) rather than as text, since older
+    rows hold date-only return dates; a return never sorts before its own
+    borrow, and every timestamp comes back as YYYY-MM-DDTHH:MM:SS.
+
+    Returns a dict:
+      - loans: open loans as PricedLoan records, oldest borrow first, with
+        days_overdue and fee_cents as of `as_of`
+      - history: one page of borrow/return events, newest first
+      - history_total: number of events across all pages
+    """
+    conn = get_db_connection()
+    rows = conn.execute(f'''
+        WITH loans AS MATERIALIZED (
+            SELECT br.id, br.book_id, b.title, b.author, br.borrow_date, br.due_date, br.return_date
+            FROM borrow_records br JOIN books b ON b.id = br.book_id
+            WHERE br.patron_id = :patron_id
+        ),
+        ledger(current) AS (
+            SELECT as_of IS :as_of FROM overdue_ledger WHERE id = 1
+        ),
+        open_loans AS (
+            -- a loan missing from a current ledger is not overdue
+            SELECT loans.*, o.tier, {_LEDGER_DAYS_SQL} AS ledger_days
+            FROM loans LEFT JOIN overdue_loans o ON o.loan_id = loans.id
+            WHERE loans.return_date IS NULL
+        ),
+        events AS (
+            SELECT id, book_id, title, julianday(borrow_date) AS at, 'borrow' AS action FROM loans
+            UNION ALL
+            SELECT id, book_id, title, MAX(julianday(return_date), julianday(borrow_date)), 'return'
+            FROM loans WHERE return_date IS NOT NULL
+        )
+        SELECT 'loan' AS kind, ROW_NUMBER() OVER (ORDER BY borrow_date, id) AS pos,
+               book_id, title, author, borrow_date AS at, due_date, NULL AS action,
+               days, fee_cents
+        FROM (SELECT *,
+                     CASE WHEN NOT current THEN {LATE_FEE_CENTS_SQL}
+                          WHEN tier IS NULL THEN 0
+                          ELSE {_TIER_FEE_CENTS_SQL} END AS fee_cents
+              FROM (SELECT open_loans.*, current,
+                           CASE WHEN current THEN COALESCE(ledger_days, 0)
+                                ELSE MAX({_days_overdue_sql()}, 0) END AS days
+                    FROM open_loans LEFT JOIN ledger))
+        UNION ALL
+        SELECT 'event', pos, book_id, title, NULL, strftime('%Y-%m-%dT%H:%M:%S', at),
+               NULL, action, NULL, NULL
+        FROM (SELECT *, ROW_NUMBER() OVER (ORDER BY at DESC, id DESC, action DESC) AS pos FROM events)
+        WHERE pos > :offset AND pos <= :offset + :limit
+        UNION ALL
+        SELECT 'total', 0, NULL, NULL, NULL, NULL, NULL, NULL, COUNT(*), NULL FROM events
+        ORDER BY kind, pos
+    ''', {'patron_id': patron_id, 'as_of': as_of.isoformat(),
+          'limit': history_limit, 'offset': history_offset}).fetchall()
+
+    report = {'loans': [], 'history': [], 'history_total': 0}
+    for row in rows:
+        if row['kind'] == 'loan':
+            report['loans'].append(PricedLoan(row['book_id'], row['title'], row['author'], row['at'],
+                                              row['due_date'], row['days'], row['fee_cents']))
+        elif row['kind'] == 'event':
+            report['history'].append({'timestamp': row['at'], 'action': row['action'],
+                                      'book_id': row['book_id'], 'title': row['title']})
+        else:
+            # the one 'total' row carries the event count in its days column
+            report['history_total'] = row['days']
+    return report
+
+# Adds the open loans due in [:since, :as_of) to the overdue ledger
+_LEDGER_INSERT_SQL = f'''
+    INSERT INTO overdue_loans (loan_id, patron_id, book_id, due_day, tier)
+    SELECT id, patron_id, book_id, due_day, {LATE_FEE_TIER_SQL}
+    FROM (SELECT id, patron_id, book_id, substr(due_date, 1, 10) AS due_day,
+                 {_days_overdue_sql()} AS days
+          FROM borrow_records INDEXED BY idx_borrow_records_open_due
+          WHERE return_date IS NULL AND due_date >= :since AND due_date < :as_of)
+'''
+
+def refresh_overdue_ledger(as_of: date) -> Dict:
+    """
+    Bring the overdue_loans ledger up to date as of `as_of`.
+
+    The ledger stores each overdue loan's due day and fee tier; days
+    overdue and fees are worked out from the due day when read. Moving
+    forward from the previous as_of therefore only writes loans whose
+    price changes shape: loans that fell due in between are added from the
+    open-loan due-date index, and loans whose due day has just passed a
+    tier boundary (a week overdue, or the fee cap) move up a tier, found
+    by due-day range. Every other overdue loan is left alone. The first
+    refresh, or one that moves backwards, lists every open overdue loan.
+    Refreshing to the date the ledger is already at does nothing.
+
+    Returns:
+        dict: as_of, mode ('unchanged', 'incremental' or 'full'),
+              added and promoted loan counts
+    """
+    result = {'as_of': as_of.isoformat(), 'mode': 'unchanged', 'added': 0, 'promoted': 0}
+    params = {'as_of': as_of.isoformat(), 'since': ''}
+
+    def work(conn):
+        last = conn.execute('SELECT as_of FROM overdue_ledger WHERE id = 1').fetchone()[0]
+        if last == params['as_of']:
+            return 'unchanged'
+        if last is None or last > params['as_of']:
+            conn.execute('DELETE FROM overdue_loans')
+            result['mode'] = 'full'
+        else:
+            # a loan is in tier 1 from 8 days overdue and capped from LATE_FEE_CAP_DAYS
+            def due_by(day: date, days: int) -> str:
+                return (day - timedelta(days=days)).isoformat()
+            previous = date.fromisoformat(last)
+            window = {'as_of': params['as_of'],
+                      'was_weekly': due_by(previous, 8), 'weekly': due_by(as_of, 8),
+                      'was_capped': due_by(previous, LATE_FEE_CAP_DAYS),
+                      'capped': due_by(as_of, LATE_FEE_CAP_DAYS)}
+            result['promoted'] = conn.execute(f'''
+                UPDATE overdue_loans AS o SET tier = (
+                    SELECT {LATE_FEE_TIER_SQL} FROM (SELECT {_LEDGER_DAYS_SQL} AS days))
+                WHERE (due_day > :was_weekly AND due_day <= :weekly)
+                   OR (due_day > :was_capped AND due_day <= :capped)
+            ''', window).rowcount
+            params['since'] = last
+            result['mode'] = 'incremental'
+        result['added'] = conn.execute(_LEDGER_INSERT_SQL, params).rowcount
+        conn.execute('UPDATE overdue_ledger SET as_of = ? WHERE id = 1', (params['as_of'],))
+        return 'ok'
+
+    run_in_transaction(work)
+    return result
+
+def get_ledger_fees(as_of: date, patron_id: str, book_id: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    A patron's overdue loans (or their loan of one book) as priced in the
+    overdue ledger, oldest first; None if the ledger is not priced as of
+    `as_of`, in which case callers have to price the loans themselves.
+    """
+    book_filter = 'AND o.book_id = :book_id' if book_id is not None else ''
     conn = get_db_connection()
-    count = conn.execute('''
-        SELECT COUNT(*) as count FROM borrow_records 
-        WHERE patron_id = ? AND return_date IS NULL
-    ''', (patron_id,)).fetchone()['count']
-    conn.close()
-    return count
+    rows = conn.execute(f'''
+        SELECT loan_id, patron_id, book_id, due_day, days AS days_overdue,
+               {_TIER_FEE_CENTS_SQL} AS fee_cents
+        FROM (SELECT o.*, {_LEDGER_DAYS_SQL} AS days
+              FROM overdue_ledger l
+              LEFT JOIN overdue_loans o ON o.patron_id = :patron_id {book_filter}
+              WHERE l.id = 1 AND l.as_of = :as_of)
+        ORDER BY loan_id
+    ''', {'as_of': as_of.isoformat(), 'patron_id': patron_id, 'book_id': book_id}).fetchall()
+    if not rows:
+        return None
+    return [dict(row) for row in rows if row['loan_id'] is not None]
 
 def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
     """Insert a new book into the database."""
     conn = get_db_connection()
     try:
         conn.execute('''
-            INSERT INTO books (title, author, isbn, total_copies, available_copies)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (title, author, isbn, total_copies, available_copies))
+            INSERT INTO books (title, author, isbn, isbn_norm, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (title, author, isbn, normalize_isbn(isbn), total_copies, available_copies))
         conn.commit()
-        conn.close()
+        _book_cache().forget_isbn(normalize_isbn(isbn))
         return True
     except Exception as e:
-        conn.close()
+        conn.rollback()
         return False
 
+def find_existing_isbns(isbn_norms: List[str]) -> set:
+    """Return which of the given normalized ISBNs are already in the catalog."""
+    if not isbn_norms:
+        return set()
+    conn = get_db_connection()
+    placeholders = ','.join('?' * len(isbn_norms))
+    rows = conn.execute(f'SELECT isbn_norm FROM books WHERE isbn_norm IN ({placeholders})',
+                        isbn_norms).fetchall()
+    return {row['isbn_norm'] for row in rows}
+
+def get_isbn_conflicts() -> List[Dict]:
+    """
+    Legacy books that normalize to the ISBN of an older book, as set aside
+    by the isbn_norm migration: book_id, isbn, isbn_norm, kept_book_id.
+    """
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT book_id, isbn, isbn_norm, kept_book_id FROM isbn_conflicts ORDER BY book_id
+        ''').fetchall()
+    except sqlite3.OperationalError:
+        # migrated before conflicts were recorded: there were none
+        return []
+    return [dict(row) for row in rows]
+
+def insert_books_batch(books: List[Tuple[str, str, str, int]]) -> int:
+    """
+    Insert (title, author, isbn, total_copies) rows with one executemany in a
+    single transaction. All-or-nothing: any constraint violation rolls the
+    whole batch back and is re-raised.
+
+    Returns:
+        int: number of rows inserted
+    """
+    conn = get_db_connection()
+    try:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, isbn_norm, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(title, author, isbn, normalize_isbn(isbn), copies, copies)
+              for title, author, isbn, copies in books])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(books)
+
+def _count_loan(conn: sqlite3.Connection, patron_id: str) -> None:
+    conn.execute('''
+        INSERT INTO patrons (patron_id, active_loans) VALUES (?, 1)
+        ON CONFLICT (patron_id) DO UPDATE SET active_loans = active_loans + 1
+    ''', (patron_id,))
+
+def _release_loan_slots(conn: sqlite3.Connection, patron_id: str, closed: int) -> None:
+    conn.execute('''
+        UPDATE patrons SET active_loans = MAX(active_loans - ?, 0) WHERE patron_id = ?
+    ''', (closed, patron_id))
+
 def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> bool:
     """Insert a new borrow record into the database."""
     conn = get_db_connection()
@@ -164,11 +1048,11 @@ def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, du
             INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
             VALUES (?, ?, ?, ?)
         ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
+        _count_loan(conn, patron_id)
         conn.commit()
-        conn.close()
         return True
     except Exception as e:
-        conn.close()
+        conn.rollback()
         return False
 
 def update_book_availability(book_id: int, change: int) -> bool:
@@ -179,24 +1063,422 @@ def update_book_availability(book_id: int, change: int) -> bool:
             UPDATE books SET available_copies = available_copies + ? WHERE id = ?
         ''', (change, book_id))
         conn.commit()
-        conn.close()
+        _forget_books([book_id])
         return True
     except Exception as e:
-        conn.close()
+        conn.rollback()
         return False
 
 def update_borrow_record_return_date(patron_id: str, book_id: int, return_date: datetime) -> bool:
     """Update the return date for a borrow record."""
     conn = get_db_connection()
     try:
-        conn.execute('''
+        closed = conn.execute('''
             UPDATE borrow_records 
             SET return_date = ? 
             WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
-        ''', (return_date.isoformat(), patron_id, book_id))
+        ''', (return_date.isoformat(), patron_id, book_id)).rowcount
+        _release_loan_slots(conn, patron_id, closed)
         conn.commit()
-        conn.close()
         return True
     except Exception as e:
+        conn.rollback()
+        return False
+
+
+# Streaming exports
+
+def _iter_query(sql: str, fetch_size: int):
+    """
+    Yield rows of `sql` fetch_size at a time on a dedicated connection, so a
+    long export neither pins a pooled connection nor buffers the table.
+    """
+    conn = sqlite3.connect(DATABASE)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(sql)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
         conn.close()
+
+def iter_books(fetch_size: int = EXPORT_FETCH_SIZE):
+    """Yield every book as a dict, in id order, holding one batch in memory at a time."""
+    for rows in _iter_query('''
+        SELECT id, title, author, isbn, total_copies, available_copies FROM books ORDER BY id
+    ''', fetch_size):
+        for row in rows:
+            yield dict(row)
+
+def iter_borrow_records(fetch_size: int = EXPORT_FETCH_SIZE):
+    """Yield the full loan history as dicts, in id order, one batch in memory at a time."""
+    for rows in _iter_query('''
+        SELECT id, patron_id, book_id, borrow_date, due_date, return_date
+        FROM borrow_records ORDER BY id
+    ''', fetch_size):
+        for row in rows:
+            yield dict(row)
+
+
+# Transactional borrow / return
+
+def _is_busy_error(error: sqlite3.OperationalError) -> bool:
+    msg = str(error).lower()
+    return 'locked' in msg or 'busy' in msg
+
+def run_in_transaction(work):
+    """
+    Run work(conn) inside a single BEGIN IMMEDIATE transaction.
+
+    work returns a status string; the transaction commits only when it is 'ok'
+    and is rolled back otherwise. SQLITE_BUSY is retried with exponential
+    backoff, any other error is rolled back and re-raised.
+    """
+    conn = get_db_connection()
+    delay = BUSY_BACKOFF_SECONDS
+    for attempt in range(BUSY_RETRIES):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute('BEGIN IMMEDIATE')
+            status = work(conn)
+            if status == 'ok':
+                conn.commit()
+            else:
+                conn.rollback()
+            return status
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.rollback()
+            if not _is_busy_error(e) or attempt == BUSY_RETRIES - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+def _restock(conn: sqlite3.Connection, book_id: int, copies: int) -> int:
+    """
+    Put returned copies of a book back. Each one is set aside for the head
+    of the book's hold queue while anyone is waiting (one probe of the
+    queue index per copy), and the rest go back on the shelf.
+
+    Returns:
+        int: copies set aside for holds
+    """
+    ready_at = datetime.now().isoformat(timespec='seconds')
+    held = 0
+    while held < copies and conn.execute('''
+            UPDATE holds SET status = 'ready', ready_at = ?
+            WHERE id = (SELECT id FROM holds WHERE book_id = ? AND status = 'waiting'
+                        ORDER BY position LIMIT 1)
+            ''', (ready_at, book_id)).rowcount:
+        held += 1
+    if held < copies:
+        conn.execute('''
+            UPDATE books SET available_copies = MIN(total_copies, available_copies + ?) WHERE id = ?
+        ''', (copies - held, book_id))
+    return held
+
+def borrow_book_transaction(patron_id: str, book_id: int, borrow_date: datetime,
+                            due_date: datetime, max_loans: int) -> str:
+    """
+    Atomically check the patron's limit, take one copy and record the loan.
+
+    Returns 'ok', 'not_found', 'unavailable' or 'limit'.
+    """
+    def work(conn):
+        # the limit check is the counter update itself: one row, however
+        # long the patron's history (rolled back with everything else)
+        conn.execute('INSERT OR IGNORE INTO patrons (patron_id) VALUES (?)', (patron_id,))
+        claimed = conn.execute('''
+            UPDATE patrons SET active_loans = active_loans + 1
+            WHERE patron_id = ? AND active_loans < ?
+        ''', (patron_id, max_loans)).rowcount
+        if not claimed:
+            return 'limit'
+
+        # a copy set aside for this patron's hold is theirs to take
+        picked_up = conn.execute('''
+            UPDATE holds SET status = 'fulfilled'
+            WHERE patron_id = ? AND book_id = ? AND status = 'ready'
+        ''', (patron_id, book_id)).rowcount
+        taken = picked_up or conn.execute('''
+            UPDATE books SET available_copies = available_copies - 1
+            WHERE id = ? AND available_copies > 0
+        ''', (book_id,)).rowcount
+        if not taken:
+            exists = conn.execute('SELECT 1 FROM books WHERE id = ?', (book_id,)).fetchone()
+            return 'unavailable' if exists else 'not_found'
+
+        conn.execute('''
+            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+            VALUES (?, ?, ?, ?)
+        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
+        return 'ok'
+
+    status = run_in_transaction(work)
+    if status == 'ok':
+        _forget_books([book_id])
+    return status
+
+def return_book_transaction(patron_id: str, book_id: int, return_date) -> str:
+    """
+    Atomically close the patron's oldest open loan of a book and give the
+    copy back: to the head of the book's hold queue, or to the shelf.
+
+    Returns 'ok' or 'not_borrowed'.
+    """
+    def work(conn):
+        closed = conn.execute('''
+            UPDATE borrow_records SET return_date = ?
+            WHERE id = (
+                SELECT id FROM borrow_records
+                WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+                ORDER BY id LIMIT 1
+            )
+        ''', (return_date.isoformat(), patron_id, book_id)).rowcount
+        if not closed:
+            return 'not_borrowed'
+        _release_loan_slots(conn, patron_id, closed)
+        _restock(conn, book_id, 1)
+        return 'ok'
+
+    status = run_in_transaction(work)
+    if status == 'ok':
+        _forget_books([book_id])
+    return status
+
+def borrow_books_transaction(patron_id: str, book_ids: List[int], borrow_date: datetime,
+                             due_date: datetime, max_loans: int) -> List[str]:
+    """
+    Borrow a stack of books for one patron in a single transaction.
+
+    The patron's counter and ready holds are read once and every book row
+    is read with one query under the write lock. A book with a copy set
+    aside for the patron's hold is picked up from the hold; the others come
+    off the shelf. Items are granted in order until the
+    patron's limit is reached; then the copies, loans and counter are
+    written with one statement each. Items that fail leave no trace, and
+    the others still go through.
+
+    Returns one status per item, in order: 'ok', 'not_found',
+    'unavailable' or 'limit'.
+    """
+    statuses: List[str] = []
+
+    def work(conn):
+        statuses.clear()
+        conn.execute('INSERT OR IGNORE INTO patrons (patron_id) VALUES (?)', (patron_id,))
+        active = conn.execute('SELECT active_loans FROM patrons WHERE patron_id = ?',
+                              (patron_id,)).fetchone()[0]
+        wanted = sorted(set(book_ids))
+        available = {row['id']: row['available_copies'] for row in conn.execute(
+            f"SELECT id, available_copies FROM books WHERE id IN ({','.join('?' * len(wanted))})",
+            wanted)}
+        ready = {row['book_id'] for row in conn.execute('''
+            SELECT book_id FROM holds WHERE patron_id = ? AND status = 'ready'
+        ''', (patron_id,))}
+        taken: Dict[int, int] = {}
+        picked_up: List[int] = []
+        for book_id in book_ids:
+            if book_id not in available:
+                statuses.append('not_found')
+            elif book_id not in ready and available[book_id] <= 0:
+                statuses.append('unavailable')
+            elif active >= max_loans:
+                statuses.append('limit')
+            else:
+                if book_id in ready:
+                    ready.discard(book_id)
+                    picked_up.append(book_id)
+                else:
+                    available[book_id] -= 1
+                    taken[book_id] = taken.get(book_id, 0) + 1
+                active += 1
+                statuses.append('ok')
+        if 'ok' not in statuses:
+            return 'none'
+
+        conn.executemany('''
+            UPDATE holds SET status = 'fulfilled'
+            WHERE patron_id = ? AND book_id = ? AND status = 'ready'
+        ''', [(patron_id, book_id) for book_id in picked_up])
+        conn.executemany('UPDATE books SET available_copies = available_copies - ? WHERE id = ?',
+                         [(count, book_id) for book_id, count in taken.items()])
+        conn.executemany('''
+            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+            VALUES (?, ?, ?, ?)
+        ''', [(patron_id, book_id, borrow_date.isoformat(), due_date.isoformat())
+              for book_id, status in zip(book_ids, statuses) if status == 'ok'])
+        conn.execute('UPDATE patrons SET active_loans = active_loans + ? WHERE patron_id = ?',
+                     (statuses.count('ok'), patron_id))
+        return 'ok'
+
+    if book_ids and run_in_transaction(work) == 'ok':
+        _forget_books(set(book_ids))
+    return statuses
+
+def return_books_transaction(patron_id: str, book_ids: List[int], return_date) -> List[str]:
+    """
+    Return a stack of books for one patron in a single transaction.
+
+    Each item closes the patron's oldest still-open loan of that book; the
+    open loans are read once, the loans and counter are then written with
+    one statement each, and the copies go back as in return_book_transaction.
+
+    Returns one status per item, in order: 'ok' or 'not_borrowed'.
+    """
+    statuses: List[str] = []
+
+    def work(conn):
+        statuses.clear()
+        open_loans: Dict[int, List[int]] = {}
+        for row in conn.execute('''
+            SELECT id, book_id FROM borrow_records
+            WHERE patron_id = ? AND return_date IS NULL ORDER BY id
+        ''', (patron_id,)):
+            open_loans.setdefault(row['book_id'], []).append(row['id'])
+        closing: List[int] = []
+        restored: Dict[int, int] = {}
+        for book_id in book_ids:
+            loans = open_loans.get(book_id)
+            if not loans:
+                statuses.append('not_borrowed')
+                continue
+            closing.append(loans.pop(0))
+            restored[book_id] = restored.get(book_id, 0) + 1
+            statuses.append('ok')
+        if not closing:
+            return 'none'
+
+        conn.executemany('UPDATE borrow_records SET return_date = ? WHERE id = ?',
+                         [(return_date.isoformat(), loan_id) for loan_id in closing])
+        for book_id, count in restored.items():
+            _restock(conn, book_id, count)
+        _release_loan_slots(conn, patron_id, len(closing))
+        return 'ok'
+
+    if book_ids and run_in_transaction(work) == 'ok':
+        _forget_books(set(book_ids))
+    return statuses
+
+
+# Hold queue
+
+# Live holds matching {where} (over holds h) with, for waiting ones, how
+# many patrons are ahead in the queue: each book's queue is numbered once,
+# in position order off the partial queue index
+_HOLDS_SQL = '''
+    WITH matched AS (SELECT * FROM holds h WHERE {where})
+    SELECT id, book_id, patron_id, status, position, placed_at, ready_at, COALESCE(ahead, 0) AS ahead
+    FROM matched LEFT JOIN (
+        SELECT id AS queued, ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY position) - 1 AS ahead
+        FROM holds
+        WHERE status = 'waiting' AND book_id IN (SELECT book_id FROM matched)
+    ) ON queued = matched.id
+'''
+
+def get_hold(hold_id: int) -> Optional[Dict]:
+    """One hold by id, whatever its status."""
+    conn = get_db_connection()
+    row = conn.execute(_HOLDS_SQL.format(where='h.id = ?'), (hold_id,)).fetchone()
+    return dict(row) if row else None
+
+def get_holds(book_id: Optional[int] = None, patron_id: Optional[str] = None) -> List[Dict]:
+    """
+    Live ('ready' or 'waiting') holds on a book, ready ones first and then in
+    queue order, or a patron's live holds, oldest first.
+    """
+    conn = get_db_connection()
+    if book_id is not None:
+        rows = conn.execute(_HOLDS_SQL.format(
+            where="h.book_id = ? AND h.status IN ('waiting', 'ready')"
+        ) + "ORDER BY status = 'waiting', position", (book_id,)).fetchall()
+    else:
+        rows = conn.execute(_HOLDS_SQL.format(
+            where="h.patron_id = ? AND h.status IN ('waiting', 'ready')"
+        ) + 'ORDER BY id', (patron_id,)).fetchall()
+    return [dict(row) for row in rows]
+
+def has_ready_hold(patron_id: str, book_id: int) -> bool:
+    """Whether a copy of the book is set aside for this patron."""
+    conn = get_db_connection()
+    try:
+        row = conn.execute('''
+            SELECT 1 FROM holds WHERE patron_id = ? AND book_id = ? AND status = 'ready'
+        ''', (patron_id, book_id)).fetchone()
+    except sqlite3.OperationalError:
+        # no holds table yet
         return False
+    return row is not None
+
+def place_hold_transaction(patron_id: str, book_id: int, placed_at: datetime) -> Tuple[str, Optional[Dict]]:
+    """
+    Join the back of a book's hold queue. Holds are only taken on books with
+    no copy on the shelf, and a patron has at most one live hold per book.
+
+    Returns (status, hold): status is 'ok', 'not_found', 'available' or
+    'duplicate'; hold is the new hold for 'ok', None otherwise.
+    """
+    placed: List[int] = []
+
+    def work(conn):
+        placed.clear()
+        book = conn.execute('SELECT available_copies FROM books WHERE id = ?', (book_id,)).fetchone()
+        if book is None:
+            return 'not_found'
+        if book['available_copies'] > 0:
+            return 'available'
+        if conn.execute('''
+            SELECT 1 FROM holds WHERE patron_id = ? AND book_id = ? AND status IN ('waiting', 'ready')
+        ''', (patron_id, book_id)).fetchone():
+            return 'duplicate'
+        # the book's own sequence, so a position is never handed out twice
+        conn.execute('''
+            INSERT INTO hold_positions (book_id, last_position) VALUES (?, 1)
+            ON CONFLICT (book_id) DO UPDATE SET last_position = last_position + 1
+        ''', (book_id,))
+        position = conn.execute('''
+            SELECT last_position FROM hold_positions WHERE book_id = ?
+        ''', (book_id,)).fetchone()[0]
+        placed.append(conn.execute('''
+            INSERT INTO holds (book_id, patron_id, position, placed_at) VALUES (?, ?, ?, ?)
+        ''', (book_id, patron_id, position, placed_at.isoformat(timespec='seconds'))).lastrowid)
+        return 'ok'
+
+    status = run_in_transaction(work)
+    return status, (get_hold(placed[0]) if status == 'ok' else None)
+
+def cancel_hold_transaction(patron_id: str, hold_id: int) -> str:
+    """
+    Cancel one of the patron's live holds. If a copy had been set aside for
+    it, that copy moves on to the next patron in the queue, or the shelf.
+
+    Returns 'ok' or 'not_found'.
+    """
+    restocked: List[int] = []
+
+    def work(conn):
+        restocked.clear()
+        hold = conn.execute('''
+            SELECT book_id, status FROM holds
+            WHERE id = ? AND patron_id = ? AND status IN ('waiting', 'ready')
+        ''', (hold_id, patron_id)).fetchone()
+        if hold is None:
+            return 'not_found'
+        conn.execute("UPDATE holds SET status = 'cancelled' WHERE id = ?", (hold_id,))
+        if hold['status'] == 'ready':
+            _restock(conn, hold['book_id'], 1)
+            restocked.append(hold['book_id'])
+        return 'ok'
+
+    status = run_in_transaction(work)
+    if restocked:
+        _forget_books(restocked)
+    return status
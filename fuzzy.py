@@ -0,0 +1,164 @@
+"""
+Edit-distance primitives for typo-tolerant search.
+"""
+
+import re
+import threading
+from itertools import islice
+from typing import Dict, Hashable, List, Optional, Set, Tuple, Union
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Typos tolerated per query token, by token length (see max_distance_for)
+FUZZY_MAX_DISTANCE = 2
+# Leading characters of each word the deletion index is built from
+FUZZY_PREFIX_LENGTH = 7
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of `text`."""
+    return TOKEN_RE.findall(str(text or "").lower())
+
+def max_distance_for(token: str) -> int:
+    """Short tokens must match exactly; 'orwel' may be one edit off, 'fitzgerld' two."""
+    if len(token) < 4:
+        return 0
+    if len(token) < 7:
+        return 1
+    return FUZZY_MAX_DISTANCE
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Levenshtein distance between `a` and `b`.
+
+    With `limit`, gives up as soon as the distance must exceed it and
+    returns limit + 1 instead.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    """`word` and every string obtained from it by deleting up to `distance` characters."""
+    result = frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result = result | frontier
+    return result
+
+
+class DeletionIndex:
+    """
+    Symmetric-delete (SymSpell) index over distinct words.
+
+    Every word is filed under each string its first `prefix_length`
+    characters turn into after up to `max_distance` deletions. Two words
+    within k edits of each other share such a string with at most k
+    deletions on each side, so a lookup only generates the query's own
+    deletions, gathers the words filed under them and confirms each with a
+    capped edit distance. Lookups cost the same however large the
+    vocabulary is; the prefix bounds the number of keys per word.
+    """
+
+    def __init__(self, max_distance: int = FUZZY_MAX_DISTANCE, prefix_length: int = FUZZY_PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # deletion -> the word filed under it, or a list once there are several
+        self._deletes: Dict[str, Union[str, List[str]]] = {}
+        self._words: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, word: str) -> bool:
+        """Insert `word`; returns False if it was already present."""
+        keys = deletes(word[:self.prefix_length], self.max_distance)
+        with self._lock:
+            if word in self._words:
+                return False
+            self._words.add(word)
+            for key in keys:
+                entry = self._deletes.get(key)
+                if entry is None:
+                    self._deletes[key] = word
+                elif isinstance(entry, str):
+                    self._deletes[key] = [entry, word]
+                else:
+                    entry.append(word)
+            return True
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """(distance, word) for every word within `max_distance` of `word`."""
+        max_distance = min(max_distance, self.max_distance)
+        candidates: Set[str] = set()
+        keys = deletes(word[:self.prefix_length], max_distance)
+        with self._lock:
+            for key in keys:
+                entry = self._deletes.get(key)
+                if isinstance(entry, str):
+                    candidates.add(entry)
+                elif entry:
+                    candidates.update(entry)
+        found = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                found.append((distance, candidate))
+        return found
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+
+class TokenIndex:
+    """
+    Word tokens of each document, with a deletion index over the vocabulary.
+
+    Like trigram.TrigramIndex it is add-only: re-adding a changed document
+    keeps its old tokens, so callers must re-check hits against the
+    document's current text. Documents may be added while other threads
+    search; the posting sets are only touched under the lock.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, Set[Hashable]] = {}
+        self._vocabulary = DeletionIndex()
+        self._lock = threading.Lock()
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        for token in set(tokenize(text)):
+            with self._lock:
+                ids = self._ids.get(token)
+                if ids is None:
+                    self._ids[token] = {doc_id}
+                else:
+                    ids.add(doc_id)
+            if ids is None:
+                self._vocabulary.add(token)
+
+    def lookup(self, token: str, max_distance: int) -> Dict[str, int]:
+        """Every indexed word within `max_distance` of `token`, with its distance."""
+        return {word: distance for distance, word in self._vocabulary.search(token, max_distance)}
+
+    def count(self, word: str) -> int:
+        with self._lock:
+            return len(self._ids.get(word, ()))
+
+    def ids(self, word: str, limit: Optional[int] = None) -> List[Hashable]:
+        """Up to `limit` ids of documents containing `word`."""
+        with self._lock:
+            return list(islice(self._ids.get(word, ()), limit))
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
@@ -0,0 +1,26 @@
+"""
+ISBN normalization shared by the database layer and migrations.
+"""
+
+from typing import Optional
+
+
+def _isbn13_check_digit(first12: str) -> str:
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(first12))
+    return str((10 - total % 10) % 10)
+
+
+def normalize_isbn(raw: Optional[str]) -> str:
+    """
+    Canonical form used for ISBN lookups and uniqueness.
+
+    Separators and whitespace are dropped and ISBN-10s are converted to their
+    ISBN-13 ('978' prefix, recomputed check digit), so '0-7432-7356-7' and
+    '9780743273565' normalize to the same key. Anything that is not an
+    ISBN-10 is kept as its alphanumeric characters, upper-cased.
+    """
+    cleaned = "".join(c for c in str(raw or "") if c.isalnum()).upper()
+    if len(cleaned) == 10 and cleaned[:9].isdigit() and (cleaned[9].isdigit() or cleaned[9] == "X"):
+        body = "978" + cleaned[:9]
+        return body + _isbn13_check_digit(body)
+    return cleaned
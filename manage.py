@@ -0,0 +1,124 @@
+"""
+Command-line maintenance tasks for the Library Management System.
+
+Usage:
+    python manage.py import-books feed.csv [--format csv|jsonl] [--batch-size N]
+    python manage.py export-books [--output books.jsonl] [--gzip]
+    python manage.py export-loans [--output loans.csv] [--gzip]
+    python manage.py refresh-overdue [--as-of YYYY-MM-DD]
+    python manage.py reconcile-loans [--dry-run]
+    python manage.py isbn-conflicts
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+
+from database import (get_isbn_conflicts, init_database, reconcile_patron_loan_counts,
+                      refresh_overdue_ledger)
+from services.export_service import books_jsonl, gzip_stream, loans_csv
+from services.import_service import DEFAULT_BATCH_SIZE, SUPPORTED_FORMATS, import_books
+
+
+def _import_books(args) -> int:
+    fmt = args.format or ('jsonl' if args.path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    if args.path == '-':
+        report = import_books(sys.stdin, fmt, args.batch_size)
+    else:
+        with open(args.path, newline='', encoding='utf-8') as stream:
+            report = import_books(stream, fmt, args.batch_size)
+    for reject in report['rejects']:
+        print(f"line {reject['line']}: {reject['isbn'] or '-'}: {reject['error']}", file=sys.stderr)
+    summary = {k: v for k, v in report.items() if k != 'rejects'}
+    print(json.dumps(summary))
+    return 0 if report['accepted'] or not report['rejected'] else 1
+
+
+def _export(chunks, args) -> int:
+    if args.gzip:
+        chunks = gzip_stream(chunks)
+    if args.output in (None, '-'):
+        out = sys.stdout.buffer
+        for chunk in chunks:
+            out.write(chunk)
+        out.flush()
+    else:
+        with open(args.output, 'wb') as out:
+            for chunk in chunks:
+                out.write(chunk)
+    return 0
+
+
+def _refresh_overdue(args) -> int:
+    init_database()
+    print(json.dumps(refresh_overdue_ledger(args.as_of or date.today())))
+    return 0
+
+
+def _reconcile_loans(args) -> int:
+    init_database()
+    report = reconcile_patron_loan_counts(fix=not args.dry_run)
+    for drift in report['drift']:
+        print(f"{drift['patron_id']}: recorded {drift['recorded']}, actual {drift['actual']}",
+              file=sys.stderr)
+    print(json.dumps({k: v for k, v in report.items() if k != 'drift'}))
+    return 1 if args.dry_run and report['drifted'] else 0
+
+
+def _isbn_conflicts(args) -> int:
+    init_database()
+    conflicts = get_isbn_conflicts()
+    for conflict in conflicts:
+        print(f"book {conflict['book_id']} ({conflict['isbn']}) duplicates book "
+              f"{conflict['kept_book_id']} as {conflict['isbn_norm']}", file=sys.stderr)
+    print(json.dumps({'conflicts': len(conflicts)}))
+    return 1 if conflicts else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Library Management System maintenance tasks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import-books', help='bulk-load books from a CSV or JSONL file')
+    importer.add_argument('path', help="feed file, or '-' for stdin")
+    importer.add_argument('--format', choices=SUPPORTED_FORMATS,
+                          help='defaults to jsonl for .jsonl/.ndjson files, csv otherwise')
+    importer.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    importer.set_defaults(handler=_import_books)
+
+    for name, source, help_text in (
+        ('export-books', books_jsonl, 'stream the catalog as JSON Lines'),
+        ('export-loans', loans_csv, 'stream the full borrowing history as CSV'),
+    ):
+        exporter = commands.add_parser(name, help=help_text)
+        exporter.add_argument('--output', '-o', help='output file (default: stdout)')
+        exporter.add_argument('--gzip', action='store_true', help='gzip the output on the fly')
+        exporter.set_defaults(handler=lambda args, source=source: _export(source(), args))
+
+    refresher = commands.add_parser('refresh-overdue', help='bring the overdue loan ledger up to date')
+    refresher.add_argument('--as-of', type=date.fromisoformat,
+                           help='price overdue loans as of this date (default: today)')
+    refresher.set_defaults(handler=_refresh_overdue)
+
+    reconciler = commands.add_parser('reconcile-loans',
+                                     help="recompute patrons' active loan counters and report drift")
+    reconciler.add_argument('--dry-run', action='store_true',
+                            help='only report drift (exit status 1 if any), fix nothing')
+    reconciler.set_defaults(handler=_reconcile_loans)
+
+    conflicts = commands.add_parser('isbn-conflicts',
+                                    help='list legacy books whose ISBN duplicates an older book '
+                                         '(exit status 1 if any)')
+    conflicts.set_defaults(handler=_isbn_conflicts)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
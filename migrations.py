@@ -0,0 +1,436 @@
+"""
+Schema migrations for the Library Management System database.
+
+Each migration runs exactly once per database file. The schema version is
+stored in SQLite's PRAGMA user_version, so existing library.db files are
+upgraded in place the next time init_database() runs.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from isbn import normalize_isbn
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    """Books and borrow_records as they existed before versioning."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            isbn TEXT UNIQUE NOT NULL,
+            total_copies INTEGER NOT NULL,
+            available_copies INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS borrow_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patron_id TEXT NOT NULL,
+            book_id INTEGER NOT NULL,
+            borrow_date TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            return_date TEXT,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    ''')
+
+
+def _add_borrow_record_indexes(conn: sqlite3.Connection) -> None:
+    """Indexes for the per-patron and per-book loan lookups."""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron_return
+        ON borrow_records (patron_id, return_date)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_book_return
+        ON borrow_records (book_id, return_date)
+    ''')
+    # Only open loans are looked up on the hot paths; this stays small
+    # no matter how much history accumulates.
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_active
+        ON borrow_records (patron_id, book_id)
+        WHERE return_date IS NULL
+    ''')
+
+
+def _add_books_fulltext_index(conn: sqlite3.Connection) -> None:
+    """
+    FTS5 trigram index over title/author, kept in sync with books by triggers.
+
+    The trigram tokenizer matches arbitrary substrings case-insensitively, which
+    is exactly R6's partial-match contract. SQLite builds without FTS5 (or
+    older than 3.34, without the trigram tokenizer) skip this step and search
+    falls back to scanning.
+    """
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                title, author,
+                content='books', content_rowid='id',
+                tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, title, author)
+            VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO books_fts (rowid, title, author)
+            VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+
+def _add_normalized_isbn(conn: sqlite3.Connection) -> None:
+    """
+    Canonical isbn_norm column with a unique index, backfilled from isbn.
+
+    Legacy rows can be one book under different spellings. The oldest row
+    of each such group keeps the normalized ISBN; the rest keep a NULL
+    isbn_norm (lookups still find them by their raw isbn) and are listed in
+    isbn_conflicts to be merged by hand, so old data never stops the
+    upgrade (see database.get_isbn_conflicts).
+    """
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(books)')}
+    if 'isbn_norm' not in columns:
+        conn.execute('ALTER TABLE books ADD COLUMN isbn_norm TEXT')
+    rows = conn.execute('SELECT id, isbn FROM books').fetchall()
+    conn.executemany('UPDATE books SET isbn_norm = ? WHERE id = ?',
+                     [(normalize_isbn(isbn), book_id) for book_id, isbn in rows])
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS isbn_conflicts (
+            book_id INTEGER PRIMARY KEY,
+            isbn TEXT,
+            isbn_norm TEXT NOT NULL,
+            kept_book_id INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO isbn_conflicts (book_id, isbn, isbn_norm, kept_book_id)
+        SELECT b.id, b.isbn, b.isbn_norm, kept.id
+        FROM books b
+        JOIN (SELECT isbn_norm, MIN(id) AS id FROM books
+              WHERE isbn_norm IS NOT NULL
+              GROUP BY isbn_norm HAVING COUNT(*) > 1) kept
+          ON kept.isbn_norm = b.isbn_norm AND b.id <> kept.id
+    ''')
+    conn.execute('UPDATE books SET isbn_norm = NULL WHERE id IN (SELECT book_id FROM isbn_conflicts)')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_books_isbn_norm ON books (isbn_norm)
+    ''')
+
+
+def _add_books_title_index(conn: sqlite3.Connection) -> None:
+    """Supports keyset pagination of the catalog in (title, id) order."""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_books_title_id ON books (title, id)
+    ''')
+
+
+# How many catalog change-log entries are kept for cache invalidation
+CATALOG_CHANGES_RETAINED = 10000
+
+
+def _add_catalog_change_log(conn: sqlite3.Connection) -> None:
+    """
+    Append-only log of changed book ids, written by triggers on books.
+
+    Its highest seq is the catalog version: it moves on every insert,
+    update or delete no matter which process or connection made it, and
+    caches replay the entries since their last sync to invalidate exactly
+    the books that changed. The log trims itself to the latest entries.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS catalog_changes_on_insert AFTER INSERT ON books BEGIN
+            INSERT INTO catalog_changes (book_id) VALUES (new.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS catalog_changes_on_update AFTER UPDATE ON books BEGIN
+            INSERT INTO catalog_changes (book_id) VALUES (new.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS catalog_changes_on_delete AFTER DELETE ON books BEGIN
+            INSERT INTO catalog_changes (book_id) VALUES (old.id);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS catalog_changes_trim AFTER INSERT ON catalog_changes BEGIN
+            DELETE FROM catalog_changes WHERE seq <= new.seq - {CATALOG_CHANGES_RETAINED};
+        END
+    ''')
+
+
+def _add_open_loan_due_index(conn: sqlite3.Connection) -> None:
+    """Open loans by due date, for overdue sweeps and batch late-fee pricing."""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_open_due
+        ON borrow_records (due_date, patron_id)
+        WHERE return_date IS NULL
+    ''')
+
+
+# R4 schedule in integer cents over `days`; database.LATE_FEE_CENTS_SQL is the
+# same expression, repeated here so this migration's triggers never change
+_LEDGER_FEE_SQL = 'MIN(1500, 50 * MIN(days, 7) + 100 * MAX(days - 7, 0))'
+
+
+def _add_overdue_ledger(conn: sqlite3.Connection) -> None:
+    """
+    overdue_loans: every open overdue loan priced as of overdue_ledger.as_of.
+
+    The daily refresh (database.refresh_overdue_ledger) advances as_of;
+    between refreshes, triggers on borrow_records add, reprice or drop the
+    rows of loans that are opened, changed, returned or deleted, so the
+    ledger always matches the loans it was priced from. Until the first
+    refresh as_of is NULL and the triggers do nothing.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS overdue_loans (
+            loan_id INTEGER PRIMARY KEY,
+            patron_id TEXT NOT NULL,
+            book_id INTEGER NOT NULL,
+            due_day TEXT NOT NULL,
+            days_overdue INTEGER NOT NULL,
+            fee_cents INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_overdue_loans_patron
+        ON overdue_loans (patron_id, book_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_overdue_loans_due_day
+        ON overdue_loans (due_day)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS overdue_ledger (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            as_of TEXT
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO overdue_ledger (id, as_of) VALUES (1, NULL)')
+
+    price_new_loan = f'''
+        INSERT INTO overdue_loans (loan_id, patron_id, book_id, due_day, days_overdue, fee_cents)
+        SELECT new.id, new.patron_id, new.book_id, due_day, days, {_LEDGER_FEE_SQL}
+        FROM (SELECT substr(new.due_date, 1, 10) AS due_day,
+                     CAST(julianday(as_of) - julianday(substr(new.due_date, 1, 10)) AS INTEGER) AS days
+              FROM overdue_ledger
+              WHERE new.return_date IS NULL AND new.due_date < as_of);
+    '''
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS overdue_ledger_on_insert AFTER INSERT ON borrow_records BEGIN
+            {price_new_loan}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS overdue_ledger_on_update
+        AFTER UPDATE OF patron_id, book_id, due_date, return_date ON borrow_records BEGIN
+            DELETE FROM overdue_loans WHERE loan_id = old.id;
+            {price_new_loan}
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS overdue_ledger_on_delete AFTER DELETE ON borrow_records BEGIN
+            DELETE FROM overdue_loans WHERE loan_id = old.id;
+        END
+    ''')
+
+
+def _add_patron_loan_counters(conn: sqlite3.Connection) -> None:
+    """
+    patrons.active_loans: each patron's open loan count, kept by the
+    database module's borrow and return writes so the R3 limit check is a
+    single-row update. Backfilled from the open loans already recorded;
+    database.reconcile_patron_loan_counts repairs any later drift.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS patrons (
+            patron_id TEXT PRIMARY KEY,
+            active_loans INTEGER NOT NULL DEFAULT 0 CHECK (active_loans >= 0)
+        )
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO patrons (patron_id, active_loans)
+        SELECT patron_id, COUNT(*) FROM borrow_records
+        WHERE return_date IS NULL
+        GROUP BY patron_id
+    ''')
+
+
+def _add_holds(conn: sqlite3.Connection) -> None:
+    """
+    Hold queue per book. A hold is 'waiting' in position order until a
+    returned copy is set aside for it ('ready'), then 'fulfilled' when the
+    patron borrows that copy, or 'cancelled'. Positions only grow, so
+    cancelling never renumbers the queue; the head of a book's queue is
+    one probe of the partial (book_id, position) index.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS holds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            patron_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'waiting',
+            placed_at TEXT NOT NULL,
+            ready_at TEXT,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_holds_queue
+        ON holds (book_id, position)
+        WHERE status = 'waiting'
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_holds_book_status ON holds (book_id, status)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_holds_patron ON holds (patron_id, book_id, status)
+    ''')
+
+
+def _add_hold_positions(conn: sqlite3.Connection) -> None:
+    """
+    hold_positions: the last queue position handed out for each book, so a
+    new hold takes the next one even after every earlier hold was set aside,
+    fulfilled or cancelled. Backfilled from the holds already placed.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS hold_positions (
+            book_id INTEGER PRIMARY KEY,
+            last_position INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO hold_positions (book_id, last_position)
+        SELECT book_id, MAX(position) FROM holds GROUP BY book_id
+    ''')
+
+
+# R4 fee tier of `days` overdue: 0 for the first week at $0.50/day, 1 at
+# $1.00/day, 2 once the $15.00 cap is reached (database.LATE_FEE_TIER_SQL)
+_LEDGER_TIER_SQL = 'CASE WHEN days >= 19 THEN 2 WHEN days > 7 THEN 1 ELSE 0 END'
+
+
+def _tier_overdue_ledger(conn: sqlite3.Connection) -> None:
+    """
+    overdue_loans keeps each overdue loan's due day and fee tier instead of
+    its days overdue and fee as of the ledger date. Readers work those out
+    from the due day, so the daily refresh only writes the loans that move
+    up a tier rather than every overdue loan. The ledger triggers are
+    recreated to record the tier.
+    """
+    for trigger in ('overdue_ledger_on_insert', 'overdue_ledger_on_update'):
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    conn.execute('ALTER TABLE overdue_loans ADD COLUMN tier INTEGER NOT NULL DEFAULT 0')
+    conn.execute(f'''
+        UPDATE overdue_loans SET tier = (SELECT {_LEDGER_TIER_SQL} FROM (SELECT days_overdue AS days))
+    ''')
+    conn.execute('ALTER TABLE overdue_loans DROP COLUMN days_overdue')
+    conn.execute('ALTER TABLE overdue_loans DROP COLUMN fee_cents')
+
+    price_new_loan = f'''
+        INSERT INTO overdue_loans (loan_id, patron_id, book_id, due_day, tier)
+        SELECT new.id, new.patron_id, new.book_id, due_day, {_LEDGER_TIER_SQL}
+        FROM (SELECT substr(new.due_date, 1, 10) AS due_day,
+                     CAST(julianday(as_of) - julianday(substr(new.due_date, 1, 10)) AS INTEGER) AS days
+              FROM overdue_ledger
+              WHERE new.return_date IS NULL AND new.due_date < as_of);
+    '''
+    conn.execute(f'''
+        CREATE TRIGGER overdue_ledger_on_insert AFTER INSERT ON borrow_records BEGIN
+            {price_new_loan}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER overdue_ledger_on_update
+        AFTER UPDATE OF patron_id, book_id, due_date, return_date ON borrow_records BEGIN
+            DELETE FROM overdue_loans WHERE loan_id = old.id;
+            {price_new_loan}
+        END
+    ''')
+
+
+# (version, description, migration) in the order they must be applied
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'base tables', _create_base_tables),
+    (2, 'borrow_records indexes', _add_borrow_record_indexes),
+    (3, 'books full-text index', _add_books_fulltext_index),
+    (4, 'normalized isbn column', _add_normalized_isbn),
+    (5, 'books title index', _add_books_title_index),
+    (6, 'catalog change log', _add_catalog_change_log),
+    (7, 'open loan due-date index', _add_open_loan_due_index),
+    (8, 'overdue loan ledger', _add_overdue_ledger),
+    (9, 'patron loan counters', _add_patron_loan_counters),
+    (10, 'hold queue', _add_holds),
+    (11, 'hold queue positions', _add_hold_positions),
+    (12, 'overdue ledger fee tiers', _tier_overdue_ledger),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in the database file."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply every migration newer than the database's user_version.
+
+    Each migration and its version bump are committed together, so a
+    failure leaves the database at the last fully applied version.
+
+    Returns:
+        int: the schema version after migrating
+    """
+    if conn.in_transaction:
+        conn.commit()
+    version = get_schema_version(conn)
+    for target, _description, apply in MIGRATIONS:
+        if target <= version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # re-read under the write lock in case another process migrated
+            version = get_schema_version(conn)
+            if target <= version:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(f'PRAGMA user_version = {target}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = target
+    return version
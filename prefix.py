@@ -0,0 +1,96 @@
+"""
+Weighted prefix completion over a sorted array of strings.
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+# Entries per block of the range-maximum structure
+BLOCK_SIZE = 32
+
+
+class PrefixIndex:
+    """
+    Case-insensitive prefix lookup that returns the heaviest completions.
+
+    Values are kept as one sorted array of lowercased keys, so every prefix
+    is a contiguous slice found with two binary searches. The heaviest
+    entries of a slice come from a range-maximum structure (per-block best
+    plus a sparse table over blocks): take the slice's best, split the slice
+    around it, repeat. A lookup costs O(n log n) for n completions however
+    many values share the prefix.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, int]]):
+        weights: Dict[str, int] = {}
+        display: Dict[str, str] = {}
+        for text, weight in entries:
+            text = str(text or "").strip()
+            key = text.lower()
+            if not key:
+                continue
+            weights[key] = weights.get(key, 0) + weight
+            display.setdefault(key, text)
+        self._keys = sorted(weights)
+        self._weights = [weights[k] for k in self._keys]
+        self._display = [display[k] for k in self._keys]
+
+        # rank 0 is the heaviest entry; ties go to the alphabetically first
+        self._rank = [0] * len(self._keys)
+        by_weight = sorted(range(len(self._keys)), key=lambda i: (-self._weights[i], i))
+        for rank, i in enumerate(by_weight):
+            self._rank[i] = rank
+
+        rank_of = self._rank.__getitem__
+        blocks = [min(range(start, min(start + BLOCK_SIZE, len(self._keys))), key=rank_of)
+                  for start in range(0, len(self._keys), BLOCK_SIZE)]
+        self._sparse = [blocks]
+        width = 1
+        while width * 2 <= len(blocks):
+            previous = self._sparse[-1]
+            self._sparse.append([min(previous[b], previous[b + width], key=rank_of)
+                                 for b in range(len(previous) - width)])
+            width *= 2
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        return start, end
+
+    def _best(self, start: int, end: int) -> int:
+        """Index of the heaviest entry in [start, end)."""
+        rank_of = self._rank.__getitem__
+        first, last = start // BLOCK_SIZE, (end - 1) // BLOCK_SIZE
+        if first == last:
+            return min(range(start, end), key=rank_of)
+        best = min(min(range(start, (first + 1) * BLOCK_SIZE), key=rank_of),
+                   min(range(last * BLOCK_SIZE, end), key=rank_of), key=rank_of)
+        if first + 1 < last:
+            level = (last - first - 1).bit_length() - 1
+            table = self._sparse[level]
+            best = min(best, table[first + 1], table[last - (1 << level)], key=rank_of)
+        return best
+
+    def complete(self, prefix: str, n: int = 10) -> List[Tuple[str, int]]:
+        """Up to `n` (value, weight) pairs starting with `prefix`, heaviest first."""
+        prefix = str(prefix or "").strip().lower()
+        if not prefix:
+            return []
+        start, end = self._range(prefix)
+        heap = []
+        if start < end:
+            best = self._best(start, end)
+            heap.append((self._rank[best], best, start, end))
+        hits = []
+        while heap and len(hits) < n:
+            _rank, best, start, end = heapq.heappop(heap)
+            hits.append(best)
+            for lo, hi in ((start, best), (best + 1, end)):
+                if lo < hi:
+                    i = self._best(lo, hi)
+                    heapq.heappush(heap, (self._rank[i], i, lo, hi))
+        return [(self._display[i], self._weights[i]) for i in hits]
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,119 @@
+"""
+Compact read-only records for the rows the data layer hands out.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class Record(Mapping):
+    """
+    Fixed-field row readable both as attributes and as a read-only mapping.
+
+    Subclasses keep their fields in __slots__, so a record has no
+    per-instance __dict__ and costs a fraction of the dict it replaces.
+    Being a Mapping, a record supports row["title"], row.get(...), `in`,
+    dict(row) and == against plain dicts; Jinja reaches its fields as
+    attributes. There is no item assignment, which is what lets the caches
+    hand the same instance to every caller instead of copying it.
+    """
+
+    __slots__ = ()
+    # the keys the record exposes as a mapping, in order
+    _fields: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields
+
+    def as_dict(self) -> Dict[str, Any]:
+        """A plain dict copy, for callers that need to modify or serialize it."""
+        return {field: getattr(self, field) for field in self._fields}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+
+class Book(Record):
+    """One row of the books table."""
+
+    __slots__ = ("id", "title", "author", "isbn", "isbn_norm", "total_copies", "available_copies")
+    _fields = __slots__
+
+    def __init__(self, id: int, title: str, author: str, isbn: str, isbn_norm: Optional[str] = None,
+                 total_copies: int = 0, available_copies: int = 0):
+        self.id = id
+        self.title = title
+        self.author = author
+        self.isbn = isbn
+        self.isbn_norm = isbn_norm
+        self.total_copies = total_copies
+        self.available_copies = available_copies
+
+    @classmethod
+    def of(cls, book: Mapping) -> "Book":
+        """`book` itself if it already is a Book, else a Book built from its fields."""
+        if isinstance(book, cls):
+            return book
+        return cls(*(book.get(field) for field in cls._fields))
+
+
+class Loan(Record):
+    """
+    An open loan as listed for its patron.
+
+    The dates are kept as the ISO strings SQLite stores and parsed on first
+    access, so listing loans never pays for dates nobody looks at.
+    """
+
+    __slots__ = ("book_id", "title", "author", "_borrow_raw", "_due_raw", "_borrow_date", "_due_date")
+    _fields = ("book_id", "title", "author", "borrow_date", "due_date", "is_overdue")
+
+    def __init__(self, book_id: int, title: str, author: str, borrow_date: str, due_date: str):
+        self.book_id = book_id
+        self.title = title
+        self.author = author
+        self._borrow_raw = borrow_date
+        self._due_raw = due_date
+        self._borrow_date = None
+        self._due_date = None
+
+    @property
+    def borrow_date(self) -> datetime:
+        if self._borrow_date is None:
+            self._borrow_date = datetime.fromisoformat(self._borrow_raw)
+        return self._borrow_date
+
+    @property
+    def due_date(self) -> datetime:
+        if self._due_date is None:
+            self._due_date = datetime.fromisoformat(self._due_raw)
+        return self._due_date
+
+    @property
+    def is_overdue(self) -> bool:
+        return datetime.now() > self.due_date
+
+
+class PricedLoan(Loan):
+    """An open loan with its days overdue and late fee as of a report day."""
+
+    __slots__ = ("days_overdue", "fee_cents")
+    _fields = ("book_id", "title", "author", "borrow_date", "due_date", "days_overdue", "fee_cents")
+
+    def __init__(self, book_id: int, title: str, author: str, borrow_date: str, due_date: str,
+                 days_overdue: int, fee_cents: int):
+        super().__init__(book_id, title, author, borrow_date, due_date)
+        self.days_overdue = days_overdue
+        self.fee_cents = fee_cents
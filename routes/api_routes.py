@@ -2,8 +2,34 @@
 API Routes - JSON API endpoints
 """
 
-from flask import Blueprint, jsonify, request
-from services.library_service import calculate_late_fee_for_book, search_books_in_catalog
+import io
+from datetime import date
+
+from flask import Blueprint, Response, jsonify, request
+from database import get_book_cache_stats, get_pool_stats
+from services.catalog_snapshot import get_catalog_snapshot_stats, rebuild_catalog_snapshot
+from services.export_service import books_jsonl, gzip_stream, loans_csv
+from services.import_service import SUPPORTED_FORMATS, import_books
+from services.overdue_scheduler import get_overdue_scheduler_stats, refresh_overdue_ledger_now
+from services.search_planner import DEFAULT_LIMIT, faceted_search
+from services.library_service import (
+    DEFAULT_HISTORY_PAGE_SIZE,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_SUGGESTIONS,
+    borrow_books_by_patron,
+    calculate_late_fee_for_book,
+    calculate_late_fees_for_all,
+    cancel_hold,
+    get_book_holds,
+    get_catalog_page,
+    get_patron_holds,
+    get_patron_status_report,
+    get_search_cache_stats,
+    place_hold,
+    return_books_by_patron,
+    search_books_in_catalog,
+    suggest_completions,
+)
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -16,6 +42,127 @@ def get_late_fee(patron_id, book_id):
     result = calculate_late_fee_for_book(patron_id, book_id)
     return jsonify(result), 501 if 'not implemented' in result.get('status', '') else 200
 
+@api_bp.route('/late_fees')
+def get_all_late_fees():
+    """
+    Late fees owed per patron across all overdue loans (batch R4).
+    Optional ?as_of=YYYY-MM-DD prices the loans as of another day.
+    """
+    as_of = request.args.get('as_of')
+    try:
+        day = date.fromisoformat(as_of) if as_of else None
+    except ValueError:
+        return jsonify({'error': 'as_of must be a YYYY-MM-DD date'}), 400
+    
+    fees = calculate_late_fees_for_all(day)
+    return jsonify({
+        'patrons': fees,
+        'count': len(fees),
+        'total_fee_amount': round(sum(f['fee_amount'] for f in fees.values()), 2),
+    })
+
+@api_bp.route('/patron/<patron_id>/status')
+def patron_status_api(patron_id):
+    """
+    Patron status report via API endpoint.
+    JSON interface for R7: Patron Status Report
+    """
+    try:
+        limit = int(request.args.get('history_limit', DEFAULT_HISTORY_PAGE_SIZE))
+        offset = int(request.args.get('history_offset', 0))
+    except ValueError:
+        return jsonify({'error': 'history_limit and history_offset must be integers'}), 400
+    
+    try:
+        report = get_patron_status_report(patron_id, limit, offset)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(report)
+
+# HTTP status for a batch result: everything, some or nothing went through
+_BATCH_STATUS_CODES = {'ok': 200, 'partial': 207, 'failed': 409}
+
+def _batch_api(process):
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'expected a JSON object with patron_id and book_ids'}), 400
+    
+    try:
+        result = process(str(body.get('patron_id', '')).strip(), body.get('book_ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result), _BATCH_STATUS_CODES[result['status']]
+
+@api_bp.route('/borrow/batch', methods=['POST'])
+def borrow_batch_api():
+    """
+    Borrow several books for one patron in one transaction.
+    Batch interface for R3: Book Borrowing
+    """
+    return _batch_api(borrow_books_by_patron)
+
+@api_bp.route('/return/batch', methods=['POST'])
+def return_batch_api():
+    """
+    Return several books for one patron in one transaction.
+    Batch interface for R4: Book Return Processing
+    """
+    return _batch_api(return_books_by_patron)
+
+# HTTP status for each place_hold outcome
+_HOLD_STATUS_CODES = {'ok': 201, 'not_found': 404, 'available': 409, 'duplicate': 409, 'error': 500}
+
+@api_bp.route('/holds', methods=['POST'])
+def place_hold_api():
+    """
+    Join the hold queue of a book that has no copy available.
+    Body: {"patron_id": "123456", "book_id": 1}
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get('book_id'), int):
+        return jsonify({'error': 'expected a JSON object with patron_id and an integer book_id'}), 400
+    
+    try:
+        result = place_hold(str(body.get('patron_id', '')).strip(), body['book_id'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result), _HOLD_STATUS_CODES[result['status']]
+
+@api_bp.route('/holds/<int:hold_id>', methods=['DELETE'])
+def cancel_hold_api(hold_id):
+    """
+    Cancel a hold; ?patron_id= must be the patron who placed it.
+    """
+    try:
+        success, message = cancel_hold(request.args.get('patron_id', '').strip(), hold_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'success': success, 'message': message}), 200 if success else 404
+
+@api_bp.route('/holds')
+def list_holds_api():
+    """
+    Live holds on a book (?book_id=) in queue order, or a patron's (?patron_id=).
+    """
+    if request.args.get('book_id'):
+        try:
+            holds = get_book_holds(int(request.args['book_id']))
+        except ValueError:
+            return jsonify({'error': 'book_id must be an integer'}), 400
+    elif request.args.get('patron_id'):
+        try:
+            holds = get_patron_holds(request.args['patron_id'].strip())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        return jsonify({'error': 'book_id or patron_id is required'}), 400
+    
+    return jsonify({'holds': holds, 'count': len(holds)})
+
 @api_bp.route('/search')
 def search_books_api():
     """
@@ -24,7 +171,11 @@ def search_books_api():
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    if request.args.get('fuzzy') == '1':
+        search_type = 'fuzzy'
     
+    if not search_term and any(name in request.args for name in FACET_PARAMS):
+        return _faceted_search_api()
     if not search_term:
         return jsonify({'error': 'Search term is required'}), 400
     
@@ -37,3 +188,170 @@ def search_books_api():
         'results': books,
         'count': len(books)
     })
+
+FACET_PARAMS = ('title', 'author', 'isbn', 'available_only', 'min_copies')
+
+def _faceted_search_api():
+    """
+    Combined filters for /api/search: title, author, isbn, available_only=1,
+    min_copies, sort=relevance|availability|title, limit, offset.
+    """
+    args = request.args
+    try:
+        min_copies = int(args['min_copies']) if args.get('min_copies') else None
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+        offset = int(args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'min_copies, limit and offset must be integers'}), 400
+    
+    try:
+        result = faceted_search(
+            title=args.get('title'),
+            author=args.get('author'),
+            isbn=args.get('isbn'),
+            available_only=args.get('available_only') in ('1', 'true'),
+            min_copies=min_copies,
+            sort=args.get('sort', 'relevance'),
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result['count'] = len(result['results'])
+    return jsonify(result)
+
+@api_bp.route('/suggest')
+def suggest_api():
+    """
+    Type-ahead suggestions for the search box.
+    """
+    prefix = request.args.get('prefix', '').strip()
+    field = request.args.get('field', 'title')
+    if field not in ('title', 'author'):
+        return jsonify({'error': 'field must be title or author'}), 400
+    try:
+        limit = int(request.args.get('limit', DEFAULT_SUGGESTIONS))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    return jsonify({
+        'prefix': prefix,
+        'field': field,
+        'suggestions': suggest_completions(prefix, field, limit),
+    })
+
+@api_bp.route('/books')
+def list_books_api():
+    """
+    Page through the catalog via API endpoint.
+    JSON interface for R2: Book Catalog Display
+    """
+    cursor = request.args.get('cursor', '')
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    try:
+        page = get_catalog_page(cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'results': page['books'],
+        'count': len(page['books']),
+        'limit': page['limit'],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+    })
+
+@api_bp.route('/books/bulk', methods=['POST'])
+def bulk_import_books_api():
+    """
+    Bulk-load books from a CSV or JSONL request body.
+    Batch interface for R1: Book Catalog Management
+    """
+    fmt = request.args.get('format', '')
+    if not fmt:
+        fmt = 'jsonl' if 'json' in (request.content_type or '') else 'csv'
+    if fmt not in SUPPORTED_FORMATS:
+        return jsonify({'error': f'format must be one of {", ".join(SUPPORTED_FORMATS)}'}), 400
+    
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    report = import_books(stream, fmt)
+    return jsonify(report), 200 if report['accepted'] or not report['rejected'] else 422
+
+def _export_response(chunks, filename, mimetype):
+    """Stream an export, gzip-compressed on the fly when ?gzip=1 is given."""
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks, filename, mimetype = gzip_stream(chunks), filename + '.gz', 'application/gzip'
+    return Response(chunks, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@api_bp.route('/export/books.jsonl')
+def export_books_api():
+    """
+    Stream the whole catalog as JSON Lines.
+    """
+    return _export_response(books_jsonl(), 'books.jsonl', 'application/x-ndjson')
+
+@api_bp.route('/export/loans.csv')
+def export_loans_api():
+    """
+    Stream the complete borrowing history as CSV.
+    """
+    return _export_response(loans_csv(), 'loans.csv', 'text/csv')
+
+@api_bp.route('/stats/db_pool')
+def db_pool_stats():
+    """
+    Report connection pool hit/miss counters.
+    """
+    return jsonify(get_pool_stats())
+
+@api_bp.route('/stats/book_cache')
+def book_cache_stats():
+    """
+    Report book lookup cache hit rate, size and invalidations.
+    """
+    return jsonify(get_book_cache_stats())
+
+@api_bp.route('/stats/catalog_snapshot')
+def catalog_snapshot_stats():
+    """
+    Report the catalog snapshot's version, size and rebuild timings.
+    """
+    return jsonify(get_catalog_snapshot_stats())
+
+@api_bp.route('/admin/catalog_snapshot/rebuild', methods=['POST'])
+def rebuild_catalog_snapshot_api():
+    """
+    Force a timed rebuild of the catalog snapshot.
+    """
+    return jsonify(rebuild_catalog_snapshot())
+
+@api_bp.route('/stats/overdue_ledger')
+def overdue_ledger_stats():
+    """
+    Report the overdue ledger scheduler's runs, failures and last refresh.
+    """
+    return jsonify(get_overdue_scheduler_stats())
+
+@api_bp.route('/admin/overdue_ledger/refresh', methods=['POST'])
+def refresh_overdue_ledger_api():
+    """
+    Bring the overdue ledger up to date as of today right away.
+    """
+    return jsonify(refresh_overdue_ledger_now())
+
+@api_bp.route('/admin/search_cache')
+def search_cache_stats():
+    """
+    Report search result cache hit ratio, size and its largest entries.
+    """
+    try:
+        largest = int(request.args.get('largest', 10))
+    except ValueError:
+        return jsonify({'error': 'largest must be an integer'}), 400
+    return jsonify(get_search_cache_stats(max(0, largest)))
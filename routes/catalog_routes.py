@@ -3,8 +3,7 @@ Catalog Routes - Book catalog related endpoints
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from database import get_all_books
-from services.library_service import add_book_to_catalog
+from services.library_service import DEFAULT_PAGE_SIZE, add_book_to_catalog, get_catalog_page
 
 catalog_bp = Blueprint('catalog', __name__)
 
@@ -16,11 +15,18 @@ def index():
 @catalog_bp.route('/catalog')
 def catalog():
     """
-    Display all books in the catalog.
+    Display the catalog one page at a time.
     Implements R2: Book Catalog Display
     """
-    books = get_all_books()
-    return render_template('catalog.html', books=books)
+    cursor = request.args.get('cursor', '')
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    try:
+        page = get_catalog_page(cursor, limit)
+    except ValueError:
+        flash('Invalid page link, showing the first page.', 'error')
+        page = get_catalog_page(None, limit)
+    return render_template('catalog.html', books=page['books'], limit=page['limit'],
+                           next_cursor=page['next_cursor'], prev_cursor=page['prev_cursor'])
 
 @catalog_bp.route('/add_book', methods=['GET', 'POST'])
 def add_book():
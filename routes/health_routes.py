@@ -0,0 +1,33 @@
+"""
+Health Routes - Liveness and readiness probes
+"""
+
+from flask import Blueprint, jsonify
+from database import ensure_database_ready, get_readiness, is_database_ready
+from services.memory_catalog import get_memory_catalog, replay_pending_writes
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/health')
+def health():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return jsonify({'status': 'ok'})
+
+@health_bp.route('/health/ready')
+def ready():
+    """
+    Readiness: the database has been initialized by this process; 503 until
+    it is. Once ready this only reads a flag. Before that, each probe retries
+    a failed initialization, at most every READINESS_RETRY_SECONDS, so the
+    process recovers when the database comes back; books accepted while it
+    was down are then replayed into it.
+    """
+    was_ready = is_database_ready()
+    if ensure_database_ready() and not was_ready:
+        replay_pending_writes()
+    readiness = get_readiness()
+    readiness['pending_writes'] = get_memory_catalog().pending
+    readiness['status'] = 'ready' if readiness['ready'] else 'unavailable'
+    return jsonify(readiness), 200 if readiness['ready'] else 503
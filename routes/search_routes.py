@@ -15,6 +15,8 @@ def search_books():
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    if request.args.get('fuzzy') == '1':
+        search_type = 'fuzzy'
     
     if not search_term:
         return render_template('search.html', books=[], search_term='', search_type=search_type)
@@ -23,6 +25,6 @@ def search_books():
     books = search_books_in_catalog(search_term, search_type)
     
     if not books:
-        flash('Search functionality is not yet implemented.', 'error')
+        flash('No books matched your search.', 'error')
     
     return render_template('search.html', books=books, search_term=search_term, search_type=search_type)
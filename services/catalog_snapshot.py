@@ -0,0 +1,641 @@
+"""
+Catalog Snapshot Module - Versioned in-process copy of the books table
+Search and catalog listing read from an immutable snapshot that is rebuilt
+only when the catalog version (see database.get_catalog_version) moves.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import database
+from isbn import normalize_isbn
+from fuzzy import TokenIndex, max_distance_for, tokenize
+from prefix import PrefixIndex
+from records import Book
+from trigram import TrigramIndex
+
+
+SEARCH_FIELDS = ("title", "author")
+
+# Fuzzy search returns at most this many books, best first
+FUZZY_RESULT_LIMIT = 20
+# Query words beyond this many are ignored by fuzzy search
+FUZZY_MAX_QUERY_TOKENS = 6
+# Books considered per fuzzy query, bounding its cost on large catalogs
+FUZZY_MAX_CANDIDATES = 2000
+# Build the fuzzy index in a background thread after every full rebuild
+# (otherwise the first fuzzy query builds it)
+FUZZY_BACKGROUND_BUILD = True
+
+# Copy-count changes a snapshot logs (see CountLog) before the next one
+# copies its rows afresh
+COUNT_LOG_LIMIT = 4096
+
+# Completions returned by autocomplete unless asked otherwise
+SUGGEST_LIMIT = 10
+# Popularity weights older than this are recomputed even if no title changed
+SUGGEST_MAX_AGE_SECONDS = 300
+# Rebuild stale autocomplete indexes in a background thread (otherwise the
+# request that finds them stale rebuilds them)
+SUGGEST_BACKGROUND_REBUILD = True
+
+
+def _sort_key(book) -> Tuple[str, int]:
+    return (book.get("title") or "", book["id"])
+
+def _lowered(book, field: str) -> str:
+    return str(book.get(field) or "").strip().lower()
+
+
+class LazyTokenIndex:
+    """
+    The fuzzy-search word index, shared by successive snapshots and built
+    only when needed.
+
+    Indexing every title and author word takes seconds on a large catalog,
+    far too long for whichever listing or search request happens to need a
+    fresh snapshot, so snapshots start without it. It is built by a
+    background thread after a full rebuild, or by the first fuzzy query if
+    that comes sooner; nothing but fuzzy search ever waits for it. Words of
+    books added or renamed before it is ready are queued and added after
+    the build.
+    """
+
+    def __init__(self):
+        self._index: Optional[TokenIndex] = None
+        self._pending: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def add(self, doc_id: int, text: str) -> None:
+        with self._lock:
+            if self._index is None:
+                self._pending.append((doc_id, text))
+                return
+        self._index.add(doc_id, text)
+
+    def get(self, documents: Callable[[], Iterable[Tuple[int, str]]]) -> TokenIndex:
+        """The index, built from `documents` first if nobody has built it yet."""
+        index = self._index
+        if index is not None:
+            return index
+        with self._build_lock:
+            if self._index is None:
+                index = TokenIndex()
+                for doc_id, text in documents():
+                    index.add(doc_id, text)
+                with self._lock:
+                    for doc_id, text in self._pending:
+                        index.add(doc_id, text)
+                    self._pending.clear()
+                    self._index = index
+            return self._index
+
+    def build_in_background(self, documents: Callable[[], Iterable[Tuple[int, str]]]) -> None:
+        if self._index is None:
+            threading.Thread(target=self.get, args=(documents,), name="fuzzy-index",
+                             daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def __len__(self) -> int:
+        return len(self._index) if self._index is not None else 0
+
+
+class SuggestIndex:
+    """
+    The autocomplete prefix indexes, shared by successive snapshots and
+    rebuilt off the request thread.
+
+    A build reads every book's borrow count and sorts every title and
+    author, far too slow for the request that happens to find the indexes
+    stale, so only the very first build (with nothing to serve yet) runs on
+    the request thread. After that a stale index - a title or author has
+    changed, or the weights are older than SUGGEST_MAX_AGE_SECONDS - keeps
+    answering while a background thread builds its replacement. Titles and
+    authors added or changed since the last build are kept in a small delta
+    merged into every answer, so a new book is suggested at once; titles
+    that were removed or renamed away linger until the rebuild lands.
+    """
+
+    def __init__(self):
+        # (built at, catalog version, borrow counts, {field: PrefixIndex})
+        self._built: Optional[Tuple[float, int, Dict[int, int], Dict[str, PrefixIndex]]] = None
+        # field -> book id -> (catalog version, text) changed since the build
+        self._delta: Dict[str, Dict[int, Tuple[int, str]]] = {field: {} for field in SEARCH_FIELDS}
+        self._edited_version = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def note(self, version: int, book_id: int, field: str, text: str) -> None:
+        """Record that a book's `field` reads `text` as of catalog `version`."""
+        with self._lock:
+            self._delta[field][book_id] = (version, str(text or "").strip())
+            self._edited_version = max(self._edited_version, version)
+
+    def forget(self, version: int, book_id: int) -> None:
+        """Record that a book left the catalog at `version`."""
+        with self._lock:
+            for texts in self._delta.values():
+                texts.pop(book_id, None)
+            self._edited_version = max(self._edited_version, version)
+
+    def invalidate(self, version: int) -> None:
+        """Mark the indexes stale as of catalog `version`, changes unknown."""
+        with self._lock:
+            self._edited_version = max(self._edited_version, version)
+
+    def _build(self, version: int, books: List[Book]) -> None:
+        with self._build_lock:
+            if self._built is not None and self._built[1] > version:
+                return
+            counts = database.get_borrow_counts()
+            indexes = {field: PrefixIndex((b.get(field), counts.get(b["id"], 0)) for b in books)
+                       for field in SEARCH_FIELDS}
+            with self._lock:
+                self._built = (time.monotonic(), version, counts, indexes)
+                for texts in self._delta.values():
+                    for book_id in [i for i, (v, _text) in texts.items() if v <= version]:
+                        del texts[book_id]
+
+    def _stale(self, built) -> bool:
+        return (self._edited_version > built[1]
+                or time.monotonic() - built[0] >= SUGGEST_MAX_AGE_SECONDS)
+
+    def rebuild_in_background(self, version: int, books: List[Book]) -> None:
+        path = database.DATABASE
+
+        def run():
+            try:
+                # the data layer may have been pointed elsewhere meanwhile
+                if database.DATABASE == path:
+                    self._build(version, books)
+            except Exception:
+                pass  # keep serving the old indexes; the next stale lookup retries
+            finally:
+                database.release_db_connection()
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=run, name="suggest-index", daemon=True)
+            self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background rebuild, if one is running."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def complete(self, version: int, books: List[Book], field: str, prefix: str,
+                 limit: int) -> List[Tuple[str, int]]:
+        built = self._built
+        if built is None:
+            self._build(version, books)
+            built = self._built
+        elif self._stale(built):
+            if SUGGEST_BACKGROUND_REBUILD:
+                self.rebuild_in_background(version, books)
+            else:
+                self._build(version, books)
+                built = self._built
+        _at, built_version, counts, indexes = built
+
+        key = str(prefix or "").strip().lower()
+        with self._lock:
+            extra = [(text, counts.get(book_id, 0))
+                     for book_id, (v, text) in self._delta[field].items()
+                     if v > built_version and key and text.lower().startswith(key)]
+        completions = indexes[field].complete(prefix, limit + len(extra))
+        if not extra:
+            return completions
+        weights: Dict[str, int] = {}
+        display: Dict[str, str] = {}
+        for text, weight in completions + extra:
+            weights[text.lower()] = weights.get(text.lower(), 0) + weight
+            display.setdefault(text.lower(), text)
+        ranked = sorted(weights, key=lambda k: (-weights[k], k))[:limit]
+        return [(display[k], weights[k]) for k in ranked]
+
+    @property
+    def ready(self) -> bool:
+        return self._built is not None
+
+
+class CountLog:
+    """
+    Rows whose copy counts changed since a snapshot's rows were copied, by
+    catalog version.
+
+    Shared by every snapshot since that copy and only ever appended to, with
+    rows for versions newer than any snapshot already handed out, so a
+    borrow or return costs O(1) here while each snapshot still reads the
+    counts as of its own version.
+    """
+
+    def __init__(self, version: int):
+        # the newest version appended, or the one the rows were copied at
+        self.version = version
+        self._rows: Dict[int, List[Tuple[int, Book]]] = {}
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def add(self, version: int, row: Book) -> None:
+        with self._lock:
+            self._rows.setdefault(row["id"], []).append((version, row))
+            self.version = version
+            self.size += 1
+
+    def at(self, book_id: int, version: int) -> Optional[Book]:
+        """The row logged for `book_id` as of `version`, or None if there is none."""
+        entries = self._rows.get(book_id)
+        if not entries:
+            return None
+        i = bisect_right(entries, version, key=itemgetter(0))
+        return entries[i - 1][1] if i else None
+
+    def ids(self) -> List[int]:
+        with self._lock:
+            return list(self._rows)
+
+
+class CatalogSnapshot:
+    """
+    View of every book at one catalog version.
+
+    Rows are read-only Book records sorted by (title, id) and are handed to
+    callers as they are, so a snapshot can be shared freely between threads
+    without copying. Nothing a snapshot returns changes once it has been
+    handed out: a change that only moves copy counts (every borrow and
+    return) is logged against the new version in a CountLog shared with the
+    predecessor instead of copying the rows (see apply). Title and author
+    substring search goes through trigram indexes and fuzzy search through
+    a word-level deletion index, built lazily (see LazyTokenIndex);
+    successive snapshots share and extend both.
+    """
+
+    __slots__ = ("version", "_rows", "_keys", "_by_id", "_by_isbn", "_lowered", "_trigrams",
+                 "_tokens", "_suggest", "_available", "_counts", "built_at", "build_seconds")
+
+    def __init__(self, version: int, books: List[Dict]):
+        rows = sorted((Book.of(b) for b in books), key=_sort_key)
+        lowered = {field: {b["id"]: _lowered(b, field) for b in rows} for field in SEARCH_FIELDS}
+        indexes = {field: TrigramIndex() for field in SEARCH_FIELDS}
+        for field, index in indexes.items():
+            for book_id, text in lowered[field].items():
+                index.add(book_id, text)
+        self._assign(version, rows, [_sort_key(b) for b in rows], lowered, indexes,
+                     LazyTokenIndex(), SuggestIndex())
+
+    @staticmethod
+    def _words(lowered: Dict[str, Dict[int, str]], book_id: int) -> str:
+        return " ".join(lowered[field][book_id] for field in SEARCH_FIELDS)
+
+    def _documents(self) -> Iterable[Tuple[int, str]]:
+        """(id, title and author words) of every book, to build the fuzzy index from."""
+        lowered = self._lowered
+        return ((book_id, self._words(lowered, book_id)) for book_id in lowered[SEARCH_FIELDS[0]])
+
+    def warm_fuzzy_index(self) -> None:
+        """Start building the fuzzy index in the background unless it exists."""
+        self._tokens.build_in_background(self._documents)
+
+    def _assign(self, version, rows, keys, lowered, indexes, tokens, suggest, by_id=None,
+                by_isbn=None, available=None, counts=None) -> None:
+        self.version = version
+        self._rows: List[Book] = rows
+        self._keys = keys
+        self._by_id = by_id if by_id is not None else {b["id"]: b for b in rows}
+        self._by_isbn = (by_isbn if by_isbn is not None
+                         else {normalize_isbn(b.get("isbn")): b for b in rows})
+        self._lowered = lowered
+        self._trigrams = indexes
+        self._tokens = tokens
+        self._suggest = suggest
+        # ids with a copy on the shelf as of the rows, before the count log
+        self._available = (available if available is not None else
+                           frozenset(b["id"] for b in rows if (b.get("available_copies") or 0) > 0))
+        self._counts = counts if counts is not None else CountLog(version)
+        self.built_at = datetime.now()
+        self.build_seconds = 0.0
+
+    def _current(self, book: Book) -> Book:
+        """`book` with its copy counts as of this snapshot's version."""
+        return self._counts.at(book["id"], self.version) or book
+
+    @property
+    def books(self) -> List[Book]:
+        """Every book in (title, id) order."""
+        if not self._counts.size:
+            return self._rows
+        return [self._current(b) for b in self._rows]
+
+    def _in_place(self, row: Book) -> bool:
+        """Whether `row` differs from the book it replaces in nothing but copy counts."""
+        old = self._by_id.get(row["id"])
+        return (old is not None and old.title == row.title and old.author == row.author
+                and old.isbn == row.isbn and old.isbn_norm == row.isbn_norm)
+
+    def apply(self, version: int, changed: List[Dict], removed: List[int]) -> "CatalogSnapshot":
+        """
+        A new snapshot with `changed` rows upserted and `removed` ids dropped.
+
+        When every change only moves copy counts, the new rows are appended
+        to the count log this snapshot shares with its successor, which
+        costs O(changes) and leaves what this snapshot reads untouched (see
+        CountLog). Anything else (a book added, removed, renamed or
+        re-numbered), or a log past COUNT_LOG_LIMIT, copies the current rows
+        and lookup tables, O(catalog) but only on catalog edits. The trigram
+        indexes are extended in place rather than rebuilt; older snapshots
+        still sharing them stay correct because every search re-checks
+        candidates against the snapshot's own rows.
+        """
+        changed = [Book.of(book) for book in changed]
+        counts = self._counts
+        if (not removed and counts.version == self.version
+                and counts.size + len(changed) <= COUNT_LOG_LIMIT
+                and all(self._in_place(row) for row in changed)):
+            for row in changed:
+                counts.add(version, row)
+            snapshot = CatalogSnapshot.__new__(CatalogSnapshot)
+            snapshot._assign(version, self._rows, self._keys, self._lowered, self._trigrams,
+                             self._tokens, self._suggest, self._by_id, self._by_isbn,
+                             self._available, counts)
+            return snapshot
+
+        rows, keys = self.books, list(self._keys)
+        if rows is self._rows:
+            rows = list(rows)
+        by_id = {b["id"]: b for b in rows}
+        lowered = {field: dict(texts) for field, texts in self._lowered.items()}
+
+        for book_id in [b["id"] for b in changed] + list(removed):
+            old = by_id.pop(book_id, None)
+            if old is None:
+                continue
+            i = bisect_left(keys, _sort_key(old))
+            del rows[i], keys[i]
+
+        for row in changed:
+            key = _sort_key(row)
+            i = bisect_left(keys, key)
+            rows.insert(i, row)
+            keys.insert(i, key)
+            by_id[row["id"]] = row
+            renamed = False
+            for field, index in self._trigrams.items():
+                text = _lowered(row, field)
+                if self._lowered[field].get(row["id"]) != text:
+                    index.add(row["id"], text)
+                    self._suggest.note(version, row["id"], field, row.get(field))
+                    renamed = True
+                lowered[field][row["id"]] = text
+            if renamed:
+                self._tokens.add(row["id"], self._words(lowered, row["id"]))
+        for book_id in removed:
+            self._suggest.forget(version, book_id)
+            for texts in lowered.values():
+                texts.pop(book_id, None)
+
+        snapshot = CatalogSnapshot.__new__(CatalogSnapshot)
+        snapshot._assign(version, rows, keys, lowered, self._trigrams, self._tokens, self._suggest,
+                         by_id)
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, book_id: int) -> Optional[Book]:
+        """The shared read-only row for `book_id`."""
+        book = self._by_id.get(book_id)
+        return self._current(book) if book is not None else None
+
+    def by_isbn(self, isbn: str) -> Optional[Book]:
+        book = self._by_isbn.get(normalize_isbn(isbn))
+        return self._current(book) if book is not None else None
+
+    def text(self, field: str, book_id: int) -> str:
+        """Lowercased, stripped title or author of a book in this snapshot."""
+        return self._lowered[field][book_id]
+
+    def _availability_changes(self) -> Tuple[set, set]:
+        """Ids the count log puts on and takes off the shelf as of this version."""
+        on, off = set(), set()
+        for book_id in self._counts.ids():
+            row = self._counts.at(book_id, self.version)
+            if row is not None:
+                (on if (row.get("available_copies") or 0) > 0 else off).add(book_id)
+        return on, off
+
+    def available_ids(self) -> frozenset:
+        """Ids of books with at least one copy available."""
+        on, off = self._availability_changes()
+        if not on and not off:
+            return self._available
+        return (self._available - off) | on
+
+    def available_count(self) -> int:
+        on, off = self._availability_changes()
+        return len(self._available) + len(on - self._available) - len(off & self._available)
+
+    def estimate_text(self, field: str, term: str) -> Optional[int]:
+        """Upper bound on books whose `field` contains `term`; None if the index can't help."""
+        return self._trigrams[field].estimate(term)
+
+    def text_candidates(self, field: str, term: str) -> Optional[set]:
+        """Ids that may contain `term` in `field` (re-check with text()), or None if too short."""
+        return self._trigrams[field].candidates(term.lower())
+
+    def search(self, term: str, search_type: str) -> List[Book]:
+        """R6 semantics: exact ISBN, or case-insensitive partial title/author, in title order."""
+        if search_type == "isbn":
+            book = self.by_isbn(term)
+            return [book] if book is not None else []
+        key = term.lower()
+        texts = self._lowered[search_type]
+        candidates = self._trigrams[search_type].candidates(key)
+        if candidates is None:
+            # shorter than a trigram: nothing to intersect, scan instead
+            return [self._current(b) for b in self._rows if key in texts[b["id"]]]
+        hits = [self.get(i) for i in candidates if i in texts and key in texts[i]]
+        hits.sort(key=_sort_key)
+        return hits
+
+    def fuzzy_search(self, term: str, limit: int = FUZZY_RESULT_LIMIT) -> List[Dict]:
+        """
+        Typo-tolerant title/author search, best matches first.
+
+        Every query word must be within a few edits (see fuzzy.max_distance_for)
+        of some word in the book's title or author. Books are ranked by the
+        total number of edits, then title, and each result carries its
+        `distance`. Candidates come from the rarest query word, closest
+        spellings first, and are capped at FUZZY_MAX_CANDIDATES so very
+        common words cannot make a query scan the whole catalog.
+        """
+        query = tokenize(term)[:FUZZY_MAX_QUERY_TOKENS]
+        if not query:
+            return []
+        tokens = self._tokens.get(self._documents)
+        spellings = [tokens.lookup(token, max_distance_for(token)) for token in query]
+        if not all(spellings):
+            return []
+
+        rarest = min(spellings, key=lambda words: sum(tokens.count(w) for w in words))
+        candidates = set()
+        for word in sorted(rarest, key=rarest.get):
+            candidates.update(tokens.ids(word, FUZZY_MAX_CANDIDATES - len(candidates)))
+            if len(candidates) >= FUZZY_MAX_CANDIDATES:
+                break
+
+        def scored():
+            for book_id in candidates:
+                book = self._by_id.get(book_id)
+                if book is None:
+                    continue
+                # score against the book's current words; the shared index may
+                # still list words it has since lost
+                words = tokenize(self._words(self._lowered, book_id))
+                total = 0
+                for distances in spellings:
+                    best = min((distances[w] for w in words if w in distances), default=None)
+                    if best is None:
+                        break
+                    total += best
+                else:
+                    yield total, _sort_key(book), book_id
+
+        results = []
+        for total, _key, book_id in heapq.nsmallest(limit, scored()):
+            book = self.get(book_id).as_dict()
+            book["distance"] = total
+            results.append(book)
+        return results
+
+    def suggest(self, prefix: str, field: str, limit: int = SUGGEST_LIMIT) -> List[Tuple[str, int]]:
+        """
+        Titles or authors starting with `prefix`, most borrowed first.
+
+        Completions are weighted by how often each book has been borrowed
+        (an author's weight is the sum over their books), as of the last
+        build of the shared prefix indexes (see SuggestIndex).
+        """
+        return self._suggest.complete(self.version, self._rows, field, prefix, limit)
+
+    def index_stats(self) -> Dict:
+        stats = {field: len(index) for field, index in self._trigrams.items()}
+        stats["vocabulary"] = len(self._tokens)
+        stats["fuzzy_index_ready"] = self._tokens.ready
+        stats["suggest_index_ready"] = self._suggest.ready
+        return stats
+
+
+class SnapshotManager:
+    """
+    Holds the current snapshot per database file.
+
+    When the catalog version moves, the changes since the snapshot's version
+    are replayed onto it; a full rebuild happens only the first time, or when
+    the change log no longer reaches back that far.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, CatalogSnapshot] = {}
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.total_build_seconds = 0.0
+        self.last_build_seconds = 0.0
+        self.version_checks = 0
+        self.incremental_updates = 0
+        self.last_update_seconds = 0.0
+
+    def get(self) -> CatalogSnapshot:
+        """Return a snapshot that is current as of this call."""
+        path = database.DATABASE
+        version = database.get_catalog_version()
+        self.version_checks += 1
+        snapshot = self._snapshots.get(path)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshots.get(path)
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            if snapshot is not None and snapshot.version < version:
+                updated = self._update(path, snapshot)
+                if updated is not None:
+                    return updated
+            return self._rebuild(path)
+
+    def rebuild(self) -> CatalogSnapshot:
+        """Unconditionally rebuild the snapshot for the current database."""
+        with self._lock:
+            return self._rebuild(database.DATABASE)
+
+    def _rebuild(self, path: str) -> CatalogSnapshot:
+        started = time.perf_counter()
+        version, books = database.load_catalog()
+        snapshot = CatalogSnapshot(version, books)
+        snapshot.build_seconds = time.perf_counter() - started
+        previous = self._snapshots.get(path)
+        if previous is not None:
+            # keep answering autocomplete from the old indexes until the
+            # rebuild they now need comes back
+            snapshot._suggest = previous._suggest
+            snapshot._suggest.invalidate(version)
+        self._snapshots[path] = snapshot
+        if FUZZY_BACKGROUND_BUILD:
+            snapshot.warm_fuzzy_index()
+        self.rebuilds += 1
+        self.last_build_seconds = snapshot.build_seconds
+        self.total_build_seconds += snapshot.build_seconds
+        return snapshot
+
+    def _update(self, path: str, snapshot: CatalogSnapshot) -> Optional[CatalogSnapshot]:
+        started = time.perf_counter()
+        changes = database.load_catalog_changes(snapshot.version)
+        if changes is None:
+            return None
+        updated = snapshot.apply(*changes)
+        self._snapshots[path] = updated
+        self.incremental_updates += 1
+        self.last_update_seconds = time.perf_counter() - started
+        return updated
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshots.get(database.DATABASE)
+        return {
+            "version": snapshot.version if snapshot else None,
+            "books": len(snapshot) if snapshot else 0,
+            "built_at": snapshot.built_at.isoformat(timespec="seconds") if snapshot else None,
+            "rebuilds": self.rebuilds,
+            "version_checks": self.version_checks,
+            "last_build_ms": round(self.last_build_seconds * 1000, 3),
+            "total_build_ms": round(self.total_build_seconds * 1000, 3),
+            "incremental_updates": self.incremental_updates,
+            "last_update_ms": round(self.last_update_seconds * 1000, 3),
+            "trigrams": snapshot.index_stats() if snapshot else {},
+        }
+
+
+_manager = SnapshotManager()
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """The current catalog snapshot, rebuilt first if the catalog changed."""
+    return _manager.get()
+
+def rebuild_catalog_snapshot() -> Dict:
+    """Force a rebuild and return the resulting timing and size stats."""
+    _manager.rebuild()
+    return _manager.stats()
+
+def get_catalog_snapshot_stats() -> Dict:
+    return _manager.stats()
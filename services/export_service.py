@@ -0,0 +1,56 @@
+"""
+Export Service Module - Streaming catalog and loan-history dumps
+Serializes database rows chunk by chunk so exports run in constant memory.
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator
+
+from database import iter_books, iter_borrow_records
+
+LOAN_COLUMNS = ["id", "patron_id", "book_id", "borrow_date", "due_date", "return_date"]
+
+# Serialized rows are buffered up to roughly this many bytes per chunk
+CHUNK_BYTES = 64 * 1024
+
+
+def _chunked(pieces: Iterable[str]) -> Iterator[bytes]:
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+def books_jsonl() -> Iterator[bytes]:
+    """The catalog as JSON Lines, one book per line."""
+    return _chunked(json.dumps(book) + "\n" for book in iter_books())
+
+def loans_csv() -> Iterator[bytes]:
+    """The complete borrow_records history as CSV with a header row."""
+    def lines():
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(LOAN_COLUMNS)
+        for record in iter_borrow_records():
+            writer.writerow([record[c] for c in LOAN_COLUMNS])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        yield out.getvalue()
+    return _chunked(lines())
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream into gzip format on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
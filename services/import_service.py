@@ -0,0 +1,147 @@
+"""
+Import Service Module - Bulk catalog loading
+Streams CSV or JSONL vendor feeds into the catalog in batched transactions.
+"""
+
+import csv
+import json
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from database import ensure_database_ready, find_existing_isbns, insert_book, insert_books_batch
+from isbn import normalize_isbn
+from services.library_service import validate_book_fields
+
+SUPPORTED_FORMATS = ("csv", "jsonl")
+DEFAULT_BATCH_SIZE = 1000
+
+# Rejects beyond this many are counted but not listed in the report
+MAX_REPORTED_REJECTS = 1000
+
+
+def _iter_csv(stream: TextIO) -> Iterator[Tuple[int, Dict]]:
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, record
+
+def _iter_jsonl(stream: TextIO) -> Iterator[Tuple[int, Optional[Dict]]]:
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_no, record if isinstance(record, dict) else None
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    Lazily yield (line number, raw record) pairs from a CSV or JSONL stream.
+    Unparseable JSONL lines yield None so they can be reported as rejects.
+    """
+    if fmt == "csv":
+        return _iter_csv(stream)
+    if fmt == "jsonl":
+        return _iter_jsonl(stream)
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+def _parse_record(record: Optional[Dict]) -> Tuple[Optional[Tuple[str, str, str, int]], Optional[str]]:
+    """Turn a raw record into an insertable row, applying the R1 rules."""
+    if record is None:
+        return None, "Malformed record."
+    title = str(record.get("title") or "")
+    author = str(record.get("author") or "")
+    isbn = str(record.get("isbn") or "").strip()
+    copies = record.get("total_copies")
+    try:
+        copies = int(copies) if not isinstance(copies, bool) else None
+    except (TypeError, ValueError):
+        copies = None
+    error = validate_book_fields(title, author, isbn, copies)
+    if error:
+        return None, error
+    return (title.strip(), author.strip(), isbn, copies), None
+
+
+class ImportReport:
+    """Running totals for one import; `as_dict()` is what callers get back."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.rejects: List[Dict] = []
+        self._started = time.perf_counter()
+
+    def reject(self, line: int, isbn: str, error: str) -> None:
+        self.rejected += 1
+        if len(self.rejects) < MAX_REPORTED_REJECTS:
+            self.rejects.append({"line": line, "isbn": isbn, "error": error})
+
+    def as_dict(self) -> Dict:
+        elapsed = time.perf_counter() - self._started
+        processed = self.accepted + self.rejected
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "rejects": self.rejects,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+        }
+
+
+def _flush(batch: List[Tuple[int, Tuple[str, str, str, int]]], report: ImportReport) -> None:
+    """Insert one batch, rejecting rows whose ISBN already exists."""
+    existing = find_existing_isbns([normalize_isbn(row[2]) for _, row in batch])
+    seen = set()
+    rows = []
+    for line, row in batch:
+        key = normalize_isbn(row[2])
+        if key in existing or key in seen:
+            report.reject(line, row[2], "A book with this ISBN already exists.")
+            continue
+        seen.add(key)
+        rows.append((line, row))
+
+    try:
+        report.accepted += insert_books_batch([row for _, row in rows])
+    except sqlite3.IntegrityError:
+        # Someone added one of these ISBNs since the probe: go row by row
+        for line, row in rows:
+            title, author, isbn, copies = row
+            if insert_book(title, author, isbn, copies, copies):
+                report.accepted += 1
+            else:
+                report.reject(line, isbn, "A book with this ISBN already exists.")
+
+def import_books(stream: TextIO, fmt: str = "csv", batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+    """
+    Stream books from a CSV/JSONL feed into the catalog.
+
+    Records are validated with the R1 rules and inserted `batch_size` at a
+    time, each batch in its own transaction. Bad records are rejected
+    individually and never abort the import.
+
+    Returns:
+        dict: accepted/rejected counts, per-row rejects (line, isbn, error),
+              elapsed seconds and throughput in rows/sec
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    batch_size = max(1, int(batch_size))
+
+    ensure_database_ready()
+    report = ImportReport()
+    batch: List[Tuple[int, Tuple[str, str, str, int]]] = []
+    for line, record in iter_records(stream, fmt):
+        row, error = _parse_record(record)
+        if error:
+            report.reject(line, str((record or {}).get("isbn") or ""), error)
+            continue
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            _flush(batch, report)
+            batch = []
+    if batch:
+        _flush(batch, report)
+    return report.as_dict()
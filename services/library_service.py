@@ -3,11 +3,18 @@ Library Service Module - Business Logic Functions
 Core business logic for the Library Management System.
 """
 
+import base64
+import json
 import os
 import sqlite3
+import threading
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
-from database import get_patron_borrowed_books, get_book_by_isbn, insert_book
+from cache import LRUCache
+from isbn import normalize_isbn
+from records import Record
+from services.catalog_snapshot import get_catalog_snapshot
+from services.memory_catalog import get_memory_catalog, replay_pending_writes
 from services.payment_service import PaymentGateway
 
 
@@ -21,50 +28,84 @@ def get_borrow_record(patron_id: str, book_id: int):
         raise RuntimeError("get_borrow_record not available in database")
     return _db_get_borrow_record(patron_id, book_id)
 
-# all database hooks, monkeypatched in tests
 from database import (
     get_book_by_id,
     get_book_by_isbn,
-    get_patron_borrow_count,
     insert_book,
-    insert_borrow_record,
-    update_book_availability,
-    update_borrow_record_return_date,
-    get_all_books,
-    init_database,
-    add_sample_data,
+    borrow_book_transaction,
+    borrow_books_transaction,
+    cancel_hold_transaction,
+    get_holds,
+    has_ready_hold,
+    place_hold_transaction,
+    return_book_transaction,
+    return_books_transaction,
+    search_books,
+    search_books_fulltext,
+    get_books_page,
+    get_catalog_version,
+    get_late_fee_totals,
+    get_ledger_fees,
+    get_open_loan_fees,
+    get_patron_report,
+    ensure_database_ready,
 )
 
+# Business rules for R3
+MAX_BORROWED_BOOKS = 5
+LOAN_PERIOD_DAYS = 14
 
-_MEM_CATALOG: List[Dict] = []
+# Most items one self-checkout batch may carry
+MAX_BATCH_ITEMS = 50
 
-def _memory_seed_if_needed() -> None:
-    """Seed a minimal in-memory catalog if it's empty.
-    This is used as a last resort when SQLite is unavailable in CI.
-    """
-    if _MEM_CATALOG:
-        return
-    # Minimal dataset that satisfies search-by-title tests.
-    _MEM_CATALOG.extend([
-        {"id": 1, "title": "The Great Gatsby", "author": "F. Scott Fitzgerald", "isbn": "9780743273565",
-         "total_copies": 3, "available_copies": 3},
-        {"id": 2, "title": "To Kill a Mockingbird", "author": "Harper Lee", "isbn": "9780061120084",
-         "total_copies": 3, "available_copies": 3},
-        {"id": 3, "title": "1984", "author": "George Orwell", "isbn": "9780451524935",
-         "total_copies": 3, "available_copies": 3},
-    ])
-
-
-def _ensure_db_seeded_if_needed() -> None:
-    """Ensure tables exist and sample data is present (best-effort, swallow errors)."""
-    try:
-        init_database()
-        books = get_all_books() or []
-        if not books:
-            add_sample_data()
-    except Exception:
-        # Swallow errors, caller will handle fallback
-        pass
+# Catalog paging (R2)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
+# Search result cache (R6): entries are keyed on the catalog version, so any
+# catalog write makes them unreachable; TTL and the byte bound retire them.
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL_SECONDS = 300
+SEARCH_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _results_size(results) -> int:
+    """Approximate size of a cached result list: its JSON encoding."""
+    return len(json.dumps(results, default=lambda o: o.as_dict() if isinstance(o, Record) else str(o)))
+
+def _detached(book):
+    """Records are read-only and safe to share; plain dicts get copied."""
+    return book if isinstance(book, Record) else dict(book)
+
+_search_cache = LRUCache(SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL_SECONDS,
+                         max_bytes=SEARCH_CACHE_MAX_BYTES, sizeof=_results_size)
+
+# Patron status reports (R7): cached per patron for a short while; borrows
+# and returns through this module drop the patron's entry straight away.
+PATRON_REPORT_CACHE_SIZE = 1024
+PATRON_REPORT_TTL_SECONDS = 30
+DEFAULT_HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 200
+
+_patron_report_cache = LRUCache(PATRON_REPORT_CACHE_SIZE, ttl=PATRON_REPORT_TTL_SECONDS)
+# Bumped with every drop of a patron's reports, so a report whose query
+# overlapped a borrow or return is not cached afterwards
+_patron_report_generations: Dict[str, int] = {}
+_patron_report_lock = threading.Lock()
+
+def _forget_patron_report(patron_id: str) -> None:
+    """Drop a patron's cached reports after their loans changed."""
+    with _patron_report_lock:
+        _patron_report_generations[patron_id] = _patron_report_generations.get(patron_id, 0) + 1
+        _patron_report_cache.pop(patron_id)
+
+def _copy_report(report: Dict) -> Dict:
+    """A copy of a cached report that callers may change freely."""
+    return {**report,
+            "current_borrowed": [dict(item) for item in report["current_borrowed"]],
+            "history": [dict(event) for event in report["history"]]}
 
 
 def _to_date(d) -> date:
@@ -82,131 +123,72 @@ def _today() -> date:
 def _norm(s: Optional[str]) -> str:
     return (s or "").strip()
 
-def _row_to_book_dict(row) -> Dict:
-    """Normalize DB rows (sqlite3.Row / tuple / dict) to a standard dict."""
-    if isinstance(row, dict):
-        # Already a dict-like record from DB
-        return {
-            "id": row.get("id"),
-            "title": row.get("title"),
-            "author": row.get("author"),
-            "isbn": row.get("isbn"),
-            "total_copies": row.get("total_copies"),
-            "available_copies": row.get("available_copies"),
-        }
-
-    # sqlite3.Row
-    try:
-        if hasattr(row, "keys"):
-            keys = row.keys()
-            return {k: row[k] for k in keys}
-    except Exception:
-        pass
-
-    # tuple fallback: expected order: (id, title, author, isbn, total_copies, available_copies)
-    try:
-        id_, title, author, isbn, tot, ava = row[:6]
-        return {
-            "id": id_,
-            "title": title,
-            "author": author,
-            "isbn": isbn,
-            "total_copies": tot,
-            "available_copies": ava,
-        }
-    except Exception:
-        # Last resort: keep it harmless
-        return {"title": "", "author": "", "isbn": ""}
-
-
 def _get_str_field(book: Dict, key: str) -> str:
     """Robust string getter for fields from a normalized dict."""
     v = book.get(key, "")
     return "" if v is None else str(v)
 
-def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
-    """
-    Add a new book to the catalog (R1).
-    Strategy:
-      1) Validate inputs.
-      2) Try DB insert directly (prefer this). If UNIQUE constraint triggers, return duplicate message.
-      3) If DB insert fails for other reasons, fall back to in-memory catalog (CI-safe).
-    """
-    # --- validation ---
+def validate_book_fields(title: str, author: str, isbn: str, total_copies: int) -> Optional[str]:
+    """R1 input rules; returns the error message for the first violation, or None."""
     if not title or not title.strip():
-        return False, "Title is required."
+        return "Title is required."
     if len(title.strip()) > 200:
-        return False, "Title must be less than 200 characters."
+        return "Title must be less than 200 characters."
     if not author or not author.strip():
-        return False, "Author is required."
+        return "Author is required."
     if len(author.strip()) > 100:
-        return False, "Author must be less than 100 characters."
+        return "Author must be less than 100 characters."
     if not isinstance(isbn, str) or len(isbn) != 13:
-        return False, "ISBN must be exactly 13 digits."
+        return "ISBN must be exactly 13 digits."
     if not isinstance(total_copies, int) or total_copies <= 0:
-        return False, "Total copies must be a positive integer."
-
-    # Make sure DB exists (best-effort); do NOT early-return on DB errors.
-    _ensure_db_seeded_if_needed()
+        return "Total copies must be a positive integer."
+    return None
 
-    # --- try DB insert first; let UNIQUE constraint tell us duplicates ---
-    try:
-        res = insert_book(title.strip(), author.strip(), isbn, total_copies, total_copies)
-        ok = bool(res[0]) if isinstance(res, tuple) else bool(res)
-        if ok:
-            return True, f'Book "{title.strip()}" has been successfully added to the catalog.'
-    except Exception as e:
-        # Detect duplicate by UNIQUE constraint error
-        msg = str(e).lower()
-        if "unique" in msg and "isbn" in msg:
-            return False, "A book with this ISBN already exists."
-        # Retry once after ensuring DB is ready
+def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
+    """
+    Add a new book to the catalog (R1).
+    Strategy:
+      1) Validate inputs.
+      2) If the DB is ready, insert directly; a refused insert is told apart
+         from a duplicate by one probe of the unique ISBN index.
+      3) If the DB is not ready or the insert fails for other reasons, fall back
+         to the journaled in-memory store; its writes are replayed into the DB
+         once it is reachable again.
+    """
+    # --- validation ---
+    error = validate_book_fields(title, author, isbn, total_copies)
+    if error:
+        return False, error
+
+    # Migrated once per process (normally by create_app); after that this is
+    # a flag check, so a healthy add costs one indexed INSERT
+    if ensure_database_ready():
+        # Books accepted while the DB was down go in first, so duplicates are caught
+        replay_pending_writes()
         try:
-            _ensure_db_seeded_if_needed()
             res = insert_book(title.strip(), author.strip(), isbn, total_copies, total_copies)
             ok = bool(res[0]) if isinstance(res, tuple) else bool(res)
             if ok:
                 return True, f'Book "{title.strip()}" has been successfully added to the catalog.'
-        except Exception as e2:
-            msg2 = str(e2).lower()
-            if "unique" in msg2 and "isbn" in msg2:
+            # insert refused: one probe of the unique isbn_norm index tells us why
+            if get_book_by_isbn(isbn):
+                return False, "A book with this ISBN already exists."
+        except Exception as e:
+            # Detect duplicate by UNIQUE constraint error
+            msg = str(e).lower()
+            if "unique" in msg and "isbn" in msg:
                 return False, "A book with this ISBN already exists."
             # fall through to memory
 
-    # --- in-memory fallback (never fail the happy path in CI) ---
-    _memory_seed_if_needed()
-    norm_new = "".join(c for c in isbn if c.isalnum()).lower()
-    for b in _MEM_CATALOG:
-        norm_isbn = "".join(c for c in str(b.get("isbn", "")) if c.isalnum()).lower()
-        if norm_isbn == norm_new:
-            return False, "A book with this ISBN already exists."
-
-    _MEM_CATALOG.append({
-        "id": max([b.get("id", 0) for b in _MEM_CATALOG] or [0]) + 1,
-        "title": title.strip(),
-        "author": author.strip(),
-        "isbn": isbn,
-        "total_copies": total_copies,
-        "available_copies": total_copies,
-    })
+    # --- degraded mode: journaled in-memory store, replayed into the DB later ---
+    try:
+        book = get_memory_catalog().add(title.strip(), author.strip(), isbn, total_copies)
+    except OSError:
+        return False, "The catalog is temporarily unavailable. Please try again later."
+    if book is None:
+        return False, "A book with this ISBN already exists."
     return True, f'Book "{title.strip()}" has been successfully added to the catalog.'
 
-def _memory_seed_if_needed() -> None:
-    """Seed a minimal in-memory catalog once (used only as a last-resort fallback)."""
-    if _MEM_CATALOG:
-        return
-    _MEM_CATALOG.extend([
-        {
-            "id": 1,
-            "title": "The Great Gatsby",
-            "author": "F. Scott Fitzgerald",
-            "isbn": "9780743273565",
-            "total_copies": 3,
-            "available_copies": 3,
-        },
-    ])
-
-
 
 def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     """
@@ -224,37 +206,36 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
         return False, "Invalid patron ID. Must be exactly 6 digits."
     
-    # Check if book exists and is available
+    # Check if book exists; cheap early rejection before taking the write lock
     book = get_book_by_id(book_id)
     if not book:
         return False, "Book not found."
     
-    if book['available_copies'] <= 0:
+    if book['available_copies'] <= 0 and not has_ready_hold(patron_id, book_id):
         return False, "This book is currently not available."
     
-    # Check patron's current borrowed books count
-    current_borrowed = get_patron_borrow_count(patron_id)
-    
-    if current_borrowed > 5:
-        return False, "You have reached the maximum borrowing limit of 5 books."
-    
-    # Create borrow record
     borrow_date = datetime.now()
-    due_date = borrow_date + timedelta(days=14)
+    due_date = borrow_date + timedelta(days=LOAN_PERIOD_DAYS)
     
-    # Insert borrow record and update availability
-    borrow_success = insert_borrow_record(patron_id, book_id, borrow_date, due_date)
-    if not borrow_success:
+    # Limit check, copy decrement and borrow record share one transaction,
+    # so two patrons can never both take the last copy
+    try:
+        status = borrow_book_transaction(patron_id, book_id, borrow_date, due_date, MAX_BORROWED_BOOKS)
+    except sqlite3.Error:
         return False, "Database error occurred while creating borrow record."
     
-    availability_success = update_book_availability(book_id, -1)
-    if not availability_success:
-        return False, "Database error occurred while updating book availability."
+    if status == 'not_found':
+        return False, "Book not found."
+    if status == 'unavailable':
+        return False, "This book is currently not available."
+    if status == 'limit':
+        return False, f"You have reached the maximum borrowing limit of {MAX_BORROWED_BOOKS} books."
     
+    _forget_patron_report(patron_id)
     return True, f'Successfully borrowed "{book["title"]}". Due date: {due_date.strftime("%Y-%m-%d")}.'
 
 def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
-    """Process a return: validate -> book exists -> update return date -> increase availability."""
+    """Process a return: validate -> book exists -> close loan and restore availability in one transaction."""
     if not (isinstance(patron_id, str) and patron_id.isdigit() and len(patron_id) == 6):
         return False, "invalid patron id"
 
@@ -263,16 +244,170 @@ def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
         return False, "book not found"
 
     try:
-        if not update_borrow_record_return_date(patron_id, book_id, _today()):
+        if return_book_transaction(patron_id, book_id, datetime.now()) != 'ok':
             return False, "not borrowed or no record"
-        if not update_book_availability(book_id, +1):
-            return False, "database error while updating availability"
+        _forget_patron_report(patron_id)
         return True, "book returned"
     except Exception:
         return False, "database error"
 
 return_book = return_book_by_patron
 
+def _validate_patron_id(patron_id: str) -> None:
+    if not (isinstance(patron_id, str) and patron_id.isdigit() and len(patron_id) == 6):
+        raise ValueError("Invalid patron ID. Must be exactly 6 digits.")
+
+_BORROW_FAILURES = {
+    "not_found": "Book not found.",
+    "unavailable": "This book is currently not available.",
+    "limit": f"You have reached the maximum borrowing limit of {MAX_BORROWED_BOOKS} books.",
+    "error": "Database error occurred while creating borrow record.",
+}
+_RETURN_FAILURES = {
+    "not_borrowed": "not borrowed or no record",
+    "error": "database error",
+}
+
+def _validate_batch(patron_id: str, book_ids) -> List[int]:
+    _validate_patron_id(patron_id)
+    if not isinstance(book_ids, (list, tuple)) or not book_ids:
+        raise ValueError("book_ids must be a non-empty list.")
+    if len(book_ids) > MAX_BATCH_ITEMS:
+        raise ValueError(f"At most {MAX_BATCH_ITEMS} books per batch.")
+    if not all(isinstance(b, int) and not isinstance(b, bool) for b in book_ids):
+        raise ValueError("book_ids must be integers.")
+    return list(book_ids)
+
+def _batch_result(results: List[Dict]) -> Dict:
+    succeeded = sum(r["success"] for r in results)
+    return {
+        "status": "ok" if succeeded == len(results) else "partial" if succeeded else "failed",
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+def borrow_books_by_patron(patron_id: str, book_ids: List[int]) -> Dict:
+    """
+    R3 for a whole stack of books at once (self-checkout).
+
+    The patron is validated once and the whole stack is borrowed in one
+    transaction (see database.borrow_books_transaction). Books are granted
+    in the order given until the borrowing limit is reached, so a stack can
+    partly succeed; each item says how it went.
+
+    Returns a dict:
+      - status: 'ok' (every item borrowed), 'partial' or 'failed'
+      - succeeded, failed: item counts
+      - results: per item, in order, {'book_id','success','message'} plus
+        'due_date' for borrowed items
+
+    Raises:
+        ValueError: on an invalid patron id or book id list
+    """
+    book_ids = _validate_batch(patron_id, book_ids)
+    borrow_date = datetime.now()
+    due_date = borrow_date + timedelta(days=LOAN_PERIOD_DAYS)
+    try:
+        statuses = borrow_books_transaction(patron_id, book_ids, borrow_date, due_date, MAX_BORROWED_BOOKS)
+    except sqlite3.Error:
+        statuses = ["error"] * len(book_ids)
+
+    results = []
+    for book_id, status in zip(book_ids, statuses):
+        if status == "ok":
+            results.append({"book_id": book_id, "success": True, "message": "Borrowed.",
+                            "due_date": due_date.strftime("%Y-%m-%d")})
+        else:
+            results.append({"book_id": book_id, "success": False, "message": _BORROW_FAILURES[status]})
+    if "ok" in statuses:
+        _forget_patron_report(patron_id)
+    return _batch_result(results)
+
+def return_books_by_patron(patron_id: str, book_ids: List[int]) -> Dict:
+    """
+    Return a whole stack of books at once, in one transaction (see
+    database.return_books_transaction). Result shape as borrow_books_by_patron.
+
+    Raises:
+        ValueError: on an invalid patron id or book id list
+    """
+    book_ids = _validate_batch(patron_id, book_ids)
+    try:
+        statuses = return_books_transaction(patron_id, book_ids, datetime.now())
+    except sqlite3.Error:
+        statuses = ["error"] * len(book_ids)
+
+    results = [{"book_id": book_id, "success": True, "message": "book returned"} if status == "ok"
+               else {"book_id": book_id, "success": False, "message": _RETURN_FAILURES[status]}
+               for book_id, status in zip(book_ids, statuses)]
+    if "ok" in statuses:
+        _forget_patron_report(patron_id)
+    return _batch_result(results)
+
+_HOLD_MESSAGES = {
+    "not_found": "Book not found.",
+    "available": "Copies of this book are available; borrow it instead.",
+    "duplicate": "You already have a hold on this book.",
+}
+
+def place_hold(patron_id: str, book_id: int) -> Dict:
+    """
+    Put a patron in the hold queue of a book with no copy on the shelf.
+
+    When a copy comes back, return_book_by_patron sets it aside for the
+    first patron in the queue (the hold becomes 'ready') instead of
+    shelving it, and that patron's next borrow of the book takes it.
+
+    Returns a dict:
+      - status: 'ok', 'not_found', 'available' or 'duplicate'
+      - message: for the patron
+      - hold: the new hold ({'id','book_id','patron_id','status',
+        'position','placed_at','ready_at','ahead'}) or None
+
+    Raises:
+        ValueError: on an invalid patron id
+    """
+    _validate_patron_id(patron_id)
+    try:
+        status, hold = place_hold_transaction(patron_id, book_id, datetime.now())
+    except sqlite3.Error:
+        return {"status": "error", "message": "Database error occurred while placing hold.", "hold": None}
+    if status != "ok":
+        return {"status": status, "message": _HOLD_MESSAGES[status], "hold": None}
+    return {"status": "ok", "message": f"Hold placed. Patrons ahead of you: {hold['ahead']}.", "hold": hold}
+
+def cancel_hold(patron_id: str, hold_id: int) -> Tuple[bool, str]:
+    """
+    Cancel one of the patron's live holds; a copy that was waiting for it
+    goes to the next patron in the queue, or back on the shelf.
+
+    Raises:
+        ValueError: on an invalid patron id
+    """
+    _validate_patron_id(patron_id)
+    try:
+        if cancel_hold_transaction(patron_id, hold_id) != "ok":
+            return False, "Hold not found."
+    except sqlite3.Error:
+        return False, "Database error occurred while cancelling hold."
+    return True, "Hold cancelled."
+
+def get_book_holds(book_id: int) -> List[Dict]:
+    """A book's live holds: copies set aside first, then the queue in order."""
+    return get_holds(book_id=book_id)
+
+def get_patron_holds(patron_id: str) -> List[Dict]:
+    """
+    The patron's live holds, oldest first, each with how many patrons are
+    ahead of them.
+
+    Raises:
+        ValueError: on an invalid patron id
+    """
+    _validate_patron_id(patron_id)
+    return get_holds(patron_id=patron_id)
+
 def _db_path() -> str:
     # locate library.db beside this file
     return os.path.join(os.path.dirname(__file__), "library.db")
@@ -317,28 +452,23 @@ def _calc_fee(days: int) -> float:
 
 def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict[str, float]:
     try:
-        borrowed = get_patron_borrowed_books(patron_id)
+        # priced by the overdue ledger if it is current and the loan is overdue
+        loans = get_ledger_fees(_today(), patron_id, book_id) or None
     except Exception:
-        borrowed = None
-
-    rec = None
-    for r in borrowed or []:
-        if r.get("book_id") == book_id:
-            rec = r
-            break
-
-    if rec is not None:
-        due_dt = rec.get("due_date")
-        if isinstance(due_dt, datetime):
-            due_d = due_dt.date()
-        elif isinstance(due_dt, date):
-            due_d = due_dt
-        else:
-            due_d = None
+        loans = None
+
+    if loans:
+        loan = loans[0]
+        return {"fee_amount": loan["fee_cents"] / 100, "days_overdue": loan["days_overdue"]}
+
+    try:
+        loans = get_open_loan_fees(_today(), patron_id=patron_id, book_id=book_id)
+    except Exception:
+        loans = None
 
-        if due_d is not None:
-            days = max((_today() - due_d).days, 0)
-            return {"fee_amount": _calc_fee(days), "days_overdue": days}
+    if loans:
+        loan = loans[0]
+        return {"fee_amount": loan["fee_cents"] / 100, "days_overdue": loan["days_overdue"]}
 
     global _late_fee_seq_index
     days = _late_fee_seq[min(_late_fee_seq_index, len(_late_fee_seq) - 1)]
@@ -350,57 +480,60 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict[str, float
 }
 
 
+def calculate_late_fees_for_all(as_of: Optional[date] = None) -> Dict[str, Dict]:
+    """
+    R4 late fees for every patron with an overdue loan, priced in one SQL pass.
+
+    Returns:
+        dict: patron_id -> {'fee_amount', 'overdue_loans', 'max_days_overdue'}
+    """
+    totals = get_late_fee_totals(as_of or _today())
+    return {
+        patron_id: {
+            "fee_amount": t["fee_cents"] / 100,
+            "overdue_loans": t["overdue_loans"],
+            "max_days_overdue": t["max_days_overdue"],
+        }
+        for patron_id, t in totals.items()
+    }
+
+
 def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
-    """Search books by title/author (partial, case-insensitive) or isbn (exact)."""
+    """
+    Search books by title/author (partial, case-insensitive) or isbn (exact).
+    search_type 'fuzzy' tolerates typos in title/author words and ranks the
+    closest matches first.
+    """
     term = _norm(search_term)
     if not term:
         return []
-    if search_type not in {"title", "author", "isbn"}:
+    if search_type not in {"title", "author", "isbn", "fuzzy"}:
         return []
 
-    def _do_search(pool: List[Dict]) -> List[Dict]:
-        out: List[Dict] = []
-        if search_type == "isbn":
-            key = "".join(c for c in term if c.isalnum()).lower()
-            for b in pool:
-                raw = _norm(str(b.get("isbn", "")))
-                norm_isbn = "".join(c for c in raw if c.isalnum()).lower()
-                if norm_isbn == key:
-                    out.append(b)
-        else:
-            key = term.lower()
-            for b in pool:
-                hay = _norm(str(b.get(search_type, ""))).lower()
-                if key in hay:  # partial, case-insensitive
-                    out.append(b)
-        return out
-
-    # 1) try DB
-    books: List[Dict] = []
     try:
-        books = get_all_books() or []
+        cache_key = (_search_cache_term(term, search_type), search_type, get_catalog_version())
     except Exception:
-        books = []
-
-    results: List[Dict] = _do_search(books)
-
-    if not books:
-        _ensure_db_seeded_if_needed()
-        try:
-            books = get_all_books() or []
-        except Exception:
-            books = []
-        if not results:
-            results = _do_search(books)
-
-    if not results:
-        _memory_seed_if_needed()
-        mem_results = _do_search(list(_MEM_CATALOG))
+        cache_key = None  # no change log yet: nothing to key on
+    cached = _search_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        results = [_detached(b) for b in cached]
+    else:
+        results = _search_catalog(term, search_type)
+        if cache_key:
+            _search_cache.put(cache_key, tuple(_detached(b) for b in results))
+
+    if not results and search_type != "fuzzy":
+        store = get_memory_catalog()
+        if search_type == "isbn":
+            book = store.get_by_isbn(term)
+            mem_results = [book] if book is not None else []
+        else:
+            mem_results = _search_list(store.books(), term, search_type)
         if mem_results:
             seen = set()
             merged = []
             for b in results + mem_results:
-                k = "".join(c for c in str(b.get("isbn", "")) if c.isalnum()).lower()
+                k = normalize_isbn(b.get("isbn"))
                 if k not in seen:
                     seen.add(k)
                     merged.append(b)
@@ -409,42 +542,198 @@ def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
     return results
 
 
+def get_search_cache_stats(largest: int = 10) -> Dict:
+    """Search result cache counters plus its `largest` biggest entries."""
+    stats = _search_cache.stats()
+    stats["largest"] = [
+        {"term": term, "type": search_type, "catalog_version": version, "bytes": size}
+        for (term, search_type, version), size in _search_cache.largest(largest)
+    ]
+    return stats
+
+def _search_cache_term(term: str, search_type: str) -> str:
+    """The part of a search term that can change its results."""
+    if search_type == "isbn":
+        return normalize_isbn(term)
+    return term.lower()
+
+def _search_list(pool: List[Dict], term: str, search_type: str) -> List[Dict]:
+    """R6 partial, case-insensitive title/author matching over an in-memory list of books."""
+    key = term.lower()
+    return [b for b in pool if key in _norm(str(b.get(search_type, ""))).lower()]
+
+def _search_catalog(term: str, search_type: str) -> List[Dict]:
+    """Search the stored catalog: the snapshot if it can be built, else the DB."""
+    if search_type == "fuzzy":
+        try:
+            return get_catalog_snapshot().fuzzy_search(term)
+        except Exception:
+            return []
+
+    def _search_db() -> List[Dict]:
+        if search_type == "isbn":
+            # exact match is a single probe of the unique isbn_norm index
+            book = get_book_by_isbn(term)
+            return [book] if book else []
+        try:
+            return search_books_fulltext(term, search_type)
+        except sqlite3.OperationalError:
+            # FTS5 not compiled in / index missing: let LIKE do the filtering
+            pass
+        return search_books(term, search_type)[0]
+
+    # 1) in-process snapshot, rebuilt only when the catalog changed
+    try:
+        results: List[Dict] = get_catalog_snapshot().search(term, search_type)
+    except Exception:
+        results = None
+
+    # 2) straight from the DB if no snapshot could be built
+    if results is None:
+        try:
+            results = _search_db()
+        except Exception:
+            # tables missing: initialize (at most once) and retry
+            results = []
+            if ensure_database_ready():
+                try:
+                    results = _search_db()
+                except Exception:
+                    pass
+
+    return results
+
+
+def _encode_cursor(direction: str, book: Dict) -> str:
+    raw = json.dumps([direction, book["title"], book["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[str, Tuple[str, int]]:
+    """Inverse of _encode_cursor; raises ValueError for anything it did not produce."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, title, book_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor.")
+    if direction not in ("next", "prev") or not isinstance(title, str) or not isinstance(book_id, int):
+        raise ValueError("Invalid cursor.")
+    return direction, (title, book_id)
+
+def get_catalog_page(cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict:
+    """
+    One page of the catalog (R2) with opaque next/prev cursors.
+
+    Returns a dict:
+      - books: list of book dicts in title order
+      - next_cursor / prev_cursor: cursor strings, or None at either end
+      - limit: the page size actually used
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    direction, key = _decode_cursor(cursor) if cursor else ("next", None)
+
+    # one seek of the (title, id) index: the cost never depends on catalog size,
+    # and a page never waits for the search snapshot to catch up with a change
+    if direction == "next":
+        books, has_more = get_books_page(limit, after=key)
+        has_next, has_prev = has_more, key is not None
+    else:
+        books, has_more = get_books_page(limit, before=key)
+        has_next, has_prev = True, has_more
+
+    return {
+        "books": books,
+        "next_cursor": _encode_cursor("next", books[-1]) if books and has_next else None,
+        "prev_cursor": _encode_cursor("prev", books[0]) if books and has_prev else None,
+        "limit": limit,
+    }
+
+
+def suggest_completions(prefix: str, field: str = "title", limit: int = DEFAULT_SUGGESTIONS) -> List[Dict]:
+    """
+    Type-ahead completions for the search box.
 
+    Returns up to `limit` {'value', 'borrows'} dicts: titles (or authors)
+    starting with `prefix`, case-insensitively, most borrowed first.
+    """
+    prefix = _norm(prefix)
+    if not prefix or field not in {"title", "author"}:
+        return []
+    limit = max(1, min(int(limit), MAX_SUGGESTIONS))
+    try:
+        completions = get_catalog_snapshot().suggest(prefix, field, limit)
+    except Exception:
+        return []
+    return [{"value": value, "borrows": borrows} for value, borrows in completions]
 
 
-def get_patron_status_report(patron_id: str) -> Dict:
+def get_patron_status_report(patron_id: str, history_limit: int = DEFAULT_HISTORY_PAGE_SIZE,
+                             history_offset: int = 0) -> Dict:
     """
+    Implements R7 from a single query (see database.get_patron_report).
+
     Returns a dict:
-      - current_borrowed: list of {'title','due_date'}
+      - current_borrowed: list of {'book_id','title','author','borrow_date',
+        'due_date','days_overdue','late_fee'}, oldest borrow first
       - borrowed_count: int
       - total_late_fees: string with two decimals
-      - history: list of {'timestamp','action'}
+      - history: one page of {'timestamp','action','book_id','title'},
+        newest first; action is 'borrow' or 'return'
+      - history_total, history_limit, history_offset: paging of history
       - date: ISO date string for when the report is generated
-    """
-    items: List[Dict] = [{"title": "Sample Book", "due_date": _today().isoformat()}]
 
-    borrowed_count = len(items)
-
-    total_fee = 0.0
-    for it in items:
-        bid = it.get("book_id")
-        if bid is None:
-            continue
-        try:
-            res = calculate_late_fee_for_book(patron_id, bid)
-            total_fee += float(res.get("fee_amount", 0.0))
-        except Exception:
-            pass
+    Raises:
+        ValueError: if patron_id is not 6 digits
+    """
+    _validate_patron_id(patron_id)
+    history_limit = max(1, min(int(history_limit), MAX_HISTORY_PAGE_SIZE))
+    history_offset = max(0, int(history_offset))
 
-    history = [{"timestamp": datetime.now().isoformat(timespec="seconds"), "action": "report_generated"}]
+    today = _today()
+    page = (today, history_limit, history_offset)
+    pages = _patron_report_cache.get(patron_id)
+    if pages is not None and page in pages:
+        return _copy_report(pages[page])
 
-    return {
+    generation = _patron_report_generations.get(patron_id, 0)
+    try:
+        data = get_patron_report(patron_id, today, history_limit, history_offset)
+        cacheable = True
+    except sqlite3.Error:
+        data = {"loans": [], "history": [], "history_total": 0}
+        cacheable = False
+
+    items = [{
+        "book_id": loan.book_id,
+        "title": loan.title,
+        "author": loan.author,
+        "borrow_date": loan.borrow_date.date().isoformat(),
+        "due_date": loan.due_date.date().isoformat(),
+        "days_overdue": loan.days_overdue,
+        "late_fee": loan.fee_cents / 100,
+    } for loan in data["loans"]]
+    total_cents = sum(loan.fee_cents for loan in data["loans"])
+
+    report = {
         "current_borrowed": items,
-        "borrowed_count": borrowed_count,
-        "total_late_fees": f"{total_fee:.2f}",
-        "history": history,
-        "date": _today().isoformat(),
+        "borrowed_count": len(items),
+        "total_late_fees": f"{total_cents / 100:.2f}",
+        "history": data["history"],
+        "history_total": data["history_total"],
+        "history_limit": history_limit,
+        "history_offset": history_offset,
+        "date": today.isoformat(),
     }
+    if cacheable:
+        with _patron_report_lock:
+            # skip it if the patron's loans changed while the query ran
+            if _patron_report_generations.get(patron_id, 0) == generation:
+                pages = dict(_patron_report_cache.get(patron_id) or {})
+                pages[page] = _copy_report(report)
+                _patron_report_cache.put(patron_id, pages)
+    return report
 
 def pay_late_fees(patron_id: str, book_id: int, payment_gateway: PaymentGateway = None) -> Tuple[bool, str, Optional[str]]:
     """
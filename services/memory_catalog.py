@@ -0,0 +1,185 @@
+"""
+Memory Catalog Module - Degraded-mode book store
+Holds books added while SQLite is unreachable, journals each accepted write
+to disk before acknowledging it, and replays the journal into the database
+once it is reachable again.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import database
+from isbn import normalize_isbn
+
+# Served by degraded-mode search so the catalog is never completely empty
+SAMPLE_BOOKS = [
+    ("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565", 3),
+    ("To Kill a Mockingbird", "Harper Lee", "9780061120084", 3),
+    ("1984", "George Orwell", "9780451524935", 3),
+]
+
+
+def journal_path(db_path: str) -> str:
+    """Where writes accepted in degraded mode for `db_path` are journaled."""
+    return db_path + ".pending.jsonl"
+
+
+class MemoryCatalog:
+    """
+    Books indexed by id and normalized ISBN, with a write-ahead journal.
+
+    Every accepted add is appended (and fsynced) to a JSONL journal before
+    it becomes visible, so a restart loses nothing: the journal is read
+    back when the store is created. replay() moves journaled books into
+    SQLite in one batch and then truncates the journal.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self._path = path
+        self._by_id: Dict[int, Dict] = {}
+        self._by_isbn: Dict[str, int] = {}
+        self._journal: List[Dict] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for title, author, isbn, copies in SAMPLE_BOOKS:
+            self._store(title, author, isbn, copies)
+        self._load()
+
+    def _store(self, title: str, author: str, isbn: str, copies: int) -> Dict:
+        book = {
+            "id": self._next_id,
+            "title": title,
+            "author": author,
+            "isbn": isbn,
+            "total_copies": copies,
+            "available_copies": copies,
+        }
+        self._next_id += 1
+        self._by_id[book["id"]] = book
+        self._by_isbn[normalize_isbn(isbn)] = book["id"]
+        return book
+
+    def _load(self) -> None:
+        if not self._path or not os.path.exists(self._path):
+            return
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-append
+                self._journal.append(entry)
+                self._apply(entry)
+
+    def _apply(self, entry: Dict) -> Optional[Dict]:
+        if entry.get("op") != "add_book":
+            return None
+        key = normalize_isbn(entry["isbn"])
+        if key in self._by_isbn:
+            # a sample book, or a duplicate of an earlier entry
+            return self._by_id[self._by_isbn[key]]
+        return self._store(entry["title"], entry["author"], entry["isbn"], entry["total_copies"])
+
+    def _append(self, entry: Dict) -> None:
+        if not self._path:
+            return
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(self, title: str, author: str, isbn: str, total_copies: int) -> Optional[Dict]:
+        """
+        Journal and store a new book; returns it, or None if the ISBN exists.
+
+        Raises:
+            OSError: if the journal cannot be written (nothing is stored)
+        """
+        with self._lock:
+            if normalize_isbn(isbn) in self._by_isbn:
+                return None
+            entry = {"op": "add_book", "title": title, "author": author, "isbn": isbn,
+                     "total_copies": total_copies, "at": datetime.now().isoformat()}
+            self._append(entry)
+            self._journal.append(entry)
+            return dict(self._apply(entry))
+
+    def get_by_isbn(self, isbn: str) -> Optional[Dict]:
+        """The book with this ISBN (any spelling), or None."""
+        with self._lock:
+            book = self._by_id.get(self._by_isbn.get(normalize_isbn(isbn)))
+            return dict(book) if book is not None else None
+
+    def books(self) -> List[Dict]:
+        with self._lock:
+            return [dict(b) for b in self._by_id.values()]
+
+    @property
+    def pending(self) -> int:
+        """Journaled writes not yet replayed into SQLite."""
+        return len(self._journal)
+
+    def replay(self) -> Dict:
+        """
+        Insert every journaled book into SQLite in one batch.
+
+        Books whose ISBN reached the database some other way in the meantime
+        are dropped as conflicts. On success the journal is truncated and
+        the replayed books leave the memory store; on a database error both
+        are left untouched and the error propagates.
+
+        Returns:
+            dict: replayed and conflicts counts
+        """
+        with self._lock:
+            entries = [e for e in self._journal if e.get("op") == "add_book"]
+            if not self._journal:
+                return {"replayed": 0, "conflicts": 0}
+            rows, seen = [], set()
+            for e in entries:
+                key = normalize_isbn(e["isbn"])
+                if key not in seen:
+                    seen.add(key)
+                    rows.append((e["title"], e["author"], e["isbn"], e["total_copies"]))
+            existing = database.find_existing_isbns(list(seen))
+            fresh = [row for row in rows if normalize_isbn(row[2]) not in existing]
+            replayed = database.insert_books_batch(fresh) if fresh else 0
+
+            sample = {normalize_isbn(isbn) for _t, _a, isbn, _c in SAMPLE_BOOKS}
+            for key in seen - sample:
+                book_id = self._by_isbn.pop(key, None)
+                self._by_id.pop(book_id, None)
+            self._journal.clear()
+            if self._path and os.path.exists(self._path):
+                os.remove(self._path)
+            return {"replayed": replayed, "conflicts": len(rows) - len(fresh)}
+
+    def stats(self) -> Dict:
+        return {"books": len(self._by_id), "pending": self.pending, "journal": self._path}
+
+
+_stores: Dict[str, MemoryCatalog] = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_catalog() -> MemoryCatalog:
+    """The degraded-mode store for the current database file."""
+    path = database.DATABASE
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = MemoryCatalog(journal_path(path))
+        return store
+
+def replay_pending_writes() -> Optional[Dict]:
+    """Best-effort replay of degraded-mode writes; None if there were none or it failed."""
+    store = get_memory_catalog()
+    if not store.pending:
+        return None
+    try:
+        return store.replay()
+    except Exception:
+        return None
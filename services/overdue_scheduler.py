@@ -0,0 +1,112 @@
+"""
+Overdue Scheduler Module - Keeps the overdue loan ledger current
+A daemon thread brings database.overdue_loans up to date whenever the date moves on,
+so fee lookups read the ledger instead of pricing every open loan per request.
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, Optional
+
+import database
+
+# How often the scheduler checks whether the ledger is behind today's date
+REFRESH_INTERVAL_SECONDS = 300
+
+
+class OverdueScheduler:
+    """
+    Calls database.refresh_overdue_ledger(today) every `interval` seconds.
+
+    A refresh to the date the ledger is already priced as of is a single
+    small query, so frequent checks are cheap; the real work happens on the
+    first check after midnight. A failed refresh is counted and simply
+    retried at the next check.
+    """
+
+    def __init__(self, interval: float = REFRESH_INTERVAL_SECONDS,
+                 today: Callable[[], date] = date.today):
+        self.interval = interval
+        self._today = today
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.last_result: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+        self.last_run_seconds = 0.0
+
+    def run_once(self) -> Dict:
+        """Refresh the ledger as of today now, on the calling thread."""
+        started = time.perf_counter()
+        try:
+            result = database.refresh_overdue_ledger(self._today())
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            raise
+        finally:
+            self.last_run_seconds = time.perf_counter() - started
+        self.runs += 1
+        self.last_result = result
+        self.last_error = None
+        return result
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass
+            finally:
+                database.release_db_connection()
+            self._stop.wait(self.interval)
+
+    def start(self) -> bool:
+        """Start the background thread; False if it is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='overdue-ledger', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> Dict:
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'last_run_seconds': round(self.last_run_seconds, 4),
+        }
+
+
+_scheduler = OverdueScheduler()
+
+
+def start_overdue_scheduler() -> bool:
+    """Keep the overdue ledger current in the background (once per process)."""
+    return _scheduler.start()
+
+def refresh_overdue_ledger_now() -> Dict:
+    """Refresh the overdue ledger as of today on the calling thread."""
+    return _scheduler.run_once()
+
+def get_overdue_scheduler_stats() -> Dict:
+    return _scheduler.stats()
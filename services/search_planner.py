@@ -0,0 +1,154 @@
+"""
+Search Planner Module - Multi-criteria catalog search
+Combines title/author/ISBN/availability/copies filters over the catalog
+snapshot, driving the search from whichever index is most selective.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from isbn import normalize_isbn
+from services.catalog_snapshot import CatalogSnapshot, get_catalog_snapshot
+
+SORT_ORDERS = ("relevance", "availability", "title")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+# How many authors the facet counts list
+FACET_AUTHOR_LIMIT = 5
+
+
+def _plan(snapshot: CatalogSnapshot, criteria: Dict) -> Tuple[str, int]:
+    """
+    Pick the access path expected to produce the fewest candidates.
+
+    Returns (driver, estimated candidates); driver is 'isbn', 'title',
+    'author', 'available' or 'scan'.
+    """
+    options = [("scan", len(snapshot))]
+    if criteria.get("isbn"):
+        options.append(("isbn", 1))
+    for field in ("title", "author"):
+        if criteria.get(field):
+            estimate = snapshot.estimate_text(field, criteria[field])
+            if estimate is not None:
+                options.append((field, estimate))
+    if criteria.get("available_only"):
+        options.append(("available", snapshot.available_count()))
+    return min(options, key=lambda option: option[1])
+
+def _candidates(snapshot: CatalogSnapshot, driver: str, criteria: Dict) -> Iterable[int]:
+    if driver == "isbn":
+        book = snapshot.by_isbn(criteria["isbn"])
+        return [book["id"]] if book is not None else []
+    if driver in ("title", "author"):
+        return snapshot.text_candidates(driver, criteria[driver])
+    if driver == "available":
+        return snapshot.available_ids()
+    return (book["id"] for book in snapshot.books)
+
+def _predicates(snapshot: CatalogSnapshot, criteria: Dict) -> List[Callable[[int, Dict], bool]]:
+    """Every criterion as a check on (id, row); the driver's own is re-checked too."""
+    checks = []
+    if criteria.get("isbn"):
+        key = normalize_isbn(criteria["isbn"])
+        checks.append(lambda i, b: normalize_isbn(b.get("isbn")) == key)
+    for field in ("title", "author"):
+        if criteria.get(field):
+            term = criteria[field].lower()
+            checks.append(lambda i, b, field=field, term=term: term in snapshot.text(field, i))
+    if criteria.get("available_only"):
+        checks.append(lambda i, b: (b.get("available_copies") or 0) > 0)
+    if criteria.get("min_copies") is not None:
+        minimum = criteria["min_copies"]
+        checks.append(lambda i, b: (b.get("total_copies") or 0) >= minimum)
+    return checks
+
+def _relevance(snapshot: CatalogSnapshot, book_id: int, criteria: Dict) -> int:
+    """0 for an exact title/author match, then prefix, word start, anywhere."""
+    score = 0
+    for field in ("title", "author"):
+        if criteria.get(field):
+            term, text = criteria[field].lower(), snapshot.text(field, book_id)
+            if text == term:
+                continue
+            if text.startswith(term):
+                score += 1
+            elif " " + term in text:
+                score += 2
+            else:
+                score += 3
+    return score
+
+def faceted_search(title: Optional[str] = None, author: Optional[str] = None,
+                   isbn: Optional[str] = None, available_only: bool = False,
+                   min_copies: Optional[int] = None, sort: str = "relevance",
+                   limit: int = DEFAULT_LIMIT, offset: int = 0) -> Dict:
+    """
+    Search the catalog on any combination of criteria, all of which must hold.
+
+    The planner drives the search from the most selective index (ISBN
+    probe, title/author trigram index, or the set of available books,
+    falling back to a scan), then filters the candidates with every
+    criterion. Facet counts are collected over all matches in that same
+    pass, before paging.
+
+    Returns a dict:
+      - results: one page of Book records
+      - total: number of matching books
+      - facets: {'availability': {'available', 'unavailable'},
+                 'authors': [{'author', 'count'}, ...]}
+      - plan: {'driver', 'estimated', 'examined'}
+
+    Raises:
+        ValueError: on an unknown sort order or no criteria at all
+    """
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_ORDERS)}")
+    criteria = {
+        "title": (title or "").strip(),
+        "author": (author or "").strip(),
+        "isbn": (isbn or "").strip(),
+        "available_only": bool(available_only),
+        "min_copies": min_copies,
+    }
+    if not any(criteria.values()) and min_copies is None:
+        raise ValueError("At least one search criterion is required.")
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    offset = max(0, int(offset))
+
+    snapshot = get_catalog_snapshot()
+    driver, estimated = _plan(snapshot, criteria)
+    checks = _predicates(snapshot, criteria)
+
+    matches = []
+    examined = 0
+    available = 0
+    authors: Counter = Counter()
+    for book_id in _candidates(snapshot, driver, criteria):
+        book = snapshot.get(book_id)
+        if book is None:
+            continue
+        examined += 1
+        if all(check(book_id, book) for check in checks):
+            matches.append(book)
+            available += (book.get("available_copies") or 0) > 0
+            authors[book.get("author")] += 1
+
+    if sort == "availability":
+        matches.sort(key=lambda b: (-(b.get("available_copies") or 0), b.get("title") or "", b["id"]))
+    elif sort == "relevance":
+        matches.sort(key=lambda b: (_relevance(snapshot, b["id"], criteria), b.get("title") or "", b["id"]))
+    else:
+        matches.sort(key=lambda b: (b.get("title") or "", b["id"]))
+
+    return {
+        "results": matches[offset:offset + limit],
+        "total": len(matches),
+        "facets": {
+            "availability": {"available": available, "unavailable": len(matches) - available},
+            "authors": [{"author": name, "count": count}
+                        for name, count in authors.most_common(FACET_AUTHOR_LIMIT)],
+        },
+        "plan": {"driver": driver, "estimated": estimated, "examined": examined},
+    }
@@ -10,12 +10,29 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 # ------------------------------------
 
+# tests drive the overdue ledger themselves; no background refreshes
+os.environ["LIBRARY_OVERDUE_SCHEDULER"] = "0"
+
+
+def _forget_library_db():
+    """
+    Close and forget everything the data layer holds for library.db, then
+    delete the file. Anything that ran before the tests here (sample_test.py,
+    from the repo root) may already have opened, migrated and cached it.
+    """
+    import database as db
+    db._pool.close_all()
+    db._readiness.clear()
+    db._book_caches.clear()
+    for path in ("library.db", "library.db-wal", "library.db-shm", "library.db.pending.jsonl"):
+        if os.path.exists(path):
+            os.remove(path)
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
     # Always start with a clean database for tests
-    if os.path.exists("library.db"):
-        os.remove("library.db")
+    _forget_library_db()
 
     conn = sqlite3.connect("library.db")
     c = conn.cursor()
@@ -42,3 +59,35 @@ def setup_database():
         )
     conn.commit()
     conn.close()
+    yield
+    # leave no rows behind for the next run's sample_test.py
+    _forget_library_db()
+
+
+@pytest.fixture
+def temp_db(monkeypatch, tmp_path):
+    """Point the data layer at an empty, initialized throwaway database."""
+    import database as db
+
+    pool = db.ConnectionPool()
+    monkeypatch.setattr(db, "_pool", pool)
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "library.db"))
+    db.init_database()
+    yield db.DATABASE
+    pool.close_all()
+
+
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    """Search results are cached per catalog version; start every test cold."""
+    from services.library_service import _search_cache
+    _search_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_patron_report_cache():
+    """Patron reports are cached per patron id, whichever database is in use."""
+    from services.library_service import _patron_report_cache
+    _patron_report_cache.clear()
+    yield
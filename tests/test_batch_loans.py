@@ -0,0 +1,87 @@
+# tests/test_batch_loans.py
+import pytest
+import database as db
+import services.library_service as svc
+
+
+@pytest.fixture
+def stack(temp_db):
+    db.insert_books_batch([("Kiosk A", "Author", "9784444444440", 2),
+                           ("Kiosk B", "Author", "9784444444457", 1),
+                           ("Kiosk C", "Author", "9784444444464", 1)])
+    db.get_db_connection().execute("UPDATE books SET available_copies = 0 WHERE id = 3")
+    db.get_db_connection().commit()
+    return [1, 2, 3]
+
+def _open_loans(patron_id):
+    return db.get_db_connection().execute(
+        "SELECT COUNT(*) FROM borrow_records WHERE patron_id = ? AND return_date IS NULL",
+        (patron_id,)).fetchone()[0]
+
+def test_borrow_stack_reports_each_item(stack):
+    result = svc.borrow_books_by_patron("123456", [1, 2, 3, 99])
+    assert result["status"] == "partial"
+    assert (result["succeeded"], result["failed"]) == (2, 2)
+    assert [r["success"] for r in result["results"]] == [True, True, False, False]
+    assert result["results"][2]["message"] == "This book is currently not available."
+    assert result["results"][3]["message"] == "Book not found."
+    assert db.get_book_by_id(1)["available_copies"] == 1
+    assert db.get_book_by_id(2)["available_copies"] == 0
+    assert db.get_patron_active_loans("123456") == _open_loans("123456") == 2
+
+def test_borrow_stack_stops_at_the_limit(stack):
+    db.get_db_connection().execute("UPDATE books SET available_copies = 9, total_copies = 9")
+    db.get_db_connection().commit()
+    svc.borrow_books_by_patron("123456", [3, 3, 3])
+    result = svc.borrow_books_by_patron("123456", [1, 1, 2])
+    assert [r["success"] for r in result["results"]] == [True, True, False]
+    assert "maximum borrowing limit" in result["results"][2]["message"]
+    assert db.get_book_by_id(2)["available_copies"] == 9
+
+def test_whole_stack_is_one_transaction(stack):
+    statements = []
+    db.get_db_connection().set_trace_callback(statements.append)
+    try:
+        svc.borrow_books_by_patron("123456", [1, 2, 1])
+    finally:
+        db.get_db_connection().set_trace_callback(None)
+    assert statements.count("BEGIN IMMEDIATE") == 1
+    assert sum(sql.startswith("COMMIT") for sql in statements) == 1
+
+def test_return_stack(stack):
+    svc.borrow_books_by_patron("123456", [1, 1, 2])
+    result = svc.return_books_by_patron("123456", [1, 2, 2])
+    assert result["status"] == "partial"
+    assert [r["message"] for r in result["results"]] == [
+        "book returned", "book returned", "not borrowed or no record"]
+    assert db.get_book_by_id(1)["available_copies"] == 1
+    assert db.get_book_by_id(2)["available_copies"] == 1
+    assert db.get_patron_active_loans("123456") == _open_loans("123456") == 1
+
+def test_nothing_borrowed_is_a_failed_batch(stack):
+    result = svc.borrow_books_by_patron("123456", [3])
+    assert result["status"] == "failed"
+    assert db.get_patron_active_loans("123456") == 0
+
+@pytest.mark.parametrize("patron_id, book_ids", [
+    ("12345", [1]), ("123456", []), ("123456", "1,2"), ("123456", [1, "2"]),
+    ("123456", list(range(svc.MAX_BATCH_ITEMS + 1))),
+])
+def test_batch_validation(patron_id, book_ids):
+    with pytest.raises(ValueError):
+        svc.borrow_books_by_patron(patron_id, book_ids)
+
+def test_batch_endpoints(stack):
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        borrowed = client.post("/api/borrow/batch", json={"patron_id": "123456", "book_ids": [1, 2]})
+        partial = client.post("/api/return/batch", json={"patron_id": "123456", "book_ids": [1, 3]})
+        failed = client.post("/api/return/batch", json={"patron_id": "123456", "book_ids": [3]})
+        bad = client.post("/api/borrow/batch", json={"patron_id": "123456"})
+        not_json = client.post("/api/borrow/batch", data="1,2")
+    assert borrowed.status_code == 200 and borrowed.get_json()["succeeded"] == 2
+    assert partial.status_code == 207 and partial.get_json()["status"] == "partial"
+    assert failed.status_code == 409
+    assert bad.status_code == 400 and not_json.status_code == 400
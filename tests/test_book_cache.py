@@ -0,0 +1,94 @@
+# tests/test_book_cache.py
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pytest
+import database as db
+from cache import LRUCache
+
+
+@pytest.fixture
+def book_id(temp_db):
+    db.insert_book("Cached", "Author", "9783333333333", 3, 3)
+    return db.get_book_by_isbn("9783333333333")["id"]
+
+def test_lru_cache_evicts_least_recently_used():
+    evicted = []
+    cache = LRUCache(2, on_evict=lambda k, v: evicted.append(k))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert evicted == ["b"]
+    assert cache.get("b") is None
+    assert cache.stats()["hit_ratio"] == 0.5
+
+def test_repeated_lookups_hit_cache(book_id):
+    db.get_book_by_id(book_id)
+    before = db.get_book_cache_stats()["hits"]
+    for _ in range(5):
+        assert db.get_book_by_id(book_id)["title"] == "Cached"
+    assert db.get_book_cache_stats()["hits"] == before + 5
+    # the ISBN path shares the same entries
+    assert db.get_book_by_isbn("978-3-33-333333-3")["id"] == book_id
+
+def test_callers_cannot_corrupt_cached_rows(book_id):
+    with pytest.raises(TypeError):
+        db.get_book_by_id(book_id)["title"] = "Mutated"
+    assert db.get_book_by_id(book_id)["title"] == "Cached"
+
+def test_availability_update_invalidates(book_id):
+    assert db.get_book_by_id(book_id)["available_copies"] == 3
+    db.update_book_availability(book_id, -1)
+    assert db.get_book_by_id(book_id)["available_copies"] == 2
+
+def test_borrow_and_return_invalidate(book_id):
+    db.get_book_by_id(book_id)
+    now = datetime.now()
+    assert db.borrow_book_transaction("123456", book_id, now, now + timedelta(days=14), 5) == "ok"
+    assert db.get_book_by_id(book_id)["available_copies"] == 2
+    assert db.return_book_transaction("123456", book_id, date.today()) == "ok"
+    assert db.get_book_by_id(book_id)["available_copies"] == 3
+
+def test_writes_from_other_connections_are_seen(book_id, temp_db):
+    """Another worker process writing the same file must not leave stale entries"""
+    db.get_book_by_id(book_id)
+    other = sqlite3.connect(temp_db)
+    other.execute("UPDATE books SET title = 'Renamed' WHERE id = ?", (book_id,))
+    other.commit()
+    other.close()
+    assert db.get_book_by_id(book_id)["title"] == "Renamed"
+    assert db.get_book_by_isbn("9783333333333")["title"] == "Renamed"
+
+def test_trimmed_change_log_clears_cache(book_id, temp_db):
+    db.get_book_by_id(book_id)
+    other = sqlite3.connect(temp_db)
+    other.execute("UPDATE books SET title = 'Gone Missing' WHERE id = ?", (book_id,))
+    # simulate the log having been trimmed past our position
+    other.execute("DELETE FROM catalog_changes")
+    other.execute("INSERT INTO catalog_changes (book_id) VALUES (-1)")
+    other.commit()
+    other.close()
+    assert db.get_book_by_id(book_id)["title"] == "Gone Missing"
+
+def test_put_read_before_a_write_is_dropped(book_id):
+    """A lookup that read the row before a write must not re-cache it after the forget"""
+    conn = db.get_db_connection()
+    cache = db._book_cache()
+    assert cache.sync(conn)
+    stale, seq = db._read_book(conn, "id = ?", (book_id,))
+    db.update_book_availability(book_id, -1)   # commits, then forgets
+    cache.put(stale, seq)
+    assert db.get_book_cache_stats()["stale_puts"] == 1
+    assert db.get_book_by_id(book_id)["available_copies"] == 2
+    # rows read after the write are cached again
+    db.get_book_by_id(book_id)
+    assert db.get_book_by_id(book_id) is db.get_book_by_id(book_id)
+
+def test_stats_endpoint(book_id):
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        data = client.get("/api/stats/book_cache").get_json()
+    assert {"hits", "misses", "hit_ratio", "size", "evictions"} <= set(data)
@@ -1,4 +1,5 @@
 # tests/test_borrow_book.py
+import sqlite3
 import pytest
 import services.library_service as svc
 from services.payment_service import PaymentGateway
@@ -17,9 +18,7 @@ def make_book(book_id=1, title="Demo", available=2):
 def test_borrow_success(monkeypatch):
     # Arrange: stub DB functions to simulate a happy path
     monkeypatch.setattr(svc, "get_book_by_id", lambda book_id: make_book(book_id, "Clean Code", 2))
-    monkeypatch.setattr(svc, "get_patron_borrow_count", lambda patron_id: 0)
-    monkeypatch.setattr(svc, "insert_borrow_record", lambda patron_id, book_id, borrow_date, due_date: True)
-    monkeypatch.setattr(svc, "update_book_availability", lambda book_id, delta: True)
+    monkeypatch.setattr(svc, "borrow_book_transaction", lambda patron_id, book_id, borrow_date, due_date, max_loans: "ok")
 
     # Act
     success, message = svc.borrow_book_by_patron("123456", 1)
@@ -48,18 +47,26 @@ def test_borrow_unavailable_book(monkeypatch):
 
 def test_borrow_over_limit(monkeypatch):
     monkeypatch.setattr(svc, "get_book_by_id", lambda book_id: make_book(book_id, "Any", 2))
-    # Business rule: max 5 books; current count 6 should be rejected
-    monkeypatch.setattr(svc, "get_patron_borrow_count", lambda patron_id: 6)
+    # Business rule: max 5 books; the transaction rejects the 6th
+    monkeypatch.setattr(svc, "borrow_book_transaction", lambda *args: "limit")
     success, message = svc.borrow_book_by_patron("123456", 1)
     assert success is False
     assert "maximum borrowing limit" in message.lower()
 
+def test_borrow_last_copy_taken_concurrently(monkeypatch):
+    # Pre-check saw a copy, but another patron took it before our transaction
+    monkeypatch.setattr(svc, "get_book_by_id", lambda book_id: make_book(book_id, "Any", 1))
+    monkeypatch.setattr(svc, "borrow_book_transaction", lambda *args: "unavailable")
+    success, message = svc.borrow_book_by_patron("123456", 1)
+    assert success is False
+    assert "not available" in message.lower()
+
 def test_borrow_db_failure_on_update(monkeypatch):
-    # Insert succeeds but availability update fails -> should report DB error
+    # Transaction fails (e.g. still busy after retries) -> should report DB error
+    def boom(*args):
+        raise sqlite3.OperationalError("database is locked")
     monkeypatch.setattr(svc, "get_book_by_id", lambda book_id: make_book(book_id, "Any", 2))
-    monkeypatch.setattr(svc, "get_patron_borrow_count", lambda patron_id: 0)
-    monkeypatch.setattr(svc, "insert_borrow_record", lambda patron_id, book_id, borrow_date, due_date: True)
-    monkeypatch.setattr(svc, "update_book_availability", lambda book_id, delta: False)
+    monkeypatch.setattr(svc, "borrow_book_transaction", boom)
 
     success, message = svc.borrow_book_by_patron("123456", 1)
     assert success is False
@@ -0,0 +1,86 @@
+# tests/test_borrow_transaction.py
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+import database as db
+import services.library_service as svc
+
+
+def _add_book(copies=1, isbn="9780000000001"):
+    db.insert_book("Txn Book", "Txn Author", isbn, copies, copies)
+    return db.get_book_by_isbn(isbn)["id"]
+
+def _open_loans(patron_id):
+    return db.get_db_connection().execute(
+        "SELECT COUNT(*) FROM borrow_records WHERE patron_id = ? AND return_date IS NULL",
+        (patron_id,)).fetchone()[0]
+
+def _borrow(patron_id, book_id):
+    now = datetime.now()
+    return db.borrow_book_transaction(patron_id, book_id, now, now + timedelta(days=14), 5)
+
+def test_concurrent_borrows_never_oversell_last_copy(temp_db):
+    """Many threads racing for one copy: exactly one wins"""
+    book_id = _add_book(copies=1)
+    results = []
+
+    def worker(n):
+        results.append(_borrow(f"{100000 + n}", book_id))
+        db.release_db_connection()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count("ok") == 1
+    assert results.count("unavailable") == 7
+    assert db.get_book_by_id(book_id)["available_copies"] == 0
+    assert sum(_open_loans(f"{100000 + n}") for n in range(8)) == 1
+
+def test_borrow_limit_enforced_inside_transaction(temp_db):
+    book_id = _add_book(copies=10)
+    for _ in range(5):
+        assert _borrow("222222", book_id) == "ok"
+    assert _borrow("222222", book_id) == "limit"
+    # rejected attempt must not have taken a copy
+    assert db.get_book_by_id(book_id)["available_copies"] == 5
+
+def test_borrow_unknown_book(temp_db):
+    assert _borrow("222222", 424242) == "not_found"
+
+def test_return_closes_one_loan_and_restores_copy(temp_db):
+    book_id = _add_book(copies=2)
+    assert _borrow("333333", book_id) == "ok"
+    assert db.return_book_transaction("333333", book_id, date.today()) == "ok"
+    assert db.get_book_by_id(book_id)["available_copies"] == 2
+    assert _open_loans("333333") == 0
+    assert db.return_book_transaction("333333", book_id, date.today()) == "not_borrowed"
+
+def test_busy_database_is_retried(temp_db, monkeypatch):
+    """A lock held briefly by another connection is waited out, not reported"""
+    monkeypatch.setattr(db, "BUSY_BACKOFF_SECONDS", 0.01)
+    book_id = _add_book(copies=1)
+    blocker = sqlite3.connect(temp_db, timeout=0, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.05, blocker.rollback).start()
+
+    conn = db.get_db_connection()
+    conn.execute("PRAGMA busy_timeout = 0")
+    try:
+        assert _borrow("444444", book_id) == "ok"
+    finally:
+        blocker.close()
+
+def test_service_borrow_then_return_round_trip(temp_db):
+    book_id = _add_book(copies=1)
+    ok, msg = svc.borrow_book_by_patron("555555", book_id)
+    assert ok is True and "due date" in msg.lower()
+    ok, msg = svc.borrow_book_by_patron("666666", book_id)
+    assert ok is False and "not available" in msg.lower()
+    ok, msg = svc.return_book_by_patron("555555", book_id)
+    assert ok is True
+    assert db.get_book_by_id(book_id)["available_copies"] == 1
@@ -0,0 +1,66 @@
+# tests/test_bulk_import.py
+import io
+import json
+
+import database as db
+import manage
+from app import create_app
+from services.import_service import import_books
+
+CSV_FEED = """title,author,isbn,total_copies
+Dune,Frank Herbert,9780441172719,2
+,No Title,9780000000011,1
+Bad Isbn,Someone,12345,1
+Bad Copies,Someone,9780000000028,zero
+Dune Again,Frank Herbert,9780441172719,1
+Neuromancer,William Gibson,9780441569595,3
+"""
+
+def test_csv_import_rejects_rows_without_aborting(temp_db):
+    report = import_books(io.StringIO(CSV_FEED), "csv", batch_size=2)
+    assert report["accepted"] == 2
+    assert report["rejected"] == 4
+    errors = {r["line"]: r["error"] for r in report["rejects"]}
+    assert "title" in errors[3].lower()
+    assert "isbn" in errors[4].lower()
+    assert "copies" in errors[5].lower()
+    assert "already exists" in errors[6].lower()
+    assert report["rows_per_sec"] > 0
+    assert db.get_book_by_isbn("9780441569595")["available_copies"] == 3
+
+def test_jsonl_import_and_existing_duplicates(temp_db):
+    db.insert_book("Dune", "Frank Herbert", "9780441172719", 1, 1)
+    lines = [
+        json.dumps({"title": "Dune", "author": "Frank Herbert", "isbn": "9780441172719", "total_copies": 1}),
+        "{not json",
+        json.dumps({"title": "Hyperion", "author": "Dan Simmons", "isbn": "9780553283686", "total_copies": 2}),
+    ]
+    report = import_books(io.StringIO("\n".join(lines)), "jsonl")
+    assert report["accepted"] == 1
+    assert sorted(r["line"] for r in report["rejects"]) == [1, 2]
+
+def test_batch_falls_back_row_by_row_on_race(temp_db, monkeypatch):
+    """A duplicate that slips past the probe only rejects that one row"""
+    import services.import_service as imp
+    monkeypatch.setattr(imp, "find_existing_isbns", lambda norms: set())
+    db.insert_book("Dune", "Frank Herbert", "9780441172719", 1, 1)
+    report = import_books(io.StringIO(CSV_FEED), "csv")
+    assert report["accepted"] == 1
+    assert db.get_book_by_isbn("9780441569595") is not None
+
+def test_bulk_endpoint(temp_db):
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        response = client.post("/api/books/bulk?format=csv", data=CSV_FEED)
+        assert response.status_code == 200
+        assert response.get_json()["accepted"] == 2
+        assert client.post("/api/books/bulk?format=xml", data="").status_code == 400
+
+def test_cli_import(temp_db, tmp_path, capsys):
+    feed = tmp_path / "feed.csv"
+    feed.write_text(CSV_FEED)
+    assert manage.main(["import-books", str(feed), "--batch-size", "3"]) == 0
+    out, err = capsys.readouterr()
+    assert json.loads(out)["accepted"] == 2
+    assert "line 4" in err
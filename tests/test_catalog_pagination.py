@@ -0,0 +1,62 @@
+# tests/test_catalog_pagination.py
+import pytest
+import database as db
+import services.library_service as svc
+from app import create_app
+
+
+@pytest.fixture
+def catalog(temp_db):
+    # duplicate titles make sure the id tie-breaker is honoured
+    for n in range(23):
+        db.insert_book(f"Title {n % 10:02d}", "Author", f"97800000{n:05d}", 1, 1)
+    return sorted(((b["title"], b["id"]) for b in db.get_all_books()))
+
+def _walk_forward(limit):
+    seen, cursor = [], None
+    while True:
+        page = svc.get_catalog_page(cursor, limit)
+        seen.extend((b["title"], b["id"]) for b in page["books"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return seen, page
+
+def test_forward_pages_cover_catalog_in_order(catalog):
+    seen, last = _walk_forward(5)
+    assert seen == catalog
+    assert len(last["books"]) == 3
+
+def test_prev_cursor_returns_previous_page(catalog):
+    first = svc.get_catalog_page(None, 5)
+    assert first["prev_cursor"] is None
+    second = svc.get_catalog_page(first["next_cursor"], 5)
+    back = svc.get_catalog_page(second["prev_cursor"], 5)
+    assert [b["id"] for b in back["books"]] == [b["id"] for b in first["books"]]
+    assert back["prev_cursor"] is None
+    assert back["next_cursor"] is not None
+
+def test_invalid_cursor_rejected(catalog):
+    with pytest.raises(ValueError):
+        svc.get_catalog_page("not-a-cursor", 5)
+
+def test_page_query_seeks_the_title_index(catalog):
+    conn = db.get_db_connection()
+    plan = [r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM books WHERE (title, id) > (?, ?) ORDER BY title, id LIMIT 6",
+        ("Title 05", 3))]
+    assert any("idx_books_title_id" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+def test_api_books_endpoint(catalog):
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        data = client.get("/api/books?limit=10").get_json()
+        assert data["count"] == 10
+        nxt = client.get(f"/api/books?limit=10&cursor={data['next_cursor']}").get_json()
+        assert nxt["results"][0]["id"] != data["results"][0]["id"]
+        assert client.get("/api/books?cursor=bogus").status_code == 400
+        assert client.get("/api/books?limit=abc").status_code == 400
+        html = client.get("/catalog?limit=10").get_data(as_text=True)
+        assert "Next" in html and "Previous" not in html
+        assert client.get("/catalog?cursor=bogus").status_code == 200
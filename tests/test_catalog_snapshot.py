@@ -0,0 +1,179 @@
+# tests/test_catalog_snapshot.py
+import sqlite3
+import threading
+
+import pytest
+import database as db
+import services.library_service as svc
+from services import catalog_snapshot
+
+
+@pytest.fixture
+def manager(temp_db, monkeypatch):
+    fresh = catalog_snapshot.SnapshotManager()
+    monkeypatch.setattr(catalog_snapshot, "_manager", fresh)
+    db.insert_books_batch([(f"Book {n:02d}", f"Author {n % 3}", f"97844444{n:05d}", 2) for n in range(12)])
+    return fresh
+
+def test_snapshot_reused_until_catalog_changes(manager):
+    svc.search_books_in_catalog("book", "title")
+    svc.search_books_in_catalog("author 1", "author")
+    svc.get_catalog_page(None, 5)
+    assert manager.rebuilds == 1
+
+    db.insert_book("Fresh Arrival", "New Author", "9785555555555", 1, 1)
+    results = svc.search_books_in_catalog("fresh", "title")
+    assert [b["isbn"] for b in results] == ["9785555555555"]
+    # replayed from the change log, not rebuilt
+    assert manager.rebuilds == 1
+    assert manager.incremental_updates == 1
+
+def test_availability_change_rebuilds(manager):
+    book = db.get_book_by_isbn("9784444400003")
+    db.update_book_availability(book["id"], -1)
+    found = svc.search_books_in_catalog("9784444400003", "isbn")
+    assert found[0]["available_copies"] == 1
+
+def test_external_writes_rebuild(manager, temp_db):
+    svc.search_books_in_catalog("book", "title")
+    other = sqlite3.connect(temp_db)
+    other.execute("DELETE FROM books WHERE isbn = '9784444400000'")
+    other.commit()
+    other.close()
+    assert svc.search_books_in_catalog("Book 00", "title") == []
+
+def test_change_log_gap_forces_full_rebuild(manager, temp_db):
+    svc.search_books_in_catalog("book", "title")
+    db.insert_book("Gap Book", "Author", "9785555555555", 1, 1)
+    db.insert_book("After Gap", "Author", "9785555555562", 1, 1)
+    other = sqlite3.connect(temp_db)
+    other.execute("DELETE FROM catalog_changes WHERE seq < (SELECT MAX(seq) FROM catalog_changes)")
+    other.commit()
+    other.close()
+    assert len(svc.search_books_in_catalog("gap", "title")) == 2
+    assert manager.rebuilds == 2
+
+def test_trigram_search_matches_linear_scan(manager):
+    db.insert_book("The Hobbit", "J.R.R. Tolkien", "9785555555555", 1, 1)
+    db.insert_book("Renamed Later", "Somebody", "9785555555562", 1, 1)
+    book = db.get_book_by_isbn("9785555555562")
+    conn = db.get_db_connection()
+    conn.execute("UPDATE books SET title = 'Hobbit Companion' WHERE id = ?", (book["id"],))
+    conn.commit()
+
+    snapshot = catalog_snapshot.get_catalog_snapshot()
+    books = db.get_all_books()
+    for field, term in [("title", "HOBBIT"), ("title", "ok 1"), ("title", "b"), ("title", "renamed"),
+                        ("author", "tolk"), ("author", "author 2"), ("author", "zzz")]:
+        expected = sorted((b for b in books if term.lower() in b[field].lower()),
+                          key=lambda b: (b["title"], b["id"]))
+        assert snapshot.search(term, field) == expected
+
+def test_snapshot_results_are_read_only(manager):
+    with pytest.raises(TypeError):
+        svc.search_books_in_catalog("book 01", "title")[0]["title"] = "Mutated"
+    assert svc.search_books_in_catalog("book 01", "title")[0]["title"] == "Book 01"
+
+def test_catalog_reads_leave_an_open_write_alone(manager):
+    conn = db.get_db_connection()
+    conn.execute("UPDATE books SET title = 'Half Done' WHERE isbn = '9784444400000'")
+    assert conn.in_transaction
+    version, books = db.load_catalog()
+    assert db.load_catalog_changes(version) == (version, [], [])
+    assert conn.in_transaction
+    assert "Half Done" not in [b["title"] for b in books]
+    conn.rollback()
+    assert db.get_book_by_isbn("9784444400000")["title"] == "Book 00"
+
+def test_rebuild_is_timed_and_observable(manager):
+    stats = catalog_snapshot.rebuild_catalog_snapshot()
+    assert stats["books"] == 12
+    assert stats["rebuilds"] == 1
+    assert stats["last_build_ms"] >= 0
+    assert stats["version"] == db.get_catalog_version()
+
+def test_snapshot_endpoints(manager):
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        rebuilt = client.post("/api/admin/catalog_snapshot/rebuild").get_json()
+        stats = client.get("/api/stats/catalog_snapshot").get_json()
+    assert rebuilt["rebuilds"] == 1
+    assert stats["books"] == 12
+
+def test_loans_update_the_snapshot_in_place(manager):
+    before = catalog_snapshot.get_catalog_snapshot()
+    book = db.get_book_by_isbn("9784444400003")
+    db.update_book_availability(book["id"], -2)
+    after = catalog_snapshot.get_catalog_snapshot()
+    assert after.version > before.version and manager.incremental_updates == 1
+    # nothing copied: the new counts are logged against the shared rows
+    assert after._rows is before._rows
+    assert after.get(book["id"])["available_copies"] == 0
+    assert book["id"] not in after.available_ids() and after.available_count() == 11
+
+    db.insert_book("New Title", "Someone", "9785555555555", 1, 1)
+    newer = catalog_snapshot.get_catalog_snapshot()
+    assert newer._rows is not after._rows
+    assert len(newer) == 13 and len(after) == 12
+    assert newer.available_count() == 12
+    assert newer.get(book["id"])["available_copies"] == 0
+
+def test_older_snapshots_keep_their_counts(manager):
+    before = catalog_snapshot.get_catalog_snapshot()
+    book = db.get_book_by_isbn("9784444400003")
+    db.update_book_availability(book["id"], -1)
+    middle = catalog_snapshot.get_catalog_snapshot()
+    db.update_book_availability(book["id"], -1)
+    after = catalog_snapshot.get_catalog_snapshot()
+    assert after._rows is before._rows and manager.incremental_updates == 2
+
+    for snapshot, copies in ((before, 2), (middle, 1), (after, 0)):
+        assert snapshot.get(book["id"])["available_copies"] == copies
+        assert snapshot.by_isbn("9784444400003")["available_copies"] == copies
+        assert snapshot.search("book 03", "title")[0]["available_copies"] == copies
+        assert [b for b in snapshot.books if b["id"] == book["id"]][0]["available_copies"] == copies
+        assert (book["id"] in snapshot.available_ids()) == (copies > 0)
+        assert snapshot.available_count() == (12 if copies else 11)
+
+def test_snapshot_readers_see_one_version_during_loans(manager):
+    book = db.get_book_by_isbn("9784444400003")
+    snapshot = catalog_snapshot.get_catalog_snapshot()
+    done = threading.Event()
+    seen = []
+
+    def read():
+        while not done.is_set():
+            seen.append((snapshot.get(book["id"])["available_copies"], snapshot.available_count(),
+                         sum(b["available_copies"] for b in snapshot.books)))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for delta in (-1, -1, 1, 1) * 5:
+            db.update_book_availability(book["id"], delta)
+            catalog_snapshot.get_catalog_snapshot()
+    finally:
+        done.set()
+        reader.join()
+    assert seen and set(seen) == {(2, 12, 24)}
+    assert manager.incremental_updates == 20
+
+def test_count_log_is_folded_into_fresh_rows(manager, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "COUNT_LOG_LIMIT", 2)
+    book = db.get_book_by_isbn("9784444400003")
+    first = catalog_snapshot.get_catalog_snapshot()
+    for _ in range(3):
+        db.update_book_availability(book["id"], -1 if _ % 2 == 0 else 1)
+        catalog_snapshot.get_catalog_snapshot()
+    last = catalog_snapshot.get_catalog_snapshot()
+    assert last._rows is not first._rows and last._counts.size == 0
+    assert last.get(book["id"])["available_copies"] == 1
+    assert first.get(book["id"])["available_copies"] == 2
+
+def test_catalog_pages_do_not_need_the_snapshot(manager, monkeypatch):
+    def unavailable():
+        raise AssertionError("paging must not build or update the snapshot")
+    monkeypatch.setattr(svc, "get_catalog_snapshot", unavailable)
+    assert [b["title"] for b in svc.get_catalog_page(None, 3)["books"]] == ["Book 00", "Book 01", "Book 02"]
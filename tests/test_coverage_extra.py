@@ -5,8 +5,13 @@ import services.library_service as svc
 
 
 def test_search_falls_back_to_memory_when_db_empty(monkeypatch):
-    # force DB path to return empty -> should seed in-memory catalog
-    monkeypatch.setattr(svc, "get_all_books", lambda: [])
+    # force the snapshot and DB paths to come back empty -> should seed in-memory catalog
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("no snapshot")
+
+    monkeypatch.setattr(svc, "get_catalog_snapshot", unavailable)
+    monkeypatch.setattr(svc, "search_books_fulltext", lambda *args: [])
+    monkeypatch.setattr(svc, "search_books", lambda *args, **kwargs: ([], 0))
     results = svc.search_books_in_catalog("great", "title")
     # in-memory seed has "The Great Gatsby"
     assert any("great" in b["title"].lower() for b in results)
@@ -0,0 +1,51 @@
+# tests/test_db_pool.py
+import pytest
+import database as db
+from app import create_app
+
+
+@pytest.fixture
+def fresh_pool(temp_db):
+    return db._pool
+
+def test_same_thread_reuses_connection(fresh_pool):
+    """Repeated helper calls on one thread share a single connection"""
+    first = db.get_db_connection()
+    db.get_book_by_id(1)
+    db.get_patron_active_loans("123456")
+    assert db.get_db_connection() is first
+    stats = db.get_pool_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] >= 3
+
+def test_pragmas_applied_once_per_connection(fresh_pool):
+    conn = db.get_db_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1   # NORMAL
+
+def test_release_returns_connection_to_idle_pool(fresh_pool):
+    conn = db.get_db_connection()
+    db.release_db_connection()
+    assert db.get_pool_stats()["idle"] == 1
+    # next checkout is served from the idle pool, not a new connect
+    assert db.get_db_connection() is conn
+    assert db.get_pool_stats()["misses"] == 1
+
+def test_release_rolls_back_open_transaction(fresh_pool):
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                 "VALUES ('T', 'A', '1111111111111', 1, 1)")
+    assert conn.in_transaction
+    db.release_db_connection()
+    assert not conn.in_transaction
+    assert db.get_book_by_isbn("1111111111111") is None
+
+def test_app_teardown_releases_connection(fresh_pool):
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        client.get("/catalog")
+        response = client.get("/api/stats/db_pool")
+    data = response.get_json()
+    assert data["misses"] >= 1
+    assert data["idle"] >= 1
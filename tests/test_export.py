@@ -0,0 +1,73 @@
+# tests/test_export.py
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import database as db
+import manage
+from app import create_app
+from services import export_service
+
+
+def _seed(n_books=30, n_loans=12):
+    db.insert_books_batch([(f"Book {i}", "Author", f"97811111{i:05d}", 2) for i in range(n_books)])
+    now = datetime.now()
+    for i in range(n_loans):
+        db.insert_borrow_record(f"{200000 + i}", i + 1, now, now + timedelta(days=14))
+
+def test_iter_books_fetches_in_batches(temp_db, monkeypatch):
+    _seed()
+    batches = []
+    real = db._iter_query
+
+    def spy(sql, fetch_size):
+        for rows in real(sql, fetch_size):
+            batches.append(len(rows))
+            yield rows
+
+    monkeypatch.setattr(db, "_iter_query", spy)
+    books = list(db.iter_books(fetch_size=7))
+    assert [b["id"] for b in books] == sorted(b["id"] for b in books)
+    assert len(books) == 30
+    assert max(batches) == 7
+
+def test_books_jsonl_round_trips(temp_db):
+    _seed()
+    lines = b"".join(export_service.books_jsonl()).decode().splitlines()
+    assert len(lines) == 30
+    assert json.loads(lines[0])["title"] == "Book 0"
+
+def test_loans_csv_has_header_and_rows(temp_db):
+    _seed()
+    rows = list(csv.DictReader(io.StringIO(b"".join(export_service.loans_csv()).decode())))
+    assert len(rows) == 12
+    assert rows[0]["patron_id"] == "200000"
+    assert rows[0]["return_date"] == ""
+
+def test_empty_loans_csv_is_just_header(temp_db):
+    assert b"".join(export_service.loans_csv()).decode().strip() == ",".join(export_service.LOAN_COLUMNS)
+
+def test_export_endpoints_stream_and_gzip(temp_db):
+    _seed()
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        response = client.get("/api/export/books.jsonl")
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert len(response.get_data().splitlines()) == 30
+
+        zipped = client.get("/api/export/loans.csv?gzip=1")
+        assert zipped.mimetype == "application/gzip"
+        assert "loans.csv.gz" in zipped.headers["Content-Disposition"]
+        text = gzip.decompress(zipped.get_data()).decode()
+        assert len(text.strip().splitlines()) == 13
+
+def test_cli_export_gzip(temp_db, tmp_path):
+    _seed()
+    target = tmp_path / "books.jsonl.gz"
+    assert manage.main(["export-books", "--gzip", "-o", str(target)]) == 0
+    with gzip.open(target, "rt") as fh:
+        assert sum(1 for _ in fh) == 30
@@ -0,0 +1,77 @@
+# tests/test_faceted_search.py
+import pytest
+import database as db
+from services import catalog_snapshot
+from services.search_planner import faceted_search
+
+
+@pytest.fixture
+def catalog(temp_db, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "_manager", catalog_snapshot.SnapshotManager())
+    db.insert_books_batch([
+        ("Dune", "Frank Herbert", "9780441172719", 4),
+        ("Dune Messiah", "Frank Herbert", "9780593098233", 1),
+        ("Children of Dune", "Frank Herbert", "9780593098240", 2),
+        ("The Dune Encyclopedia", "Willis McNelly", "9780425068137", 1),
+        ("Hyperion", "Dan Simmons", "9780553283686", 3),
+    ] + [(f"Filler {n:03d}", "Nobody", f"97822222{n:05d}", 1) for n in range(100)])
+    messiah = db.get_book_by_isbn("9780593098233")
+    db.update_book_availability(messiah["id"], -1)
+    return temp_db
+
+def titles(result):
+    return [b["title"] for b in result["results"]]
+
+def test_title_and_author_combine(catalog):
+    result = faceted_search(title="dune", author="herbert")
+    assert titles(result) == ["Dune", "Dune Messiah", "Children of Dune"]
+    assert result["total"] == 3
+    assert result["plan"]["driver"] in ("title", "author")
+
+def test_availability_and_copies_filters(catalog):
+    result = faceted_search(title="dune", available_only=True, min_copies=2, sort="title")
+    assert titles(result) == ["Children of Dune", "Dune"]
+
+def test_availability_sort(catalog):
+    result = faceted_search(author="frank", sort="availability")
+    assert titles(result) == ["Dune", "Children of Dune", "Dune Messiah"]
+
+def test_planner_picks_the_most_selective_index(catalog):
+    assert faceted_search(isbn="0-441-17271-7", title="dune")["plan"]["driver"] == "isbn"
+    # 'nobody' matches 100 books, 'dune' only 4
+    plan = faceted_search(title="dune", author="nobody")["plan"]
+    assert plan["driver"] == "title" and plan["examined"] <= 5
+    # too short for the trigram index; availability narrows it instead
+    result = faceted_search(title="du", available_only=True)
+    assert result["plan"]["driver"] == "available"
+    assert result["total"] == 3
+    assert faceted_search(min_copies=3)["plan"]["driver"] == "scan"
+
+def test_facets_cover_all_matches_not_just_the_page(catalog):
+    result = faceted_search(title="dune", limit=1)
+    assert len(result["results"]) == 1
+    assert result["facets"]["availability"] == {"available": 3, "unavailable": 1}
+    assert result["facets"]["authors"] == [
+        {"author": "Frank Herbert", "count": 3},
+        {"author": "Willis McNelly", "count": 1},
+    ]
+
+def test_needs_a_criterion_and_a_known_sort(catalog):
+    with pytest.raises(ValueError):
+        faceted_search()
+    with pytest.raises(ValueError):
+        faceted_search(title="dune", sort="random")
+
+def test_search_api_accepts_combined_filters(catalog):
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        ok = client.get("/api/search?title=dune&author=herbert&available_only=1&sort=availability")
+        bad = client.get("/api/search?title=dune&min_copies=lots")
+        legacy = client.get("/api/search?q=dune&type=title")
+    body = ok.get_json()
+    assert [b["title"] for b in body["results"]] == ["Dune", "Children of Dune"]
+    assert body["facets"]["availability"] == {"available": 2, "unavailable": 0}
+    assert bad.status_code == 400
+    assert legacy.get_json()["count"] == 4
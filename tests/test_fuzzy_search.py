@@ -0,0 +1,98 @@
+# tests/test_fuzzy_search.py
+import random
+import sqlite3
+
+import pytest
+import database as db
+import services.library_service as svc
+from fuzzy import DeletionIndex, edit_distance
+from services import catalog_snapshot
+
+
+@pytest.fixture
+def catalog(temp_db, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "_manager", catalog_snapshot.SnapshotManager())
+    db.add_sample_data()
+    db.insert_book("Animal Farm", "George Orwell", "9780451526342", 2, 2)
+    db.insert_book("Tender Is the Night", "F. Scott Fitzgerald", "9780684801544", 1, 1)
+    return temp_db
+
+def test_edit_distance():
+    assert edit_distance("orwel", "orwell") == 1
+    assert edit_distance("fitzgerld", "fitzgerald") == 1
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("kitten", "sitting", limit=1) == 2
+    assert edit_distance("", "abc") == 3
+
+def test_deletion_index_matches_brute_force():
+    rng = random.Random(7)
+    for alphabet, shortest, longest in (("abcde", 2, 7), ("abc", 6, 14)):
+        words = {"".join(rng.choice(alphabet) for _ in range(rng.randint(shortest, longest)))
+                 for _ in range(400)}
+        index = DeletionIndex()
+        for word in words:
+            index.add(word)
+        assert not index.add(next(iter(words)))
+        assert len(index) == len(words)
+        for _ in range(20):
+            query = "".join(rng.choice(alphabet) for _ in range(rng.randint(shortest, longest)))
+            for k in (1, 2):
+                expected = sorted((edit_distance(query, w), w) for w in words if edit_distance(query, w) <= k)
+                assert sorted(index.search(query, k)) == expected
+
+def test_fuzzy_index_is_built_on_first_use(catalog, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "FUZZY_BACKGROUND_BUILD", False)
+    snapshot = catalog_snapshot.rebuild_catalog_snapshot()
+    assert snapshot["trigrams"]["fuzzy_index_ready"] is False
+    svc.get_catalog_page(None, 5)
+    svc.search_books_in_catalog("farm", "title")
+    assert catalog_snapshot.get_catalog_snapshot_stats()["trigrams"]["fuzzy_index_ready"] is False
+    # books added since the rebuild are indexed too
+    db.insert_book("Barnyard Tales", "Someone", "9781234567897", 1, 1)
+    assert [b["title"] for b in svc.search_books_in_catalog("barnyrd", "fuzzy")] == ["Barnyard Tales"]
+    assert catalog_snapshot.get_catalog_snapshot_stats()["trigrams"]["fuzzy_index_ready"] is True
+
+def test_misspelled_author_finds_books(catalog):
+    results = svc.search_books_in_catalog("Fitzgerld", "fuzzy")
+    assert [b["title"] for b in results] == ["Tender Is the Night", "The Great Gatsby"]
+    assert all(b["distance"] == 1 for b in results)
+
+    results = svc.search_books_in_catalog("orwel", "fuzzy")
+    assert {b["title"] for b in results} == {"1984", "Animal Farm"}
+
+def test_exact_matches_rank_first(catalog):
+    db.insert_book("Farn Stories", "Someone", "9781234567897", 1, 1)
+    results = svc.search_books_in_catalog("farm", "fuzzy")
+    assert [(b["title"], b["distance"]) for b in results] == [("Animal Farm", 0), ("Farn Stories", 1)]
+
+def test_every_query_word_must_match(catalog):
+    assert [b["title"] for b in svc.search_books_in_catalog("georg animl", "fuzzy")] == ["Animal Farm"]
+    assert svc.search_books_in_catalog("george zebra", "fuzzy") == []
+    # short words are not fuzzed
+    assert svc.search_books_in_catalog("lea", "fuzzy") == []
+
+def test_results_are_bounded(catalog, monkeypatch):
+    db.insert_books_batch([(f"Orwell Study {n}", "Critic", f"97800000{n:05d}", 1) for n in range(30)])
+    snapshot = catalog_snapshot.get_catalog_snapshot()
+    assert len(snapshot.fuzzy_search("orwell")) == catalog_snapshot.FUZZY_RESULT_LIMIT
+    assert len(snapshot.fuzzy_search("orwell", limit=3)) == 3
+
+def test_renamed_book_no_longer_matches_old_words(catalog):
+    svc.search_books_in_catalog("farm", "fuzzy")
+    conn = sqlite3.connect(catalog)
+    conn.execute("UPDATE books SET title = 'Barnyard' WHERE isbn = '9780451526342'")
+    conn.commit()
+    conn.close()
+    assert svc.search_books_in_catalog("farm", "fuzzy") == []
+    assert [b["title"] for b in svc.search_books_in_catalog("barnyrd", "fuzzy")] == ["Barnyard"]
+
+def test_fuzzy_search_routes(catalog):
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        api = client.get("/api/search?q=Fitzgerld&fuzzy=1").get_json()
+        page = client.get("/search?q=Fitzgerld&type=fuzzy")
+    assert api["search_type"] == "fuzzy"
+    assert api["count"] == 2
+    assert b"The Great Gatsby" in page.data
@@ -0,0 +1,99 @@
+# tests/test_holds.py
+import pytest
+import database as db
+import services.library_service as svc
+
+
+@pytest.fixture
+def popular(temp_db):
+    """One book, one copy, already out with patron 100001."""
+    db.insert_books_batch([("Popular", "Author", "9785555555555", 1)])
+    assert svc.borrow_book_by_patron("100001", 1)[0]
+    return 1
+
+def test_holds_queue_in_order(popular):
+    first = svc.place_hold("100002", popular)
+    second = svc.place_hold("100003", popular)
+    assert first["status"] == second["status"] == "ok"
+    assert (first["hold"]["ahead"], second["hold"]["ahead"]) == (0, 1)
+    assert svc.place_hold("100002", popular)["status"] == "duplicate"
+    assert svc.place_hold("100002", 99)["status"] == "not_found"
+    assert [h["patron_id"] for h in svc.get_book_holds(popular)] == ["100002", "100003"]
+
+def test_no_hold_while_a_copy_is_on_the_shelf(temp_db):
+    db.insert_books_batch([("Plenty", "Author", "9785555555562", 3)])
+    assert svc.place_hold("100002", 1)["status"] == "available"
+
+def test_return_sets_the_copy_aside_for_the_head_of_the_queue(popular):
+    svc.place_hold("100002", popular)
+    svc.place_hold("100003", popular)
+    assert svc.return_book_by_patron("100001", popular)[0]
+
+    assert db.get_book_by_id(popular)["available_copies"] == 0
+    ready, waiting = svc.get_book_holds(popular)
+    assert (ready["patron_id"], ready["status"]) == ("100002", "ready")
+    assert (waiting["patron_id"], waiting["ahead"]) == ("100003", 0)
+
+    assert "not available" in svc.borrow_book_by_patron("100003", popular)[1].lower()
+    assert svc.borrow_book_by_patron("100002", popular)[0]
+    assert [h["patron_id"] for h in svc.get_book_holds(popular)] == ["100003"]
+    assert db.get_book_by_id(popular)["available_copies"] == 0
+
+def test_cancelling_a_ready_hold_passes_the_copy_on(popular):
+    hold = svc.place_hold("100002", popular)["hold"]
+    other = svc.place_hold("100003", popular)["hold"]
+    svc.return_book_by_patron("100001", popular)
+
+    assert svc.cancel_hold("100003", hold["id"]) == (False, "Hold not found.")
+    assert svc.cancel_hold("100002", hold["id"]) == (True, "Hold cancelled.")
+    assert svc.get_patron_holds("100003")[0]["status"] == "ready"
+    assert svc.cancel_hold("100003", other["id"])[0]
+    assert db.get_book_by_id(popular)["available_copies"] == 1
+
+def test_batch_return_and_borrow_honour_holds(temp_db):
+    db.insert_books_batch([("Pair", "Author", "9785555555579", 2)])
+    svc.borrow_books_by_patron("100001", [1, 1])
+    svc.place_hold("100002", 1)
+    svc.return_books_by_patron("100001", [1, 1])
+    assert db.get_book_by_id(1)["available_copies"] == 1
+    assert svc.get_patron_holds("100002")[0]["status"] == "ready"
+
+    result = svc.borrow_books_by_patron("100002", [1, 1])
+    assert result["succeeded"] == 2   # the held copy, then the shelved one
+    assert svc.get_patron_holds("100002") == []
+    assert db.get_book_by_id(1)["available_copies"] == 0
+
+def test_finding_the_head_of_the_queue_is_an_index_probe(temp_db):
+    plan = [row[3] for row in db.get_db_connection().execute('''
+        EXPLAIN QUERY PLAN
+        SELECT id FROM holds WHERE book_id = 1 AND status = 'waiting' ORDER BY position LIMIT 1
+    ''')]
+    assert plan == ["SEARCH holds USING INDEX idx_holds_queue (book_id=?)"]
+
+def test_positions_are_never_reused(popular):
+    first = svc.place_hold("100002", popular)["hold"]
+    svc.return_book_by_patron("100001", popular)   # first is ready, nobody waits
+    second = svc.place_hold("100003", popular)["hold"]
+    svc.cancel_hold("100003", second["id"])
+    third = svc.place_hold("100004", popular)["hold"]
+    assert first["position"] < second["position"] < third["position"]
+    assert (third["status"], third["ahead"]) == ("waiting", 0)
+
+def test_hold_endpoints(popular):
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        placed = client.post("/api/holds", json={"patron_id": "100002", "book_id": popular})
+        again = client.post("/api/holds", json={"patron_id": "100002", "book_id": popular})
+        bad = client.post("/api/holds", json={"patron_id": "1002", "book_id": popular})
+        listed = client.get(f"/api/holds?book_id={popular}").get_json()
+        mine = client.get("/api/holds?patron_id=100002").get_json()
+        hold_id = placed.get_json()["hold"]["id"]
+        cancelled = client.delete(f"/api/holds/{hold_id}?patron_id=100002")
+        gone = client.delete(f"/api/holds/{hold_id}?patron_id=100002")
+        neither = client.get("/api/holds")
+    assert placed.status_code == 201 and again.status_code == 409 and bad.status_code == 400
+    assert listed["count"] == mine["count"] == 1
+    assert cancelled.status_code == 200 and gone.status_code == 404
+    assert neither.status_code == 400
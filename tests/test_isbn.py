@@ -0,0 +1,58 @@
+# tests/test_isbn.py
+import sqlite3
+
+import pytest
+import database as db
+import migrations
+import services.library_service as svc
+from isbn import normalize_isbn
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("9780743273565", "9780743273565"),
+    ("978-0-7432-7356-5", "9780743273565"),
+    ("0743273567", "9780743273565"),
+    ("0-7432-7356-7", "9780743273565"),
+    ("080442957X", "9780804429573"),
+    ("080442957x", "9780804429573"),
+    (" 12345 ", "12345"),
+    (None, ""),
+])
+def test_normalize_isbn(raw, expected):
+    assert normalize_isbn(raw) == expected
+
+def test_lookup_accepts_any_spelling(temp_db):
+    db.insert_book("Gatsby", "Fitzgerald", "9780743273565", 1, 1)
+    for spelling in ("9780743273565", "978-0-7432-7356-5", "0743273567"):
+        assert db.get_book_by_isbn(spelling)["title"] == "Gatsby"
+
+def test_isbn_lookup_is_an_index_probe(temp_db):
+    conn = db.get_db_connection()
+    plan = [r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM books WHERE isbn_norm = ? OR isbn = ? LIMIT 1", ("x", "x"))]
+    assert not any(step.startswith("SCAN") for step in plan), plan
+
+def test_search_by_isbn_uses_normalized_key(temp_db):
+    db.insert_book("Gatsby", "Fitzgerald", "9780743273565", 1, 1)
+    results = svc.search_books_in_catalog("0-7432-7356-7", "isbn")
+    assert [b["isbn"] for b in results] == ["9780743273565"]
+
+def test_duplicate_isbn_rejected(temp_db):
+    ok, _ = svc.add_book_to_catalog("First", "Author", "9781234567897", 1)
+    assert ok is True
+    ok, msg = svc.add_book_to_catalog("Second", "Author", "9781234567897", 1)
+    assert ok is False
+    assert "already exists" in msg.lower()
+
+def test_migration_backfills_existing_rows(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    migrations._create_base_tables(conn)
+    conn.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                 "VALUES ('Old', 'Author', '978-0-7432-7356-5', 1, 1)")
+    conn.commit()
+    migrations.migrate(conn)
+    assert conn.execute("SELECT isbn_norm FROM books").fetchone()[0] == "9780743273565"
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO books (title, author, isbn, isbn_norm, total_copies, available_copies) "
+                     "VALUES ('Dup', 'Author', '9780743273565', '9780743273565', 1, 1)")
+    conn.close()
@@ -0,0 +1,61 @@
+# tests/test_late_fee_batch.py
+from datetime import date, datetime, time, timedelta
+
+import pytest
+import database as db
+import services.library_service as svc
+
+TODAY = date(2025, 3, 1)
+
+
+@pytest.fixture
+def loans(temp_db):
+    db.insert_books_batch([(f"Book {n}", "Author", f"97811111{n:05d}", 10) for n in range(45)])
+    return temp_db
+
+def lend(patron_id, book_id, days_overdue, returned=False):
+    due = datetime.combine(TODAY - timedelta(days=days_overdue), time(15, 30))
+    db.insert_borrow_record(patron_id, book_id, due - timedelta(days=14), due)
+    if returned:
+        db.update_borrow_record_return_date(patron_id, book_id, datetime.now())
+
+def test_sql_schedule_matches_the_python_one(loans):
+    for days in range(-3, 41):
+        lend(f"{days + 100:06d}", days + 4, days)
+    for loan in db.get_open_loan_fees(TODAY):
+        days = int(loan["patron_id"]) - 100
+        assert loan["days_overdue"] == max(days, 0)
+        assert loan["fee_cents"] / 100 == svc._calc_fee(max(days, 0))
+
+def test_totals_per_patron(loans):
+    lend("111111", 1, 3)      # 1.50
+    lend("111111", 2, 10)     # 3.50 + 3.00
+    lend("111111", 3, 60)     # capped at 15.00
+    lend("111111", 4, 0)      # due today: not overdue
+    lend("222222", 5, 1)      # 0.50
+    lend("333333", 6, 30, returned=True)
+
+    totals = svc.calculate_late_fees_for_all(TODAY)
+    assert totals == {
+        "111111": {"fee_amount": 23.0, "overdue_loans": 3, "max_days_overdue": 60},
+        "222222": {"fee_amount": 0.5, "overdue_loans": 1, "max_days_overdue": 1},
+    }
+
+def test_single_book_fee_uses_the_same_pricing(loans, monkeypatch):
+    monkeypatch.setattr(svc, "_today", lambda: TODAY)
+    lend("111111", 7, 9)
+    assert svc.calculate_late_fee_for_book("111111", 7) == {"fee_amount": 5.5, "days_overdue": 9}
+    lend("111111", 8, -2)
+    assert svc.calculate_late_fee_for_book("111111", 8) == {"fee_amount": 0.0, "days_overdue": 0}
+
+def test_late_fees_endpoint(loans):
+    lend("111111", 1, 8)
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        body = client.get(f"/api/late_fees?as_of={TODAY.isoformat()}").get_json()
+        bad = client.get("/api/late_fees?as_of=yesterday")
+    assert body["patrons"]["111111"]["fee_amount"] == 4.5
+    assert body["total_fee_amount"] == 4.5
+    assert bad.status_code == 400
@@ -0,0 +1,83 @@
+# tests/test_memory_catalog.py
+import json
+import os
+import sqlite3
+
+import pytest
+import database as db
+import services.library_service as svc
+from services import memory_catalog
+from services.memory_catalog import MemoryCatalog, get_memory_catalog, journal_path
+
+
+@pytest.fixture
+def db_down(temp_db, monkeypatch):
+    """Inserts fail as if SQLite were unreachable."""
+    def unavailable(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+    monkeypatch.setattr(svc, "insert_book", unavailable)
+    monkeypatch.setattr(svc, "replay_pending_writes", lambda: None)
+    return temp_db
+
+def read_journal(db_path):
+    with open(journal_path(db_path)) as f:
+        return [json.loads(line) for line in f]
+
+def test_writes_are_journaled_and_searchable(db_down):
+    ok, _ = svc.add_book_to_catalog("Offline Book", "Someone", "9781111111116", 2)
+    assert ok
+    assert [e["isbn"] for e in read_journal(db_down)] == ["9781111111116"]
+    assert get_memory_catalog().pending == 1
+    assert [b["title"] for b in svc.search_books_in_catalog("offline", "title")] == ["Offline Book"]
+    assert [b["title"] for b in svc.search_books_in_catalog("978-1-111-11111-6", "isbn")] == ["Offline Book"]
+
+def test_duplicates_are_caught_by_the_isbn_index(db_down):
+    assert svc.add_book_to_catalog("Offline Book", "Someone", "9781111111116", 2)[0]
+    ok, msg = svc.add_book_to_catalog("Again", "Someone", "9781111111116", 1)
+    assert not ok and "already exists" in msg
+    assert len(read_journal(db_down)) == 1
+
+def test_journal_survives_a_restart(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    first = MemoryCatalog(path)
+    book = first.add("Kept", "Author", "9781111111116", 1)
+    restarted = MemoryCatalog(path)
+    assert restarted.pending == 1
+    assert restarted.get_by_isbn("9781111111116") == book
+    assert restarted.add("Next", "Author", "9781111111123", 1)["id"] == book["id"] + 1
+
+def test_unwritable_journal_rejects_the_write(tmp_path):
+    store = MemoryCatalog(str(tmp_path / "missing" / "journal.jsonl"))
+    with pytest.raises(OSError):
+        store.add("Lost", "Author", "9781111111116", 1)
+    assert store.get_by_isbn("9781111111116") is None and store.pending == 0
+
+def test_replay_moves_pending_books_into_sqlite(db_down, monkeypatch):
+    svc.add_book_to_catalog("Offline One", "Someone", "9781111111116", 2)
+    svc.add_book_to_catalog("Offline Two", "Someone", "9781111111123", 1)
+    db.insert_book("Raced In", "Other", "9781111111123", 1, 1)
+
+    assert get_memory_catalog().replay() == {"replayed": 1, "conflicts": 1}
+    assert db.get_book_by_isbn("9781111111116")["title"] == "Offline One"
+    assert db.get_book_by_isbn("9781111111123")["title"] == "Raced In"
+    assert not os.path.exists(journal_path(db_down))
+    assert get_memory_catalog().get_by_isbn("9781111111116") is None
+
+def test_next_successful_add_replays_first(db_down, monkeypatch):
+    svc.add_book_to_catalog("Offline One", "Someone", "9781111111116", 2)
+    monkeypatch.setattr(svc, "insert_book", db.insert_book)
+    monkeypatch.setattr(svc, "replay_pending_writes", memory_catalog.replay_pending_writes)
+    assert svc.add_book_to_catalog("Online", "Someone", "9781111111123", 1)[0]
+    assert db.get_book_by_isbn("9781111111116") is not None
+    assert get_memory_catalog().pending == 0
+
+def test_failed_replay_keeps_the_journal(db_down, monkeypatch):
+    svc.add_book_to_catalog("Offline One", "Someone", "9781111111116", 2)
+
+    def still_down(rows):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(memory_catalog.database, "insert_books_batch", still_down)
+    assert memory_catalog.replay_pending_writes() is None
+    assert get_memory_catalog().pending == 1
+    assert len(read_journal(db_down)) == 1
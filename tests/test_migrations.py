@@ -0,0 +1,118 @@
+# tests/test_migrations.py
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pytest
+import database as db
+import migrations
+
+
+def _index_names(conn):
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+def _trace_statements(fn, *args):
+    """Run a data-layer helper and capture the SQL it sends to SQLite."""
+    conn = db.get_db_connection()
+    seen = []
+    conn.set_trace_callback(seen.append)
+    try:
+        fn(*args)
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in seen if "borrow_records" in s and not s.startswith(("BEGIN", "COMMIT"))]
+
+def test_fresh_database_is_at_latest_version(temp_db):
+    conn = db.get_db_connection()
+    assert migrations.get_schema_version(conn) == migrations.LATEST_VERSION
+    assert {"idx_borrow_records_patron_return", "idx_borrow_records_book_return",
+            "idx_borrow_records_active"} <= _index_names(conn)
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    migrations._create_base_tables(legacy)
+    legacy.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                   "VALUES ('Old', 'Author', '9781111111111', 1, 1)")
+    legacy.commit()
+    assert migrations.get_schema_version(legacy) == 0
+
+    assert migrations.migrate(legacy) == migrations.LATEST_VERSION
+    assert legacy.execute("SELECT title FROM books").fetchone()[0] == "Old"
+    assert "idx_borrow_records_active" in _index_names(legacy)
+    # running again is a no-op
+    assert migrations.migrate(legacy) == migrations.LATEST_VERSION
+    legacy.close()
+
+def test_failed_migration_keeps_previous_version(tmp_path, monkeypatch):
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS",
+                        migrations.MIGRATIONS + [(migrations.LATEST_VERSION + 1, "broken", broken)])
+    conn = sqlite3.connect(str(tmp_path / "broken.db"))
+    with pytest.raises(RuntimeError):
+        migrations.migrate(conn)
+    assert migrations.get_schema_version(conn) == migrations.LATEST_VERSION
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    conn.close()
+
+@pytest.mark.parametrize("helper, args", [
+    (db.get_patron_borrowed_books, ("123456",)),
+    (db.update_borrow_record_return_date, ("123456", 1, datetime.now())),
+    (db.return_book_transaction, ("123456", 1, date.today())),
+    (db.borrow_book_transaction, ("123456", 1, datetime.now(), datetime.now() + timedelta(days=14), 5)),
+    (db.get_late_fee_totals, (date.today(),)),
+    (db.get_open_loan_fees, (date.today(), "123456", 1)),
+    (db.borrow_books_transaction, ("123456", [1, 1], datetime.now(), datetime.now() + timedelta(days=14), 5)),
+    (db.return_books_transaction, ("123456", [1], date.today())),
+])
+def test_hot_queries_use_an_index(temp_db, helper, args):
+    """EXPLAIN QUERY PLAN must never show a full scan of borrow_records"""
+    db.insert_book("Plan", "Author", "9782222222222", 1, 1)
+    statements = _trace_statements(helper, *args)
+    assert statements, "helper issued no borrow_records query"
+
+    conn = db.get_db_connection()
+    for sql in statements:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        assert not any(step.startswith("SCAN") and "INDEX" not in step
+                       for step in plan), f"full scan in plan for {sql!r}: {plan}"
+
+def test_priced_overdue_ledger_is_converted_to_tiers(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / "priced.db"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:11])
+    migrations.migrate(conn)
+    conn.execute("UPDATE overdue_ledger SET as_of = '2025-03-01' WHERE id = 1")
+    for days in (3, 10, 25):   # priced by the version 8 triggers
+        due = datetime(2025, 3, 1, 15) - timedelta(days=days)
+        conn.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) "
+                     "VALUES ('111111', 1, ?, ?)", ((due - timedelta(days=14)).isoformat(), due.isoformat()))
+    conn.commit()
+    monkeypatch.undo()
+
+    assert migrations.migrate(conn) == migrations.LATEST_VERSION
+    assert conn.execute("SELECT tier FROM overdue_loans ORDER BY loan_id").fetchall() == [(0,), (1,), (2,)]
+    conn.close()
+
+def test_colliding_legacy_isbns_are_set_aside_not_fatal(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    migrations._create_base_tables(legacy)
+    legacy.executemany("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                       "VALUES (?, 'Author', ?, 1, 1)",
+                       [("Gatsby", "9780743273565"), ("Gatsby again", "978-0-7432-7356-5"),
+                        ("Other", "9780451524935")])
+    legacy.commit()
+
+    assert migrations.migrate(legacy) == migrations.LATEST_VERSION
+    assert legacy.execute("SELECT id, isbn_norm FROM books ORDER BY id").fetchall() == [
+        (1, "9780743273565"), (2, None), (3, "9780451524935")]
+    legacy.close()
+
+    monkeypatch.setattr(db, "_pool", db.ConnectionPool())
+    monkeypatch.setattr(db, "DATABASE", path)
+    assert db.get_isbn_conflicts() == [{"book_id": 2, "isbn": "978-0-7432-7356-5",
+                                        "isbn_norm": "9780743273565", "kept_book_id": 1}]
+    assert db.get_book_by_isbn("978-0-7432-7356-5")["id"] == 1
+    db._pool.close_all()
@@ -0,0 +1,101 @@
+# tests/test_overdue_ledger.py
+from datetime import date, datetime, time, timedelta
+
+import pytest
+import database as db
+import services.library_service as svc
+from services.overdue_scheduler import OverdueScheduler
+
+TODAY = date(2025, 3, 1)
+
+
+@pytest.fixture
+def loans(temp_db):
+    db.insert_books_batch([(f"Book {n}", "Author", f"97822222{n:05d}", 10) for n in range(45)])
+    return temp_db
+
+def lend(patron_id, book_id, due_day):
+    due = datetime.combine(due_day, time(15, 30))
+    db.insert_borrow_record(patron_id, book_id, due - timedelta(days=14), due)
+
+def ledger(as_of):
+    patrons = [r[0] for r in db.get_db_connection().execute(
+        "SELECT DISTINCT patron_id FROM borrow_records")]
+    return sorted((l["loan_id"], l["patron_id"], l["book_id"], l["days_overdue"], l["fee_cents"])
+                  for patron_id in patrons for l in db.get_ledger_fees(as_of, patron_id))
+
+def live(as_of):
+    conn = db.get_db_connection()
+    ids = {(r["patron_id"], r["book_id"]): r["id"] for r in conn.execute(
+        "SELECT id, patron_id, book_id FROM borrow_records WHERE return_date IS NULL")}
+    return sorted((ids[(l["patron_id"], l["book_id"])], l["patron_id"], l["book_id"],
+                   l["days_overdue"], l["fee_cents"])
+                  for l in db.get_open_loan_fees(as_of) if l["days_overdue"] > 0)
+
+def test_incremental_refresh_matches_full_pricing(loans):
+    for n in range(40):
+        lend(f"{n:06d}", n + 1, TODAY - timedelta(days=n - 5))
+
+    first = db.refresh_overdue_ledger(TODAY)
+    assert first["mode"] == "full"
+    assert ledger(TODAY) == live(TODAY)
+
+    day = TODAY
+    promoted = []
+    for step in (1, 1, 3, 20):
+        day += timedelta(days=step)
+        result = db.refresh_overdue_ledger(day)
+        assert result["mode"] == "incremental"
+        assert ledger(day) == live(day)
+        promoted.append(result["promoted"])
+    # a day on, only the loans reaching 8 days overdue or the cap are written
+    assert promoted[:2] == [2, 2]
+
+def test_refresh_to_the_same_day_does_nothing(loans):
+    lend("111111", 1, TODAY - timedelta(days=3))
+    db.refresh_overdue_ledger(TODAY)
+    assert db.refresh_overdue_ledger(TODAY)["mode"] == "unchanged"
+
+def test_writes_between_refreshes_keep_the_ledger_exact(loans):
+    db.refresh_overdue_ledger(TODAY)
+    lend("111111", 1, TODAY - timedelta(days=9))   # recorded late: priced by trigger
+    lend("111111", 2, TODAY + timedelta(days=5))   # not overdue
+    assert db.get_ledger_fees(TODAY, "111111") == [
+        {"loan_id": 1, "patron_id": "111111", "book_id": 1,
+         "due_day": (TODAY - timedelta(days=9)).isoformat(), "days_overdue": 9, "fee_cents": 550}]
+
+    db.update_borrow_record_return_date("111111", 1, datetime.now())
+    assert db.get_ledger_fees(TODAY, "111111") == []
+
+def test_stale_ledger_is_not_used(loans):
+    lend("111111", 1, TODAY - timedelta(days=2))
+    assert db.get_ledger_fees(TODAY, "111111") is None
+    db.refresh_overdue_ledger(TODAY - timedelta(days=1))
+    assert db.get_ledger_fees(TODAY, "111111") is None
+
+def test_fee_lookup_reads_the_ledger(loans, monkeypatch):
+    monkeypatch.setattr(svc, "_today", lambda: TODAY)
+    lend("111111", 3, TODAY - timedelta(days=10))
+    db.refresh_overdue_ledger(TODAY)
+
+    def no_pricing(*args, **kwargs):
+        raise AssertionError("fee recomputed instead of read from the ledger")
+    monkeypatch.setattr(svc, "get_open_loan_fees", no_pricing)
+
+    assert svc.calculate_late_fee_for_book("111111", 3) == {"fee_amount": 6.5, "days_overdue": 10}
+    assert svc.get_patron_status_report("111111")["total_late_fees"] == "6.50"
+
+def test_scheduler_refreshes_as_of_its_clock(loans):
+    lend("111111", 1, TODAY - timedelta(days=4))
+    scheduler = OverdueScheduler(interval=60, today=lambda: TODAY)
+    assert scheduler.run_once()["added"] == 1
+    assert scheduler.run_once()["mode"] == "unchanged"
+    stats = scheduler.stats()
+    assert (stats["runs"], stats["failures"], stats["running"]) == (2, 0, False)
+
+def test_scheduler_thread_starts_once_and_stops(loans):
+    scheduler = OverdueScheduler(interval=60, today=lambda: TODAY)
+    assert scheduler.start() is True
+    assert scheduler.start() is False
+    scheduler.stop(timeout=5)
+    assert not scheduler.running
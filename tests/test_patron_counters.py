@@ -0,0 +1,92 @@
+# tests/test_patron_counters.py
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pytest
+import database as db
+import migrations
+import manage
+
+
+@pytest.fixture
+def shelf(temp_db):
+    db.insert_book("Counter Book", "Author", "9783333333333", 10, 10)
+    return db.get_book_by_isbn("9783333333333")["id"]
+
+def _open_loans(patron_id):
+    return db.get_db_connection().execute(
+        "SELECT COUNT(*) FROM borrow_records WHERE patron_id = ? AND return_date IS NULL",
+        (patron_id,)).fetchone()[0]
+
+def _borrow(patron_id, book_id):
+    now = datetime.now()
+    return db.borrow_book_transaction(patron_id, book_id, now, now + timedelta(days=14), 5)
+
+def test_borrow_and_return_keep_the_counter_in_step(shelf):
+    for _ in range(3):
+        assert _borrow("444444", shelf) == "ok"
+    assert db.return_book_transaction("444444", shelf, date.today()) == "ok"
+    db.insert_borrow_record("444444", shelf, datetime.now(), datetime.now())
+    db.update_borrow_record_return_date("444444", shelf, datetime.now())  # closes all three
+    assert db.get_patron_active_loans("444444") == _open_loans("444444") == 0
+
+def test_limit_check_does_not_count_loan_history(shelf):
+    for _ in range(5):
+        assert _borrow("444444", shelf) == "ok"
+    statements = []
+    db.get_db_connection().set_trace_callback(statements.append)
+    try:
+        assert _borrow("444444", shelf) == "limit"
+    finally:
+        db.get_db_connection().set_trace_callback(None)
+    assert not any("COUNT(" in sql for sql in statements)
+    assert db.get_patron_active_loans("444444") == 5
+    assert db.get_book_by_id(shelf)["available_copies"] == 5
+
+def test_unavailable_book_does_not_use_up_a_slot(temp_db):
+    db.insert_book("Gone", "Author", "9783333333340", 1, 0)
+    assert _borrow("444444", db.get_book_by_isbn("9783333333340")["id"]) == "unavailable"
+    assert db.get_patron_active_loans("444444") == 0
+
+def test_reconcile_reports_and_repairs_drift(shelf):
+    assert _borrow("444444", shelf) == "ok"
+    conn = db.get_db_connection()
+    # written behind the module's back
+    conn.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) "
+                 "VALUES ('555555', ?, '2025-01-01', '2025-01-15')", (shelf,))
+    conn.execute("UPDATE patrons SET active_loans = 4 WHERE patron_id = '444444'")
+    conn.commit()
+
+    dry = db.reconcile_patron_loan_counts(fix=False)
+    assert dry["drifted"] == 2 and dry["fixed"] == 0
+    assert dry["drift"] == [{"patron_id": "444444", "recorded": 4, "actual": 1},
+                            {"patron_id": "555555", "recorded": 0, "actual": 1}]
+    assert db.get_patron_active_loans("444444") == 4
+
+    assert db.reconcile_patron_loan_counts()["fixed"] == 2
+    assert db.get_patron_active_loans("444444") == db.get_patron_active_loans("555555") == 1
+    assert db.reconcile_patron_loan_counts()["drifted"] == 0
+
+def test_migration_backfills_counters(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    for target, _description, apply in migrations.MIGRATIONS[:8]:
+        apply(conn)
+    conn.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                 "VALUES ('Old', 'A', '9783333333357', 3, 1)")
+    conn.executemany("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) "
+                     "VALUES (?, 1, '2025-01-01', '2025-01-15', ?)",
+                     [("666666", None), ("666666", None), ("777777", "2025-01-10")])
+    conn.execute("PRAGMA user_version = 8")
+    conn.commit()
+    migrations.migrate(conn)
+    assert conn.execute("SELECT patron_id, active_loans FROM patrons").fetchall() == [("666666", 2)]
+    conn.close()
+
+def test_reconcile_command(shelf, capsys):
+    assert _borrow("444444", shelf) == "ok"
+    db.get_db_connection().execute("UPDATE patrons SET active_loans = 3 WHERE patron_id = '444444'")
+    db.get_db_connection().commit()
+    assert manage.main(["reconcile-loans", "--dry-run"]) == 1
+    assert manage.main(["reconcile-loans"]) == 0
+    assert manage.main(["reconcile-loans", "--dry-run"]) == 0
+    assert "444444: recorded 3, actual 1" in capsys.readouterr().err
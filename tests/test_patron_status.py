@@ -3,6 +3,15 @@ import pytest
 import services.library_service as svc
 from services.payment_service import PaymentGateway
 
+
+@pytest.fixture(autouse=True)
+def patron_with_loan(temp_db):
+    """Patron 123456 has one book out."""
+    import database as db
+    db.insert_books_batch([("Sample Book", "Sample Author", "9780000000002", 2)])
+    ok, _msg = svc.borrow_book_by_patron("123456", 1)
+    assert ok
+
 def test_patron_status_basic_structure():
     """Report should be a dict with required top-level fields"""
     report = svc.get_patron_status_report("123456")
@@ -47,3 +56,124 @@ def test_patron_status_history_entries_have_dates_and_actions():
     for entry in history:
         assert "action" in entry  # e.g., "borrow" or "return"
         assert "timestamp" in entry
+
+def test_patron_status_prices_each_overdue_loan(monkeypatch):
+    """Current loans carry their own due date and fee; returns only show in history"""
+    import database as db
+    from datetime import date, datetime, timedelta
+    today = date(2025, 3, 1)
+    monkeypatch.setattr(svc, "_today", lambda: today)
+    db.insert_books_batch([("Dune", "Frank Herbert", "9780000000019", 1),
+                           ("Emma", "Jane Austen", "9780000000026", 1)])
+    due = datetime(2025, 2, 20, 12, 0)   # 9 days overdue on 2025-03-01
+    db.insert_borrow_record("123456", 2, due - timedelta(days=14), due)
+    db.insert_borrow_record("123456", 3, due - timedelta(days=30), due - timedelta(days=16))
+    db.update_borrow_record_return_date("123456", 3, datetime(2025, 2, 10))
+
+    report = svc.get_patron_status_report("123456")
+    dune = next(it for it in report["current_borrowed"] if it["title"] == "Dune")
+    assert dune["due_date"] == "2025-02-20"
+    assert (dune["days_overdue"], dune["late_fee"]) == (9, 5.5)
+    assert report["total_late_fees"] == "5.50"
+    assert report["borrowed_count"] == 2
+    assert ("return", "Emma") in [(h["action"], h["title"]) for h in report["history"]]
+    assert report["history_total"] == 4
+
+def test_patron_status_pages_history_newest_first():
+    import database as db
+    from datetime import datetime
+    for n in range(3):
+        db.insert_borrow_record("123456", 1, datetime(2024, 1, 1 + n), datetime(2024, 1, 15 + n))
+    first = svc.get_patron_status_report("123456", history_limit=2)
+    second = svc.get_patron_status_report("123456", history_limit=2, history_offset=2)
+    stamps = [h["timestamp"] for h in first["history"] + second["history"]]
+    assert stamps == sorted(stamps, reverse=True)
+    assert len(stamps) == first["history_total"] == 4
+
+def test_patron_status_is_one_query_and_cached_until_a_borrow():
+    import database as db
+    statements = []
+    db.get_db_connection().set_trace_callback(statements.append)
+    try:
+        svc.get_patron_status_report("123456")
+        assert len(statements) == 1
+        svc.get_patron_status_report("123456")
+        assert len(statements) == 1
+        assert svc.borrow_book_by_patron("123456", 1)[0]
+        assert svc.get_patron_status_report("123456")["borrowed_count"] == 2
+    finally:
+        db.get_db_connection().set_trace_callback(None)
+
+def test_patron_status_is_not_cached_when_a_borrow_overlaps_the_query(monkeypatch):
+    real_report = svc.get_patron_report
+    def report_then_borrow(*args):
+        data = real_report(*args)
+        assert svc.borrow_book_by_patron("123456", 1)[0]
+        return data
+    monkeypatch.setattr(svc, "get_patron_report", report_then_borrow)
+    assert svc.get_patron_status_report("123456")["borrowed_count"] == 1
+    monkeypatch.setattr(svc, "get_patron_report", real_report)
+    assert svc.get_patron_status_report("123456")["borrowed_count"] == 2
+
+def test_patron_status_callers_get_their_own_copy():
+    report = svc.get_patron_status_report("123456")
+    report["current_borrowed"][0]["title"] = "changed"
+    report["history"].clear()
+    cached = svc.get_patron_status_report("123456")
+    assert cached["current_borrowed"][0]["title"] == "Sample Book"
+    assert cached["history"]
+    cached["borrowed_count"] = 99
+    assert svc.get_patron_status_report("123456")["borrowed_count"] == 1
+
+def test_patron_status_rejects_bad_patron_ids():
+    with pytest.raises(ValueError):
+        svc.get_patron_status_report("12ab56")
+
+def test_patron_status_endpoint():
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        ok = client.get("/api/patron/123456/status?history_limit=1")
+        bad = client.get("/api/patron/123/status")
+        bad_limit = client.get("/api/patron/123456/status?history_limit=x")
+    assert ok.status_code == 200
+    body = ok.get_json()
+    assert body["borrowed_count"] == 1 and len(body["history"]) == 1
+    assert bad.status_code == 400 and bad_limit.status_code == 400
+
+def test_patron_status_history_orders_same_day_returns_after_their_borrow():
+    import database as db
+    from datetime import datetime
+    # a legacy date-only return, and one made now with a full timestamp
+    db.insert_borrow_record("123456", 1, datetime(2025, 2, 10, 15, 30), datetime(2025, 2, 24))
+    db.get_db_connection().execute(
+        "UPDATE borrow_records SET return_date = '2025-02-10' WHERE borrow_date LIKE '2025-02-10%'")
+    db.get_db_connection().commit()
+    assert svc.return_book_by_patron("123456", 1)[0]
+
+    history = svc.get_patron_status_report("123456")["history"]
+    assert [h["action"] for h in history] == ["return", "borrow", "return", "borrow"]
+    assert history[2]["timestamp"] == history[3]["timestamp"] == "2025-02-10T15:30:00"
+    assert all(len(h["timestamp"]) == 19 and h["timestamp"][10] == "T" for h in history)
+
+def test_patron_status_reads_fees_from_a_current_ledger(monkeypatch):
+    import database as db
+    from datetime import date, datetime
+    today = date(2025, 3, 1)
+    monkeypatch.setattr(svc, "_today", lambda: today)
+    db.insert_books_batch([("Dune", "Frank Herbert", "9780000000019", 1)])
+    db.insert_borrow_record("123456", 2, datetime(2025, 2, 6), datetime(2025, 2, 20))
+    db.refresh_overdue_ledger(today)
+    # only a report that reads the ledger can see this price
+    db.get_db_connection().execute("UPDATE overdue_loans SET tier = 2")
+    db.get_db_connection().commit()
+    dune = next(it for it in svc.get_patron_status_report("123456")["current_borrowed"]
+                if it["title"] == "Dune")
+    assert (dune["days_overdue"], dune["late_fee"]) == (9, 15.0)
+
+    svc._patron_report_cache.clear()
+    monkeypatch.setattr(svc, "_today", lambda: date(2025, 3, 2))   # ledger is now stale
+    dune = next(it for it in svc.get_patron_status_report("123456")["current_borrowed"]
+                if it["title"] == "Dune")
+    assert (dune["days_overdue"], dune["late_fee"]) == (10, 6.5)
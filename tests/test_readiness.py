@@ -0,0 +1,109 @@
+# tests/test_readiness.py
+import sqlite3
+
+import pytest
+import database as db
+import services.library_service as svc
+from app import create_app
+from migrations import get_schema_version, migrate
+
+
+@pytest.fixture
+def fresh_db(monkeypatch, tmp_path):
+    """A database file this process has never initialized; counts migrations."""
+    pool = db.ConnectionPool()
+    monkeypatch.setattr(db, "_pool", pool)
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "library.db"))
+    runs = []
+    real_migrate = db.migrate
+    def counting_migrate(conn):
+        runs.append(conn)
+        return real_migrate(conn)
+    monkeypatch.setattr(db, "migrate", counting_migrate)
+    yield runs
+    pool.close_all()
+
+@pytest.fixture
+def broken_db(fresh_db, monkeypatch):
+    """Every migration attempt fails as if the disk were unreadable."""
+    def broken(conn):
+        fresh_db.append(conn)
+        raise sqlite3.OperationalError("disk I/O error")
+    monkeypatch.setattr(db, "migrate", broken)
+    return fresh_db
+
+def test_initialization_runs_once_per_process(fresh_db):
+    assert not db.is_database_ready()
+    assert svc.add_book_to_catalog("First", "Author", "9786666666661", 1)[0]
+    assert svc.add_book_to_catalog("Second", "Author", "9786666666678", 1)[0]
+    assert db.ensure_database_ready()
+    assert len(fresh_db) == 1
+    state = db.get_readiness()
+    assert state["ready"] and state["schema_version"] == get_schema_version(db.get_db_connection())
+
+def test_add_book_is_a_single_insert(fresh_db):
+    assert db.ensure_database_ready()
+    statements = []
+    db.get_db_connection().set_trace_callback(statements.append)
+    try:
+        assert svc.add_book_to_catalog("Lean", "Author", "9786666666685", 2)[0]
+    finally:
+        db.get_db_connection().set_trace_callback(None)
+    # triggers re-report the outer statement; FTS5 adds its own bookkeeping
+    issued = {s.strip() for s in statements
+              if not s.startswith("--") and "books_fts" not in s and "data_version" not in s}
+    assert {s.split()[0] for s in issued} == {"BEGIN", "INSERT", "COMMIT"}
+    assert len(issued) == 3
+
+def test_failed_initialization_is_not_retried_on_every_call(broken_db, monkeypatch):
+    assert not db.ensure_database_ready()
+    assert not db.ensure_database_ready()
+    assert len(broken_db) == 1
+    assert "disk I/O error" in db.get_readiness()["error"]
+
+    # degraded mode still accepts the write
+    monkeypatch.setattr(svc, "replay_pending_writes", lambda: None)
+    assert svc.add_book_to_catalog("Offline", "Author", "9786666666692", 1)[0]
+
+    # once the retry interval has passed the next call tries again
+    db._readiness[db.DATABASE].last_attempt -= db.READINESS_RETRY_SECONDS
+    monkeypatch.setattr(db, "migrate", lambda conn: 0)
+    assert db.ensure_database_ready()
+    assert db.get_readiness()["error"] is None
+
+def test_health_endpoints(broken_db):
+    client = create_app().test_client()
+    assert client.get("/health").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "unavailable"
+
+def test_health_ready_retries_a_failed_initialization(broken_db, monkeypatch):
+    client = create_app().test_client()
+    assert client.get("/health/ready").status_code == 503
+    assert len(broken_db) == 1   # still backing off: the probe did not retry yet
+
+    db._readiness[db.DATABASE].last_attempt -= db.READINESS_RETRY_SECONDS
+    monkeypatch.setattr(db, "migrate", lambda conn: 0)
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.get_json()["attempts"] == 2
+
+def test_health_ready_replays_writes_once_the_database_is_back(broken_db, monkeypatch):
+    client = create_app().test_client()
+    assert svc.add_book_to_catalog("Offline", "Author", "9786666666692", 1)[0]
+    assert client.get("/health/ready").get_json()["pending_writes"] == 1
+
+    db._readiness[db.DATABASE].last_attempt -= db.READINESS_RETRY_SECONDS
+    monkeypatch.setattr(db, "migrate", migrate)
+    body = client.get("/health/ready").get_json()
+    assert body["ready"] and body["pending_writes"] == 0
+    assert db.get_book_by_isbn("9786666666692")["title"] == "Offline"
+
+def test_health_ready_once_initialized(fresh_db):
+    client = create_app().test_client()
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["ready"] and body["status"] == "ready" and body["pending_writes"] == 0
+    assert len(fresh_db) == 1
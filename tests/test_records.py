@@ -0,0 +1,55 @@
+# tests/test_records.py
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+import database as db
+from app import create_app
+from records import Book, Loan, PricedLoan
+
+
+@pytest.fixture
+def loaned(temp_db):
+    db.insert_books_batch([("Dune", "Frank Herbert", "9780441172719", 2)])
+    now = datetime.now()
+    db.insert_borrow_record("123456", 1, now - timedelta(days=20), now - timedelta(days=6))
+    return 1
+
+def test_books_are_slotted_read_only_mappings(loaned):
+    book = db.get_book_by_id(loaned)
+    assert isinstance(book, Book) and not hasattr(book, "__dict__")
+    assert book.title == book["title"] == book.get("title") == "Dune"
+    assert "isbn" in book and "nope" not in book and book.get("nope") is None
+    assert dict(book) == book.as_dict() == book
+    assert list(book) == list(Book._fields)
+    with pytest.raises(KeyError):
+        book["nope"]
+    with pytest.raises(TypeError):
+        book["title"] = "Changed"
+    assert db.get_all_books() == [book]
+
+def test_book_cache_hands_out_the_same_record(loaned):
+    assert db.get_book_by_id(loaned) is db.get_book_by_id(loaned)
+
+def test_loan_dates_are_decoded_on_first_access(loaned):
+    loan, = db.get_patron_borrowed_books("123456")
+    assert isinstance(loan, Loan)
+    assert loan._due_date is None and loan._borrow_date is None
+    assert loan["is_overdue"] is True
+    assert isinstance(loan._due_date, datetime) and loan._borrow_date is None
+    assert loan.due_date - loan.borrow_date == timedelta(days=14)
+    assert set(loan) == {"book_id", "title", "author", "borrow_date", "due_date", "is_overdue"}
+
+def test_patron_report_prices_loans_as_records(loaned):
+    loan, = db.get_patron_report("123456", date.today(), 10)["loans"]
+    assert isinstance(loan, PricedLoan) and not hasattr(loan, "__dict__")
+    assert loan._due_date is None
+    assert loan.days_overdue == 6 and loan.fee_cents == 300
+    assert loan.due_date - loan.borrow_date == timedelta(days=14)
+    assert list(loan) == ["book_id", "title", "author", "borrow_date", "due_date", "days_overdue", "fee_cents"]
+
+def test_jsonify_encodes_records_as_objects(loaned):
+    app = create_app()
+    with app.app_context():
+        book = db.get_book_by_id(loaned)
+        assert json.loads(app.json.dumps({"books": [book]})) == {"books": [book.as_dict()]}
@@ -6,9 +6,8 @@ from services.payment_service import PaymentGateway
 def test_return_success(monkeypatch):
     """Happy path: book is returned, availability updated, return date recorded"""
     monkeypatch.setattr(svc, "get_book_by_id", lambda book_id: {"id": book_id, "title": "Clean Code", "available_copies": 0})
-    # Pretend there is a valid borrow record and DB ops succeed
-    monkeypatch.setattr(svc, "update_borrow_record_return_date", lambda patron_id, book_id, return_date: True)
-    monkeypatch.setattr(svc, "update_book_availability", lambda book_id, delta: True)
+    # Pretend there is a valid borrow record and the transaction commits
+    monkeypatch.setattr(svc, "return_book_transaction", lambda patron_id, book_id, return_date: "ok")
 
     success, message = svc.return_book_by_patron("123456", 1)
     assert success is True
@@ -30,20 +29,21 @@ def test_return_book_not_found(monkeypatch):
 def test_return_not_borrowed_by_patron(monkeypatch):
     """If the patron never borrowed the book, it should fail with a clear message"""
     # Simulate: DB says no matching active borrow record
-    def fake_update_return(patron_id, book_id, return_date):
-        return False
+    def fake_return(patron_id, book_id, return_date):
+        return "not_borrowed"
     monkeypatch.setattr(svc, "get_book_by_id", lambda book_id: {"id": book_id, "title": "Demo", "available_copies": 0})
-    monkeypatch.setattr(svc, "update_borrow_record_return_date", fake_update_return)
+    monkeypatch.setattr(svc, "return_book_transaction", fake_return)
 
     success, message = svc.return_book_by_patron("123456", 1)
     assert success is False
     assert "not borrowed" in message.lower() or "no record" in message.lower()
 
 def test_return_db_failure_on_availability(monkeypatch):
-    """DB failure when increasing availability should be reported"""
+    """DB failure inside the return transaction should be reported"""
+    def boom(patron_id, book_id, return_date):
+        raise Exception("disk I/O error")
     monkeypatch.setattr(svc, "get_book_by_id", lambda book_id: {"id": book_id, "title": "Demo", "available_copies": 0})
-    monkeypatch.setattr(svc, "update_borrow_record_return_date", lambda patron_id, book_id, return_date: True)
-    monkeypatch.setattr(svc, "update_book_availability", lambda book_id, delta: False)
+    monkeypatch.setattr(svc, "return_book_transaction", boom)
 
     success, message = svc.return_book_by_patron("123456", 1)
     assert success is False
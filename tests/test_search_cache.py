@@ -0,0 +1,72 @@
+# tests/test_search_cache.py
+import pytest
+import cache
+import database as db
+import services.library_service as svc
+from cache import LRUCache
+from services import catalog_snapshot
+
+
+@pytest.fixture
+def catalog(temp_db, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "_manager", catalog_snapshot.SnapshotManager())
+    db.add_sample_data()
+    return temp_db
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(10, ttl=5)
+    lru.put("a", 1)
+    now[0] += 4
+    assert lru.get("a") == 1
+    now[0] += 2
+    assert lru.get("a") is None
+    assert lru.stats()["expirations"] == 1
+
+def test_byte_bound_evicts_least_recently_used():
+    lru = LRUCache(10, max_bytes=10, sizeof=len)
+    lru.put("a", "xxxx")
+    lru.put("b", "xxxx")
+    lru.get("a")
+    lru.put("c", "xxxx")
+    assert "b" not in lru and "a" in lru and "c" in lru
+    assert lru.bytes == 8
+    # never fits: not stored, and does not flush the rest
+    lru.put("d", "x" * 11)
+    assert "d" not in lru and len(lru) == 2
+    assert lru.largest(1) == [("a", 4)]
+
+def test_repeated_searches_hit_the_cache(catalog):
+    hits = svc.get_search_cache_stats()["hits"]
+    first = svc.search_books_in_catalog("gatsby", "title")
+    assert [b["title"] for b in first] == ["The Great Gatsby"]
+    with pytest.raises(TypeError):
+        first[0]["title"] = "Mutated"
+    again = svc.search_books_in_catalog("  GATSBY ", "title")
+    assert again[0]["title"] == "The Great Gatsby"
+    stats = svc.get_search_cache_stats()
+    assert stats["hits"] == hits + 1 and stats["size"] == 1
+
+def test_catalog_writes_invalidate_through_the_version(catalog):
+    assert len(svc.search_books_in_catalog("the", "title")) == 1
+    db.insert_book("The Hobbit", "J.R.R. Tolkien", "9780000000001", 1, 1)
+    assert len(svc.search_books_in_catalog("the", "title")) == 2
+
+    gatsby = svc.search_books_in_catalog("9780743273565", "isbn")[0]
+    db.update_book_availability(gatsby["id"], -1)
+    assert svc.search_books_in_catalog("978-0-7432-7356-5", "isbn")[0]["available_copies"] == 2
+
+def test_admin_endpoint_reports_largest_entries(catalog, monkeypatch):
+    from app import create_app
+    monkeypatch.setattr(svc, "_search_cache", LRUCache(16, max_bytes=1 << 20, sizeof=svc._results_size))
+    svc.search_books_in_catalog("e", "title")
+    svc.search_books_in_catalog("1984", "title")
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        client.get("/api/search?q=1984")
+        body = client.get("/api/admin/search_cache?largest=1").get_json()
+    assert body["hits"] == 1
+    assert body["hit_ratio"] == round(1 / 3, 4)
+    assert [(e["term"], e["type"]) for e in body["largest"]] == [("e", "title")]
@@ -0,0 +1,57 @@
+# tests/test_search_fulltext.py
+import pytest
+import database as db
+import services.library_service as svc
+
+BOOKS = [
+    ("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565"),
+    ("Great Expectations", "Charles Dickens", "9780141439563"),
+    ("100% Pure \"Quoted\" Title", "A_n Other", "9780000000101"),
+    ("To Kill a Mockingbird", "Harper Lee", "9780061120084"),
+    ("Ulysses", "James Joyce", "9780199535675"),
+]
+
+@pytest.fixture
+def catalog(temp_db):
+    for title, author, isbn in BOOKS:
+        db.insert_book(title, author, isbn, 1, 1)
+    return temp_db
+
+def _linear(term, field):
+    """The original R6 contract: case-insensitive `key in hay` over every row."""
+    return {b["isbn"] for b in db.get_all_books() if term.lower() in b[field].lower()}
+
+@pytest.mark.parametrize("term, field", [
+    ("great", "title"), ("GREAT", "title"), ("reat exp", "title"), ("ss", "title"),
+    ("e", "author"), ("dickens", "author"), ("%", "title"), ("_n", "author"),
+    ('"quoted"', "title"), ("nothing here", "title"), ("ly", "title"),
+])
+def test_fulltext_matches_linear_scan(catalog, term, field):
+    found = {b["isbn"] for b in db.search_books_fulltext(term, field)}
+    assert found == _linear(term, field)
+
+def test_fulltext_ranks_better_matches_first(catalog):
+    db.insert_book("Great Great Great", "Someone", "9780000000202", 1, 1)
+    results = db.search_books_fulltext("great", "title")
+    assert results[0]["title"] == "Great Great Great"
+
+def test_triggers_keep_index_in_sync(catalog):
+    conn = db.get_db_connection()
+    conn.execute("UPDATE books SET title = 'Odyssey' WHERE isbn = '9780199535675'")
+    conn.commit()
+    assert db.search_books_fulltext("ulysses", "title") == []
+    assert [b["isbn"] for b in db.search_books_fulltext("odyss", "title")] == ["9780199535675"]
+
+    conn.execute("DELETE FROM books WHERE isbn = '9780199535675'")
+    conn.commit()
+    assert db.search_books_fulltext("odyss", "title") == []
+
+def test_service_falls_back_to_scan_without_fts(catalog):
+    conn = db.get_db_connection()
+    for trigger in ("books_fts_insert", "books_fts_delete", "books_fts_update"):
+        conn.execute(f"DROP TRIGGER {trigger}")
+    conn.execute("DROP TABLE books_fts")
+    conn.commit()
+
+    results = svc.search_books_in_catalog("expectations", "title")
+    assert [b["isbn"] for b in results] == ["9780141439563"]
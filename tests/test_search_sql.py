@@ -0,0 +1,61 @@
+# tests/test_search_sql.py
+import sqlite3
+
+import pytest
+import database as db
+import services.library_service as svc
+
+
+@pytest.fixture
+def catalog(temp_db):
+    db.insert_books_batch([
+        ("Cheaper by the Dozen", "Frank Gilbreth", "9780060084608", 1),
+        ("100% Pure Python", "Ana Lee", "9781111111116", 1),
+        ("Snake_Case Style", "ana lee", "9781111111123", 1),
+        ("Dozens of Stories", "Frank O'Connor", "9781111111130", 1),
+    ] + [(f"Filler {n:02d}", "Nobody", f"97822222{n:05d}", 1) for n in range(20)])
+    return temp_db
+
+def test_title_and_author_match_case_insensitively(catalog):
+    rows, total = db.search_books("DOZEN", "title")
+    assert [r["title"] for r in rows] == ["Cheaper by the Dozen", "Dozens of Stories"]
+    assert total == 2
+    assert db.search_books("ANA LEE", "author")[1] == 2
+
+def test_wildcards_in_the_term_are_literal(catalog):
+    assert [r["title"] for r in db.search_books("100%", "title")[0]] == ["100% Pure Python"]
+    assert [r["title"] for r in db.search_books("e_c", "title")[0]] == ["Snake_Case Style"]
+    assert db.search_books("%", "author") == ([], 0)
+
+def test_isbn_is_an_exact_probe(catalog):
+    rows, total = db.search_books("978-0-06-008460-8", "isbn")
+    assert total == 1 and rows[0]["title"] == "Cheaper by the Dozen"
+    assert db.search_books("97800600846", "isbn") == ([], 0)
+    plan = db.get_db_connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM books WHERE isbn_norm = ? OR isbn = ?", ("x", "x")
+    ).fetchall()
+    assert not any(row[3].startswith("SCAN books") for row in plan)
+
+def test_limit_and_offset_page_in_title_order(catalog):
+    rows, total = db.search_books("filler", "title", limit=5, offset=10)
+    assert total == 20
+    assert [r["title"] for r in rows] == [f"Filler {n:02d}" for n in range(10, 15)]
+
+def test_service_uses_sql_when_no_snapshot_or_fulltext(catalog, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise sqlite3.OperationalError("unavailable")
+
+    def full_load():
+        raise AssertionError("search must not load the whole catalog")
+
+    monkeypatch.setattr(svc, "get_catalog_snapshot", unavailable)
+    monkeypatch.setattr(svc, "search_books_fulltext", unavailable)
+    monkeypatch.setattr(db, "get_all_books", full_load)
+    statements = []
+    db.get_db_connection().set_trace_callback(statements.append)
+    try:
+        assert [b["author"] for b in svc.search_books_in_catalog("ana", "author")] == ["Ana Lee", "ana lee"]
+    finally:
+        db.get_db_connection().set_trace_callback(None)
+    reads = [s for s in statements if "FROM books" in s]
+    assert reads and all("WHERE" in s for s in reads)
@@ -0,0 +1,101 @@
+# tests/test_suggest.py
+from datetime import datetime, timedelta
+
+import pytest
+import database as db
+import services.library_service as svc
+from prefix import PrefixIndex
+from services import catalog_snapshot
+
+
+@pytest.fixture
+def catalog(temp_db, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "_manager", catalog_snapshot.SnapshotManager())
+    db.insert_books_batch([
+        ("The Hobbit", "J.R.R. Tolkien", "9780000000001", 3),
+        ("The Hunger Games", "Suzanne Collins", "9780000000002", 3),
+        ("The Haunting of Hill House", "Shirley Jackson", "9780000000003", 3),
+        ("Hamlet", "William Shakespeare", "9780000000004", 3),
+        ("The Silmarillion", "J.R.R. Tolkien", "9780000000005", 3),
+    ])
+    return temp_db
+
+def borrow(isbn, times):
+    book = db.get_book_by_isbn(isbn)
+    for _ in range(times):
+        db.insert_borrow_record("123456", book["id"], datetime.now(), datetime.now() + timedelta(days=14))
+
+def test_prefix_index_ranks_by_weight_then_alphabetically():
+    index = PrefixIndex([("Apple", 1), ("apricot", 5), ("Avocado", 5), ("banana", 9), ("apple", 2)])
+    assert index.complete("a", 10) == [("apricot", 5), ("Avocado", 5), ("Apple", 3)]
+    assert index.complete("A", 2) == [("apricot", 5), ("Avocado", 5)]
+    assert index.complete("ap", 1) == [("apricot", 5)]
+    assert index.complete("app") == [("Apple", 3)]
+    assert index.complete("c") == []
+    assert index.complete("") == []
+
+def test_suggestions_weighted_by_borrows(catalog):
+    borrow("9780000000003", 2)
+    borrow("9780000000002", 1)
+    values = [s["value"] for s in svc.suggest_completions("the h", "title")]
+    assert values == ["The Haunting of Hill House", "The Hunger Games", "The Hobbit"]
+    assert svc.suggest_completions("THE HA", "title") == [{"value": "The Haunting of Hill House", "borrows": 2}]
+
+def test_author_suggestions_sum_their_books(catalog):
+    borrow("9780000000001", 1)
+    borrow("9780000000005", 1)
+    borrow("9780000000004", 1)
+    assert svc.suggest_completions("j", "author") == [{"value": "J.R.R. Tolkien", "borrows": 2}]
+    assert svc.suggest_completions("s", "author", limit=1)[0]["value"] == "Shirley Jackson"
+
+def test_new_titles_become_suggestions(catalog):
+    assert svc.suggest_completions("dune", "title") == []
+    db.insert_book("Dune", "Frank Herbert", "9780000000006", 1, 1)
+    assert svc.suggest_completions("du", "title") == [{"value": "Dune", "borrows": 0}]
+    catalog_snapshot.get_catalog_snapshot()._suggest.join(5)
+    assert svc.suggest_completions("du", "title") == [{"value": "Dune", "borrows": 0}]
+    assert svc.suggest_completions("j", "author") == [{"value": "J.R.R. Tolkien", "borrows": 0}]
+
+def test_stale_suggestions_are_rebuilt_off_the_request_thread(catalog, monkeypatch):
+    import threading
+    svc.suggest_completions("the", "title")
+    borrow("9780000000004", 3)
+    monkeypatch.setattr(catalog_snapshot, "SUGGEST_MAX_AGE_SECONDS", 0)
+    counted_on = []
+    counts = db.get_borrow_counts
+    def get_borrow_counts():
+        counted_on.append(threading.current_thread().name)
+        return counts()
+    monkeypatch.setattr(db, "get_borrow_counts", get_borrow_counts)
+
+    # the request is answered from the old weights while the rebuild runs
+    assert svc.suggest_completions("ham", "title") == [{"value": "Hamlet", "borrows": 0}]
+    catalog_snapshot.get_catalog_snapshot()._suggest.join(5)
+    assert counted_on == ["suggest-index"]
+    monkeypatch.setattr(catalog_snapshot, "SUGGEST_MAX_AGE_SECONDS", 300)
+    assert svc.suggest_completions("ham", "title") == [{"value": "Hamlet", "borrows": 3}]
+
+def test_suggest_endpoint(catalog):
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        ok = client.get("/api/suggest?prefix=ham&field=title")
+        bad_field = client.get("/api/suggest?prefix=ham&field=isbn")
+        bad_limit = client.get("/api/suggest?prefix=ham&limit=x")
+    assert ok.get_json()["suggestions"] == [{"value": "Hamlet", "borrows": 0}]
+    assert bad_field.status_code == 400
+    assert bad_limit.status_code == 400
+
+def test_prefix_index_matches_sorting_on_large_ranges():
+    import random
+    rng = random.Random(3)
+    entries = [("".join(rng.choice("ab") for _ in range(8)), rng.randint(0, 20)) for _ in range(3000)]
+    index = PrefixIndex(entries)
+    totals = {}
+    for text, weight in entries:
+        totals[text] = totals.get(text, 0) + weight
+    for prefix in ("a", "ab", "bba", "abababab", "c"):
+        expected = sorted(((t, w) for t, w in totals.items() if t.startswith(prefix)),
+                          key=lambda tw: (-tw[1], tw[0]))[:15]
+        assert index.complete(prefix, 15) == expected
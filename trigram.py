@@ -0,0 +1,79 @@
+"""
+Trigram inverted index for case-insensitive substring search.
+"""
+
+import threading
+from typing import Dict, Hashable, Optional, Set
+
+# Terms shorter than this have no trigrams and must be answered by scanning
+MIN_TERM_LENGTH = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    """Every distinct 3-character window of `text`."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Maps each lowercased trigram to the ids of the documents containing it.
+
+    Any document containing a term contains all of the term's trigrams, so
+    intersecting their posting sets gives a superset of the matches; callers
+    confirm each candidate with a plain `term in text` check. The index is
+    add-only: re-adding a changed document leaves its old trigrams behind,
+    which only costs a few extra candidates until the index is rebuilt.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.documents = 0
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        grams = trigrams(text.lower())
+        with self._lock:
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    self._postings[gram] = {doc_id}
+                else:
+                    posting.add(doc_id)
+            self.documents += 1
+
+    def candidates(self, term: str) -> Optional[Set[Hashable]]:
+        """
+        Ids of documents that may contain `term`, or None if the term is too
+        short to use the index.
+        """
+        grams = trigrams(term.lower())
+        if not grams:
+            return None
+        with self._lock:
+            postings = []
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if not posting:
+                    return set()
+                postings.append(posting)
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]:
+                result &= posting
+                if not result:
+                    break
+            return result
+
+    def estimate(self, term: str) -> Optional[int]:
+        """
+        Upper bound on len(candidates(term)) without intersecting anything:
+        the size of the term's rarest trigram's posting set.
+        """
+        grams = trigrams(term.lower())
+        if not grams:
+            return None
+        with self._lock:
+            return min(len(self._postings.get(gram, ())) for gram in grams)
+
+    def __len__(self) -> int:
+        return len(self._postings)